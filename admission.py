@@ -0,0 +1,167 @@
+import os
+import json
+import host_info
+import state_file
+import vm_command
+
+# Controllo di ammissione: RAM e vCPU richieste contro MemAvailable, PSI e il
+# totale gia' impegnato dalle VM del launcher (run/admission.json, condiviso
+# tra GUI e CLI). La politica decide se mettere in coda, rifiutare o ridurre.
+
+POLICY_FILE = "admission_policy.json"
+OFF = "off"
+QUEUE = "queue"
+REJECT = "reject"
+DOWNSIZE = "downsize"
+MODES = [QUEUE, REJECT, DOWNSIZE, OFF]
+
+DEFAULT_POLICY = {
+    "mode": QUEUE,
+    # Somma della RAM impegnata rispetto a MemTotal, vCPU rispetto alle CPU online
+    "ram_overcommit": 1.0,
+    "vcpu_overcommit": 2.0,
+    # RAM lasciata all'host oltre a quella dei guest
+    "reserve_mb": 512,
+    # Soglie PSI "some avg10" in percentuale
+    "psi_memory_max": 10.0,
+    "psi_cpu_max": 60.0,
+    "min_ram_mb": 256
+}
+
+
+class Rejected(vm_command.LaunchError):
+    pass
+
+
+class Deferred(vm_command.LaunchError):
+    # Non c'e' posto adesso: riprovare piu' tardi
+    pass
+
+
+def load_policy():
+    policy = DEFAULT_POLICY.copy()
+    if os.path.exists(POLICY_FILE):
+        with open(POLICY_FILE, "r") as f:
+            policy.update(json.load(f))
+    return policy
+
+
+def save_policy(policy):
+    with open(POLICY_FILE, "w") as f:
+        json.dump(policy, f, indent=4)
+
+
+def requested(config):
+    config = vm_command.from_profile(config)
+    try:
+        ram = int(str(config["ram"]).strip())
+    except ValueError:
+        ram = 0
+    try:
+        vcpus = int(str(config["cpu"]).strip())
+    except ValueError:
+        vcpus = 1
+    # La RAM su hugepage viene dal pool riservato, la controlla memory_backend
+    return (0 if config.get("hugepages") else ram), vcpus
+
+
+def host_status(committed=None):
+    meminfo = host_info.read_meminfo()
+    status = {
+        "mem_total_mb": meminfo.get("MemTotal", 0) // 1024,
+        "mem_available_mb": meminfo.get("MemAvailable", meminfo.get("MemFree", 0)) // 1024,
+        "cpus": host_info.online_cpus(),
+        "psi_memory": host_info.read_pressure("memory").get("some", {}).get("avg10", 0.0),
+        "psi_cpu": host_info.read_pressure("cpu").get("some", {}).get("avg10", 0.0)
+    }
+    committed = committed or {}
+    status["committed_ram_mb"] = sum(entry["ram"] for entry in committed.values())
+    status["committed_vcpus"] = sum(entry["vcpus"] for entry in committed.values())
+    status["vms"] = len(committed)
+    return status
+
+
+def decide(ram, vcpus, status, policy):
+    # Ritorna (ram, vcpus, motivi): motivi vuoti = ammessa con quelle dimensioni
+    reasons = []
+    ram_limit = status["mem_total_mb"] * policy["ram_overcommit"] - status["committed_ram_mb"]
+    # I guest gia' avviati non hanno ancora toccato tutta la loro RAM: conta il minimo dei due
+    ram_free = min(ram_limit, status["mem_available_mb"] - policy["reserve_mb"])
+    vcpu_free = int(status["cpus"] * policy["vcpu_overcommit"]) - status["committed_vcpus"]
+    if ram > ram_free:
+        reasons.append(f"needs {ram} MB RAM, {max(0, int(ram_free))} MB admissible "
+                       f"({status['mem_available_mb']} MB available, {status['committed_ram_mb']} MB committed)")
+    if vcpus > vcpu_free:
+        reasons.append(f"needs {vcpus} vCPUs, {max(0, vcpu_free)} admissible "
+                       f"({status['committed_vcpus']} committed on {status['cpus']} CPUs x{policy['vcpu_overcommit']})")
+    if status["psi_memory"] > policy["psi_memory_max"]:
+        reasons.append(f"memory pressure {status['psi_memory']:.1f}% > {policy['psi_memory_max']}%")
+    if status["psi_cpu"] > policy["psi_cpu_max"]:
+        reasons.append(f"CPU pressure {status['psi_cpu']:.1f}% > {policy['psi_cpu_max']}%")
+    return ram_free, vcpu_free, reasons
+
+
+class Ledger:
+    def __init__(self, path=None, policy=None):
+        self.path = path or vm_command.runtime_path("admission.json")
+        self.policy = policy or load_policy()
+
+    def admit(self, key, config, warnings=None, resize=True):
+        # Controllo e registrazione sotto lo stesso lock: due launcher non vedono lo stesso spazio libero.
+        # resize=False per le riprese da file di stato, che devono avere la stessa RAM
+        ram, vcpus = requested(config)
+        policy = self.policy
+
+        def update(state):
+            state.pop(key, None)
+            status = host_status(state)
+            ram_free, vcpu_free, reasons = decide(ram, vcpus, status, policy)
+            result = config
+            if reasons and policy["mode"] == OFF:
+                if warnings is not None:
+                    warnings.extend(f"Admission: {reason}" for reason in reasons)
+            elif reasons:
+                never = (ram > status["mem_total_mb"] * policy["ram_overcommit"] - policy["reserve_mb"]
+                         or vcpus > status["cpus"] * policy["vcpu_overcommit"])
+                pressure = [r for r in reasons if "pressure" in r]
+                if policy["mode"] == REJECT or (never and policy["mode"] == QUEUE):
+                    raise Rejected("Admission control rejected the launch:\n" + "\n".join(reasons))
+                if policy["mode"] == DOWNSIZE and resize and not pressure and ram_free >= policy["min_ram_mb"] and vcpu_free >= 1:
+                    result = dict(vm_command.from_profile(config))
+                    if ram > ram_free:
+                        result["ram"] = str(int(ram_free) // 64 * 64)
+                    if vcpus > vcpu_free:
+                        result["cpu"] = str(vcpu_free)
+                    if warnings is not None:
+                        warnings.append(f"Admission: down-sized to {result['ram']} MB RAM, {result['cpu']} vCPUs")
+                else:
+                    raise Deferred("Waiting for host resources:\n" + "\n".join(reasons))
+            final_ram, final_vcpus = requested(result)
+            state[key] = {"pid": os.getpid(), "ram": final_ram, "vcpus": final_vcpus}
+            return result
+        return state_file.update(self.path, update)
+
+    def attach(self, key, pid):
+        # Da qui la voce vive quanto il processo QEMU, anche se il launcher esce prima
+        def update(state):
+            if key in state:
+                state[key]["pid"] = pid
+                state[key]["attached"] = True
+        state_file.update(self.path, update)
+
+    def qemu_pids(self):
+        # {chiave: pid di QEMU}: prima di attach il pid di una voce e' quello del launcher
+        return {key: entry["pid"] for key, entry in state_file.update(self.path, dict).items()
+                if entry.get("attached")}
+
+    def release(self, key):
+        state_file.update(self.path, lambda state: state.pop(key, None))
+
+    def status(self):
+        return state_file.update(self.path, host_status)
+
+
+def describe(status):
+    return (f"RAM {status['committed_ram_mb'] / 1024:.1f} GiB committed / {status['mem_total_mb'] / 1024:.1f} GiB "
+            f"({status['mem_available_mb'] / 1024:.1f} available), vCPU {status['committed_vcpus']}/{status['cpus']}, "
+            f"PSI mem {status['psi_memory']:.1f}% cpu {status['psi_cpu']:.1f}%, {status['vms']} VM(s)")
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import image_digest
+
+# SHA-256 di N immagini finte: throughput con 1..N thread (cache vuota ogni volta),
+# poi una seconda passata che deve trovare tutto nella cache (solo stat).
+
+
+def write_images(root, count, megabytes):
+    block = os.urandom(1 << 20)
+    paths = []
+    for i in range(count):
+        path = os.path.join(root, f"image{i}.iso")
+        with open(path, "wb") as f:
+            for _ in range(megabytes):
+                f.write(block[i:] + block[:i])
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image checksum throughput and cache")
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--mb", type=int, default=256, help="size of each image")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-checksum-")
+    try:
+        paths = write_images(root, args.images, args.mb)
+        total = args.images * args.mb
+        for workers in args.workers:
+            cache = os.path.join(root, f"cache{workers}.db")
+            start = time.perf_counter()
+            image_digest.digests(paths, workers=workers, cache_path=cache)
+            elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            _, _, hashed = image_digest.digests(paths, workers=workers, cache_path=cache)
+            cached = time.perf_counter() - start
+            print({"workers": workers, "mb": total, "hash_s": round(elapsed, 2),
+                   "mb_s": round(total / elapsed, 1), "cached_ms": round(cached * 1000, 2),
+                   "rehashed": len(hashed)})
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
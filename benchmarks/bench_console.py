@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import argparse
+import importlib.util
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from console_buffer import ConsoleBuffer
+
+# Misura la reattivita' della GUI mentre una VM "chiacchierona" scrive in console.
+# Con PyQt6 installato simula readyRead + flush a frame rate limitato su un
+# QTextEdit offscreen e misura il ritardo di un timer heartbeat da 5 ms.
+# Senza PyQt6 misura solo il costo di ingest del ConsoleBuffer.
+
+CHUNK = 4096
+LINE = "[    0.123456] virtio_blk virtio1: [vda] 41943040 512-byte logical blocks (21.5 GB/20.0 GiB)\n"
+
+
+def make_payload(size):
+    text = (LINE * (size // len(LINE) + 1))[:size]
+    return text.encode()
+
+
+def bench_buffer(rate_mb, seconds):
+    buf = ConsoleBuffer()
+    payload = make_payload(CHUNK)
+    chunks = int(rate_mb * (1 << 20) * seconds) // CHUNK
+    pos = 0
+    start = time.perf_counter()
+    for i in range(chunks):
+        buf.feed(payload)
+        if i % 64 == 0:
+            _, pos = buf.read_since(pos)
+    elapsed = time.perf_counter() - start
+    return {"rate_mb_s": rate_mb, "cpu_s": elapsed, "cpu_share": elapsed / seconds, "buffer_chars": buf.size}
+
+
+def bench_gui(rate_mb, seconds, batched):
+    from PyQt6.QtWidgets import QApplication, QTextEdit
+    from PyQt6.QtCore import QTimer, QElapsedTimer
+    from PyQt6.QtGui import QTextCursor
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    view = QTextEdit()
+    view.setReadOnly(True)
+    view.document().setMaximumBlockCount(20000)
+    buf = ConsoleBuffer()
+    payload = make_payload(CHUNK)
+    per_tick = max(1, int(rate_mb * (1 << 20) / CHUNK / 100))
+    state = {"pos": 0, "last": None}
+    lags = []
+    clock = QElapsedTimer()
+    clock.start()
+
+    def produce():
+        for _ in range(per_tick):
+            if batched:
+                buf.feed(payload)
+            else:
+                view.append(payload.decode())
+
+    def flush():
+        text, state["pos"] = buf.read_since(state["pos"])
+        if text:
+            cursor = QTextCursor(view.document())
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText(text)
+
+    def heartbeat():
+        now = clock.elapsed()
+        if state["last"] is not None:
+            lags.append(max(0, now - state["last"] - 5))
+        state["last"] = now
+
+    timers = []
+    for interval, slot in ((10, produce), (5, heartbeat)) + (((33, flush),) if batched else ()):
+        timer = QTimer()
+        timer.setInterval(interval)
+        timer.timeout.connect(slot)
+        timer.start()
+        timers.append(timer)
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec()
+    for timer in timers:
+        timer.stop()
+    lags.sort()
+    return {
+        "rate_mb_s": rate_mb,
+        "mode": "batched" if batched else "append",
+        "lag_median_ms": statistics.median(lags) if lags else None,
+        "lag_p99_ms": lags[int(len(lags) * 0.99) - 1] if lags else None,
+        "lag_max_ms": lags[-1] if lags else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Console pipeline benchmark")
+    parser.add_argument("--rates", default="0.1,1,4,16", help="output rates in MB/s")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--naive", action="store_true", help="also run the old append-per-chunk path")
+    args = parser.parse_args()
+    rates = [float(r) for r in args.rates.split(",")]
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    have_qt = importlib.util.find_spec("PyQt6") is not None
+    if not have_qt:
+        print("PyQt6 not available, measuring ConsoleBuffer only")
+
+    for rate in rates:
+        print(bench_buffer(rate, args.seconds))
+        if have_qt:
+            print(bench_gui(rate, args.seconds, batched=True))
+            if args.naive:
+                print(bench_gui(rate, args.seconds, batched=False))
+
+
+if __name__ == "__main__":
+    main()
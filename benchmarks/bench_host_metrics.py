@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import ctypes
+import signal
+import argparse
+import statistics
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import host_metrics
+
+# Costo del campionamento host_metrics con N processi "QEMU" finti: figli
+# ottenuti con fork che avviano thread chiamati "CPU i/KVM" (come i vCPU di
+# QEMU) e dormono. Riporta il tempo CPU di un giro completo e la quota di un
+# core a 1 campione al secondo, con e senza l'export Prometheus.
+
+PR_SET_NAME = 15
+
+
+def fake_vm(vcpus):
+    libc = ctypes.CDLL(None)
+
+    def vcpu(index):
+        libc.prctl(PR_SET_NAME, f"CPU {index}/KVM".encode(), 0, 0, 0)
+        while True:
+            time.sleep(3600)
+    for index in range(vcpus):
+        threading.Thread(target=vcpu, args=(index,), daemon=True).start()
+    while True:
+        time.sleep(3600)
+
+
+def spawn(count, vcpus):
+    pids = []
+    for _ in range(count):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                fake_vm(vcpus)
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    return pids
+
+
+def measure(sampler, passes):
+    costs = []
+    for _ in range(passes):
+        costs.append(sampler.sample())
+    costs.sort()
+    return {
+        "pass_ms_median": round(statistics.median(costs) * 1000, 3),
+        "pass_ms_p95": round(costs[int(len(costs) * 0.95) - 1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host metrics sampler overhead")
+    parser.add_argument("--vms", type=int, default=200)
+    parser.add_argument("--vcpus", type=int, default=2, help="vCPU threads per fake VM")
+    parser.add_argument("--passes", type=int, default=50)
+    args = parser.parse_args()
+
+    pids = spawn(args.vms, args.vcpus)
+    try:
+        # I thread vCPU devono esistere prima del primo scan
+        time.sleep(1.0)
+        sampler = host_metrics.HostSampler()
+        for pid in pids:
+            sampler.add(pid, pid, f"vm-{pid}")
+        sampler.sample()
+        found = sum(len(proc.vcpus) for proc in sampler.procs.values())
+        result = {"vms": args.vms, "vcpu_threads": found}
+        result.update(measure(sampler, args.passes))
+        result["core_share_at_1hz"] = f"{result['pass_ms_median'] / 10:.3f}%"
+        print(result)
+        sampler.prom_path = "/tmp/bench_host_metrics.prom"
+        result = {"vms": args.vms, "export": "prometheus"}
+        result.update(measure(sampler, args.passes))
+        result["core_share_at_1hz"] = f"{result['pass_ms_median'] / 10:.3f}%"
+        print(result)
+        os.remove(sampler.prom_path)
+        start = time.perf_counter()
+        sampler.write_csv("/tmp/bench_host_metrics.csv")
+        print({"csv_ms": round((time.perf_counter() - start) * 1000, 1),
+               "csv_bytes": os.path.getsize("/tmp/bench_host_metrics.csv")})
+        os.remove("/tmp/bench_host_metrics.csv")
+        sampler.stop()
+    finally:
+        for pid in pids:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+
+if __name__ == "__main__":
+    main()
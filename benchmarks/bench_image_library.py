@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+import struct
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import image_library
+
+# Scansione della libreria su N immagini finte sparse (qcow2 con backing, ISO, raw):
+# prima scansione (header letti in parallelo), nuova scansione senza cambiamenti
+# (solo stat) e nuova scansione dopo aver toccato il 10% dei file.
+
+GIB = 1 << 30
+
+
+def write_qcow2(path, virtual_size, backing=None):
+    name = backing.encode() if backing else b""
+    header = struct.pack(">4sIQIIQI", b"QFI\xfb", 3, 112 if name else 0, len(name), 16, virtual_size, 0)
+    header += bytes(72 - len(header)) + struct.pack(">QQQII", 0, 0, 0, 4, 112)
+    header += bytes(112 - len(header)) + name
+    with open(path, "wb") as f:
+        f.write(header)
+        f.truncate(1 << 20)
+
+
+def write_iso(path, label):
+    with open(path, "wb") as f:
+        f.seek(image_library.ISO_DESCRIPTORS)
+        pvd = bytearray(image_library.ISO_SECTOR)
+        pvd[0:6] = b"\x01CD001"
+        pvd[40:72] = label.encode().ljust(32)
+        struct.pack_into("<I", pvd, 80, 100000)
+        struct.pack_into("<H", pvd, 128, 2048)
+        f.write(pvd + b"\xffCD001" + bytes(image_library.ISO_SECTOR - 6))
+        f.truncate(4 << 20)
+
+
+def make_tree(root, count):
+    for i in range(count):
+        directory = os.path.join(root, f"dir{i % 16}")
+        os.makedirs(directory, exist_ok=True)
+        kind = i % 4
+        if kind == 0:
+            write_qcow2(os.path.join(directory, f"base{i}.qcow2"), 20 * GIB)
+        elif kind == 1:
+            write_qcow2(os.path.join(directory, f"overlay{i}.qcow2"), 20 * GIB, f"base{i - 1}.qcow2")
+        elif kind == 2:
+            write_iso(os.path.join(directory, f"install{i}.iso"), f"INSTALL_{i}")
+        else:
+            with open(os.path.join(directory, f"disk{i}.img"), "wb") as f:
+                f.truncate(GIB)
+
+
+def timed(library, directories):
+    start = time.perf_counter()
+    changed, removed = library.refresh(directories)
+    return round((time.perf_counter() - start) * 1000, 1), len(changed), len(removed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image library scan and rescan")
+    parser.add_argument("--images", type=int, default=2000, help="fake images to create")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-images-")
+    try:
+        make_tree(os.path.join(root, "images"), args.images)
+        directories = [os.path.join(root, "images")]
+        library = image_library.ImageLibrary(os.path.join(root, "cache.db"))
+        for name in ("cold", "warm"):
+            ms, changed, removed = timed(library, directories)
+            print({"scan": name, "ms": ms, "headers_read": changed, "removed": removed})
+        paths = [row["path"] for row in library.entries()]
+        for path in paths[::10]:
+            os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        ms, changed, removed = timed(library, directories)
+        print({"scan": "10% touched", "ms": ms, "headers_read": changed, "removed": removed})
+        start = time.perf_counter()
+        entries = {row["path"]: row for row in library.entries()}
+        chains = sum(len(image_library.backing_chain(path, entries)) for path in entries)
+        print({"list_and_chains_ms": round((time.perf_counter() - start) * 1000, 1), "images": len(entries),
+               "backing_links": chains})
+        library.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
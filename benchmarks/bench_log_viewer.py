@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import random
+import argparse
+import resource
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import log_index
+
+# log_index su un log finto di N MB (righe da kernel/serial di lunghezza variabile):
+# velocita' di indicizzazione, memoria dell'indice e del processo, latenza per una
+# schermata di righe in un punto a caso (quello che chiede la vista) e velocita'
+# della ricerca con un pattern raro e uno frequente.
+
+LINES = [
+    b"[    0.123456] virtio_blk virtio1: [vda] 41943040 512-byte logical blocks (21.5 GB/20.0 GiB)\n",
+    b"[  OK  ] Started Journal Service.\n",
+    b"soak: iteration %d ok\n",
+    b"\n",
+    b"kernel: EXT4-fs (vda1): mounted filesystem with ordered data mode. Quota mode: none.\n"
+]
+SCREEN = 50
+
+
+def write_log(path, megabytes):
+    target = int(megabytes * (1 << 20))
+    rng = random.Random(1)
+    written = 0
+    with open(path, "wb") as f:
+        while written < target:
+            block = b"".join(line % rng.randrange(1 << 20) if b"%d" in line else line
+                             for line in rng.choices(LINES, k=4096))
+            f.write(block)
+            written += len(block)
+    return written
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def rss_mb():
+    # RSS attuale, anonimo (heap) e mappato da file
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon:", "RssFile:")):
+                name, value = line.split(":")
+                values[name] = round(int(value.split()[0]) / 1024, 1)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log viewer index and search")
+    parser.add_argument("--mb", type=float, default=1024, help="size of the fake log")
+    parser.add_argument("--reads", type=int, default=1000, help="random screens to read")
+    parser.add_argument("--keep", metavar="FILE", help="use/keep this log file instead of a temporary one")
+    args = parser.parse_args()
+
+    path = args.keep or tempfile.mktemp(prefix="bench-log-", suffix=".log")
+    try:
+        if not os.path.exists(path):
+            write_log(path, args.mb)
+        size = os.path.getsize(path)
+        rss_before = max_rss_mb()
+        index = log_index.LogIndex(path)
+        start = time.perf_counter()
+        while index.refresh():
+            pass
+        elapsed = time.perf_counter() - start
+        lines = index.line_count()
+        print({"file_mb": round(size / (1 << 20), 1), "lines": lines, "index_s": round(elapsed, 2),
+               "index_mb_s": round(size / elapsed / (1 << 20), 1),
+               "index_kb": round(index.memory_bytes() / 1024, 1),
+               "max_rss_growth_mb": round(max_rss_mb() - rss_before, 1), "rss_mb": rss_mb()})
+
+        rng = random.Random(2)
+        latencies = []
+        for _ in range(args.reads):
+            first = rng.randrange(max(1, lines - SCREEN))
+            t = time.perf_counter()
+            index.lines(first, SCREEN)
+            latencies.append(time.perf_counter() - t)
+        latencies.sort()
+        print({"screen_lines": SCREEN, "read_ms_median": round(statistics.median(latencies) * 1000, 3),
+               "read_ms_p99": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3)})
+        index.close()
+
+        for pattern in (r"iteration 12345 ", r"OK"):
+            start = time.perf_counter()
+            results = log_index.search(path, pattern)
+            elapsed = time.perf_counter() - start
+            print({"pattern": pattern, "matching_lines": len(results), "search_s": round(elapsed, 2),
+                   "search_mb_s": round(size / elapsed / (1 << 20), 1)})
+        print({"max_rss_mb": round(max_rss_mb(), 1), "rss_mb": rss_mb()})
+    finally:
+        if not args.keep and os.path.exists(path):
+            os.remove(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
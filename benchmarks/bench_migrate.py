@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import itertools
+import subprocess
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+
+import bench_suite
+import qmp_client
+import vm_command
+import vm_migrate
+
+# Migrazione live locale tra due QEMU per ogni combinazione di trasporto (unix/tcp),
+# multifd e post-copy: durata, downtime, throughput, passate e dirty rate. Di default
+# con fake_qemu (che sporca FAKE_QEMU_DIRTY_MB MiB/s); --real usa i binari di
+# qemu_paths.json nella cartella corrente.
+
+
+def start(config, key, paths, incoming=None):
+    qmp_socket = vm_command.runtime_path(f"{key}.qmp")
+    if os.path.exists(qmp_socket):
+        os.remove(qmp_socket)
+    cmd = vm_command.build_command(config, paths, qmp_socket=qmp_socket, incoming=incoming)
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    return process, qmp_socket
+
+
+async def wait_ready(qmp_socket):
+    client = await vm_migrate.connect(qmp_socket)
+    await client.close()
+
+
+def run_one(config, paths, options, key):
+    source, source_qmp = start(config, f"{key}-src", paths)
+    dest, dest_qmp = start(config, f"{key}-dst", paths, incoming="defer")
+    try:
+        asyncio.run(wait_ready(source_qmp))
+        uri = vm_migrate.migration_uri(options["transport"], key)
+        return asyncio.run(vm_migrate.migrate(source_qmp, dest_qmp, uri, options))
+    except (qmp_client.QMPError, OSError, asyncio.TimeoutError) as e:
+        return {"error": str(e)}
+    finally:
+        for process in (source, dest):
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local live migration matrix")
+    parser.add_argument("--ram-mb", type=int, default=1024)
+    parser.add_argument("--dirty-mb", type=int, default=64, help="fake guest dirty rate in MiB/s")
+    parser.add_argument("--real", action="store_true", help="use the QEMU binaries of qemu_paths.json")
+    parser.add_argument("--downtime-ms", type=int, default=vm_migrate.DOWNTIME_LIMIT_MS)
+    args = parser.parse_args()
+
+    config = {"arch": "x86_64", "ram": str(args.ram_mb), "cpu": "1", "net": "none"}
+    workdir = tempfile.mkdtemp(prefix="bench-migrate-")
+    cwd = os.getcwd()
+    try:
+        if args.real:
+            paths = None
+            os.chdir(workdir)
+        else:
+            bench_suite.setup_workdir(workdir)
+            os.environ["FAKE_QEMU_DIRTY_MB"] = str(args.dirty_mb)
+            paths = {arch: bench_suite.FAKE_QEMU for arch in vm_command.qemu_config.DEFAULT_PATHS}
+        for index, (transport, multifd, postcopy) in enumerate(
+                itertools.product(vm_migrate.TRANSPORTS, (False, True), (False, True))):
+            options = dict(vm_migrate.DEFAULT_OPTIONS, transport=transport, multifd=multifd, postcopy=postcopy,
+                           downtime_ms=args.downtime_ms)
+            start_time = time.perf_counter()
+            result = run_one(config, paths, options, f"bench{index}")
+            row = {"transport": transport, "multifd": multifd, "postcopy": postcopy,
+                   "wall_s": round(time.perf_counter() - start_time, 2)}
+            if "error" in result:
+                row["error"] = result["error"]
+            else:
+                row.update({"seconds": result["seconds"], "downtime_ms": result["downtime_ms"],
+                            "mib_s": round(result["throughput"] / (1 << 20)), "passes": result["passes"],
+                            "peak_dirty_mib_s": round(result["peak_dirty_rate"] / (1 << 20)),
+                            "postcopy_used": result["postcopy"], "notes": result["notes"]})
+            print(row)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import fake_qmp
+import qmp_client
+from vm_stats import VMStatsPoller
+
+# Polling QMP di molte VM finte su un solo event loop: misura la CPU usata
+# dal launcher e verifica che ogni VM produca le sue serie temporali.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QMP polling benchmark against fake QMP servers")
+    parser.add_argument("--vms", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    loop = qmp_client.shared_loop()
+    with tempfile.TemporaryDirectory(prefix="qmp-bench-") as tmp:
+        sockets = [os.path.join(tmp, f"vm{i}.qmp") for i in range(args.vms)]
+        servers = [loop.run(fake_qmp.start_server(path, fake_qmp.FakeVM(vcpus=4))) for path in sockets]
+        # I server finti girano sullo stesso loop: il tempo misurato include anche loro
+        poller = VMStatsPoller(interval=args.interval, loop=loop)
+        cpu_start = time.process_time()
+        for vm_id, path in enumerate(sockets):
+            poller.add_vm(vm_id, path)
+        time.sleep(args.seconds)
+        cpu = time.process_time() - cpu_start
+        poller.stop()
+        samples = [len(poller.snapshot(vm_id).get("vcpus", [])) for vm_id in range(args.vms)]
+        for server in servers:
+            server.close()
+
+    print({
+        "vms": args.vms,
+        "interval_s": args.interval,
+        "samples_min": min(samples),
+        "samples_max": max(samples),
+        "cpu_share": cpu / args.seconds,
+        "metrics": sorted(poller.snapshot(0)) if args.vms else [],
+    })
+
+
+if __name__ == "__main__":
+    main()
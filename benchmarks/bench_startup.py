@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Tempo di avvio di GUI e CLI con dettaglio degli import (-X importtime).
+# Con --budget-ms esce con codice 1 se la mediana supera il budget.
+
+GUI_SNIPPET = """
+import time
+start = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
+import qemu_gui
+app = QApplication([])
+window = qemu_gui.QemuLauncher()
+window.show()
+def painted():
+    print((time.perf_counter() - start) * 1000)
+    app.quit()
+QTimer.singleShot(0, painted)
+app.exec()
+"""
+
+CLI_SNIPPET = """
+import time
+start = time.perf_counter()
+import qemu_cli
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def run_python(code, extra_args=(), env=None):
+    return subprocess.run([sys.executable, *extra_args, "-c", code], cwd=ROOT, capture_output=True,
+                          text=True, env=env)
+
+
+def measure(code, runs, env=None):
+    times = []
+    for _ in range(runs):
+        result = run_python(code, env=env)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return {"median_ms": statistics.median(times), "min_ms": min(times), "max_ms": max(times)}
+
+
+def import_breakdown(module, top, env=None):
+    result = run_python(f"import {module}", ["-X", "importtime"], env=env)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append({"module": name.strip(), "self_ms": int(self_us) / 1000,
+                     "cumulative_ms": int(cumulative_us) / 1000, "depth": depth})
+    # -X importtime stampa i figli prima del genitore: i depth 1 che precedono
+    # la riga del modulo sono i suoi import diretti
+    children, pending, total = [], [], 0.0
+    for row in rows:
+        if row["depth"] == 1:
+            pending.append(row)
+        elif row["depth"] == 0:
+            if row["module"] == module:
+                children, total = pending, row["cumulative_ms"]
+            pending = []
+    children.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return {"total_ms": total, "top": [{k: row[k] for k in ("module", "self_ms", "cumulative_ms")}
+                                       for row in children[:top]]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="heaviest top-level imports to show")
+    parser.add_argument("--budget-ms", type=float, help="fail if GUI first paint median exceeds this")
+    parser.add_argument("--cli-budget-ms", type=float, help="fail if CLI import median exceeds this")
+    parser.add_argument("--json", metavar="FILE", help="write results to FILE")
+    args = parser.parse_args()
+
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    results = {"cli": measure(CLI_SNIPPET, args.runs, env), "cli_imports": import_breakdown("qemu_cli", args.top, env)}
+    try:
+        results["gui"] = measure(GUI_SNIPPET, args.runs, env)
+        results["gui_imports"] = import_breakdown("qemu_gui", args.top, env)
+    except RuntimeError as e:
+        results["gui"] = {"error": str(e)}
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    over = []
+    if args.budget_ms and "median_ms" in results["gui"] and results["gui"]["median_ms"] > args.budget_ms:
+        over.append(f"GUI first paint {results['gui']['median_ms']:.1f} ms > {args.budget_ms} ms")
+    if args.cli_budget_ms and results["cli"]["median_ms"] > args.cli_budget_ms:
+        over.append(f"CLI import {results['cli']['median_ms']:.1f} ms > {args.cli_budget_ms} ms")
+    for message in over:
+        print("OVER BUDGET:", message, file=sys.stderr)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
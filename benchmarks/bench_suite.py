@@ -0,0 +1,276 @@
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+import bench_startup
+import qemu_config
+import profile_manager
+import profile_index
+import qmp_client
+import serial_log
+from console_buffer import ConsoleBuffer
+from vm_process import VMProcess
+
+# Benchmark del launcher (non di QEMU): avvio di GUI e CLI, elenco profili a
+# 10/1k/10k, throughput della console e della seriale su chardev, latenza di
+# avvio concorrente di 1..100 VM. Le VM sono fake_qemu.py, selezionato da un
+# qemu_paths.json in una cartella di lavoro temporanea. I risultati vanno in un
+# file JSON per confrontare commit diversi (--compare).
+
+FAKE_QEMU = os.path.join(HERE, "fake_qemu.py")
+RESULTS_DIR = os.path.join(HERE, "results")
+READY_TIMEOUT = 60.0
+
+
+def summary(values):
+    ordered = sorted(values)
+    return {
+        "median_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[max(0, -(-len(ordered) * 95 // 100) - 1)] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2)
+    }
+
+
+def setup_workdir(path):
+    # Tutto cio' che il launcher legge dalla cartella corrente: binari, politica, profili
+    with open(os.path.join(path, qemu_config.CONFIG_FILE), "w") as f:
+        json.dump({arch: FAKE_QEMU for arch in qemu_config.DEFAULT_PATHS}, f)
+    with open(os.path.join(path, "admission_policy.json"), "w") as f:
+        json.dump({"mode": "off"}, f)
+    os.chdir(path)
+
+
+def write_profiles(directory, count):
+    os.makedirs(directory, exist_ok=True)
+    archs = ["x86_64", "aarch64", "riscv64", "ppc64"]
+    for i in range(count):
+        profile = {"arch": archs[i % len(archs)], "ram": str(512 * (1 + i % 8)), "cpu": str(1 + i % 4),
+                   "disk": f"/srv/images/vm{i}.qcow2", "disk_type": "virtio", "net": "user (NAT)"}
+        with open(os.path.join(directory, f"vm{i:05d}.json"), "w") as f:
+            json.dump(profile, f)
+
+
+def bench_profiles(sizes, runs):
+    results = []
+    for count in sizes:
+        directory = os.path.abspath(f"profiles-{count}")
+        write_profiles(directory, count)
+        cli = [sys.executable, os.path.join(ROOT, "qemu_cli.py"), "--profiles", directory, "list", "ram>=2048"]
+        cold, warm = [], []
+        for _ in range(runs):
+            if os.path.exists(directory + ".index.db"):
+                os.remove(directory + ".index.db")
+            start = time.perf_counter()
+            subprocess.run(cli, check=True, stdout=subprocess.DEVNULL)
+            cold.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            subprocess.run(cli, check=True, stdout=subprocess.DEVNULL)
+            warm.append(time.perf_counter() - start)
+        # Lo stesso percorso di refresh_profiles nella GUI, senza Qt: refresh + ricerca
+        profile_manager.PROFILE_DIR = directory
+        index = profile_index.ProfileIndex()
+        refresh = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            index.refresh()
+            index.search("")
+            refresh.append(time.perf_counter() - start)
+        index.close()
+        results.append({"profiles": count, "cli_list_cold": summary(cold), "cli_list_warm": summary(warm),
+                        "gui_refresh": summary(refresh)})
+        print(f"profiles {count}: {results[-1]}", file=sys.stderr)
+    return results
+
+
+def bench_console(megabytes):
+    # Pipe da fake_qemu al ConsoleBuffer, come ManagedVM.read_output
+    total = int(megabytes * (1 << 20))
+    env = dict(os.environ, FAKE_QEMU_RATE="max", FAKE_QEMU_BYTES=str(total), FAKE_QEMU_LIFETIME="0")
+    buffer = ConsoleBuffer()
+    cpu = time.process_time()
+    start = time.perf_counter()
+    process = subprocess.Popen([FAKE_QEMU], stdout=subprocess.PIPE, env=env)
+    received = 0
+    while True:
+        data = os.read(process.stdout.fileno(), 1 << 16)
+        if not data:
+            break
+        buffer.feed(data)
+        received += len(data)
+    if process.wait() or not received:
+        raise RuntimeError(f"console: {FAKE_QEMU} exited with status {process.returncode} "
+                           f"after {received} bytes")
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    result = {"bytes": received, "mb_s": round(received / elapsed / (1 << 20), 1),
+              "launcher_cpu_s_per_mb": round(cpu / (received / (1 << 20)), 5)}
+    print(f"console: {result}", file=sys.stderr)
+    return result
+
+
+def bench_serial(megabytes):
+    # Seriale via socket chardev fino al log su disco, con un lettore che non legge mai
+    # (una GUI bloccata): il guest non deve rallentare
+    total = int(megabytes * (1 << 20))
+    env = dict(os.environ, FAKE_QEMU_RATE="max", FAKE_QEMU_BYTES=str(total), FAKE_QEMU_LIFETIME="0",
+               FAKE_QEMU_OUTPUT="serial", FAKE_QEMU_BOOT="0")
+    logs = serial_log.VMLogs({"serial_log": True}, "bench-serial", "bench")
+    stalled = logs.serial.attach()
+    cpu = time.process_time()
+    start = time.perf_counter()
+    process = subprocess.run([FAKE_QEMU, "-chardev", f"socket,id=s,path={logs.serial.path}",
+                              "-serial", "chardev:s"], env=env)
+    logs.close(wait=READY_TIMEOUT)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    received = logs.serial.received
+    if process.returncode or not received:
+        raise RuntimeError(f"serial: {FAKE_QEMU} exited with status {process.returncode} "
+                           f"after {received} bytes")
+    # Con la rotazione il log e' serial.log piu' i backup serial.log.N
+    logged = sum(os.path.getsize(path) for path in glob.glob(glob.escape(logs.serial.log.path) + "*"))
+    _, skipped = stalled.drain()
+    result = {"bytes": received, "mb_s": round(received / elapsed / (1 << 20), 1),
+              "launcher_cpu_s_per_mb": round(cpu / (received / (1 << 20)), 5),
+              "logged_bytes": logged, "stalled_reader_skipped_bytes": skipped}
+    print(f"serial: {result}", file=sys.stderr)
+    return result
+
+
+def launch_and_wait(index):
+    # Dalla richiesta di avvio alla prima risposta QMP
+    start = time.perf_counter()
+    vm = VMProcess(f"bench-{index}", {"arch": "x86_64", "ram": "64", "cpu": "1", "net": "none"})
+    deadline = start + READY_TIMEOUT
+    while time.perf_counter() < deadline:
+        try:
+            qmp_client.shared_loop().run(qmp_client.execute_once(vm.qmp_socket, "query-status", timeout=2.0))
+            return vm, time.perf_counter() - start
+        except (OSError, asyncio.TimeoutError, qmp_client.QMPError):
+            time.sleep(0.01)
+    return vm, None
+
+
+def bench_launch(counts):
+    # Il primo avvio sonda le capability del binario (qemu_caps): una volta sola, non si misura
+    vm, _ = launch_and_wait("warmup")
+    vm.stop()
+    results = []
+    for count in counts:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            launched = list(pool.map(launch_and_wait, range(count)))
+        wall = time.perf_counter() - start
+        latencies = [latency for _, latency in launched if latency is not None]
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            list(pool.map(lambda item: item[0].stop(), launched))
+        result = {"vms": count, "ready": len(latencies), "wall_s": round(wall, 3)}
+        if latencies:
+            result.update(summary(latencies))
+        results.append(result)
+        print(f"launch {count}: {result}", file=sys.stderr)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def flatten(data, prefix=""):
+    values = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            values.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(data, list):
+        for item in data:
+            # Le liste sono per dimensione (profili, vms): la chiave e' il loro valore
+            label = item.get("profiles", item.get("vms")) if isinstance(item, dict) else None
+            values.update(flatten(item, f"{prefix}{label}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        key = prefix.rstrip(".")
+        # Le dimensioni del caso non sono metriche
+        if key.rsplit(".", 1)[-1] not in ("profiles", "vms", "ready", "bytes", "logged_bytes"):
+            values[key] = data
+    return values
+
+
+def compare(old, new):
+    before, after = flatten({k: v for k, v in old.items() if k != "meta"}), flatten(
+        {k: v for k, v in new.items() if k != "meta"})
+    print(f"{'metric':60} {old['meta']['commit']:>12} {new['meta']['commit']:>12}   change")
+    for key in sorted(set(before) & set(after)):
+        change = f"{(after[key] - before[key]) / before[key] * 100:+.1f}%" if before[key] else ""
+        print(f"{key:60} {before[key]:>12} {after[key]:>12}   {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Launcher benchmark suite with a fake QEMU")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--profiles", default="10,1000,10000", help="profile counts for the listing benchmark")
+    parser.add_argument("--console-mb", type=float, default=64.0)
+    parser.add_argument("--vms", default="1,10,50,100", help="concurrent launch counts")
+    parser.add_argument("--skip", action="append", default=[], choices=["startup", "profiles", "console", "serial", "launch"])
+    parser.add_argument("--output", metavar="FILE", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", metavar="FILE", help="print the change against an earlier results file")
+    args = parser.parse_args()
+
+    results = {"meta": {"commit": git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "python": platform.python_version(), "cpus": os.cpu_count()}}
+    if "startup" not in args.skip:
+        env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+        results["startup"] = {"cli": bench_startup.measure(bench_startup.CLI_SNIPPET, args.runs, env)}
+        try:
+            results["startup"]["gui"] = bench_startup.measure(bench_startup.GUI_SNIPPET, args.runs, env)
+        except RuntimeError as e:
+            results["startup"]["gui"] = {"error": str(e)}
+        print(f"startup: {results['startup']}", file=sys.stderr)
+    output = os.path.abspath(args.output or os.path.join(RESULTS_DIR, f"{results['meta']['commit']}.json"))
+    previous = os.path.abspath(args.compare) if args.compare else None
+    work = tempfile.mkdtemp(prefix="launcher-bench-")
+    cwd = os.getcwd()
+    try:
+        setup_workdir(work)
+        if "profiles" not in args.skip:
+            results["profiles"] = bench_profiles([int(n) for n in args.profiles.split(",")], args.runs)
+        if "console" not in args.skip:
+            results["console"] = bench_console(args.console_mb)
+        if "serial" not in args.skip:
+            results["serial"] = bench_serial(args.console_mb)
+        if "launch" not in args.skip:
+            results["launch"] = bench_launch([int(n) for n in args.vms.split(",")])
+    finally:
+        os.chdir(cwd)
+        qmp_client.shared_loop().stop()
+        shutil.rmtree(work, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}", file=sys.stderr)
+    if previous:
+        with open(previous, "r") as f:
+            compare(json.load(f), results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+import os
+import sys
+import signal
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_qmp
+
+# Stand-in di qemu-system-*: si seleziona mettendo il percorso assoluto di
+# questo file in qemu_paths.json (es. "x86_64": ".../benchmarks/fake_qemu.py").
+# Risponde ai probe di qemu_caps, apre il socket QMP passato con -qmp (FakeVM),
+# scrive la seriale su stdio o sul socket -chardev (come client, come QEMU con
+# server=off) e scrive in console secondo le variabili d'ambiente:
+#
+#   FAKE_QEMU_RATE      byte/s di output in console, "max" = il piu' veloce possibile (default 0)
+#   FAKE_QEMU_OUTPUT    "serial" manda l'output di FAKE_QEMU_RATE sulla seriale invece che su stdout
+#   FAKE_QEMU_BYTES     smette di scrivere dopo questi byte (default: nessun limite)
+#   FAKE_QEMU_BOOT      secondi prima di "login:" sulla seriale (default 0.5)
+#   FAKE_QEMU_STARTUP   secondi prima che compaia il socket QMP (default 0)
+#   FAKE_QEMU_LIFETIME  secondi dopo cui esce da solo, contati dalla fine di FAKE_QEMU_BYTES
+#                       (default: fino a quit o SIGTERM)
+#   FAKE_QEMU_EXIT      codice di uscita allo scadere di FAKE_QEMU_LIFETIME (default 0)
+#   FAKE_QEMU_DIRTY_MB  MiB/s di RAM sporcati dal guest durante una migrazione live (default 64)
+
+VERSION = "QEMU emulator version 9.0.0 (fake)\nCopyright (c) 2003-2024 Fabrice Bellard and the QEMU Project developers\n"
+HELP = {
+    ("-machine", "help"): "Supported machines are:\n"
+                          "pc                   Standard PC (alias of pc-i440fx-9.0)\n"
+                          "pc-i440fx-9.0        Standard PC (i440FX + PIIX, 1996) (default)\n"
+                          "q35                  Standard PC (Q35 + ICH9, 2009) (alias of pc-q35-9.0)\n",
+    ("-cpu", "help"): "Available CPUs:\nx86 qemu64                QEMU Virtual CPU version 2.5+\n"
+                      "x86 host                  processor with all supported host features\n"
+                      "x86 max                   Enables all features supported by the accelerator\n",
+    ("-accel", "help"): "Accelerators supported in QEMU binary:\ntcg\nkvm\n",
+    ("-device", "help"): "Storage devices:\nname \"virtio-blk-pci\", bus PCI, alias \"virtio-blk\"\n"
+                         "name \"ide-hd\", bus IDE\nname \"scsi-hd\", bus SCSI\nname \"usb-storage\", bus usb-bus\n\n"
+                         "Network devices:\nname \"virtio-net-pci\", bus PCI, alias \"virtio-net\"\n"
+                         "name \"e1000e\", bus PCI\n\nDisplay devices:\nname \"VGA\", bus PCI\n"
+                         "name \"virtio-gpu-pci\", bus PCI, alias \"virtio-gpu\"\n",
+    ("-device", "virtio-blk-pci,help"): "virtio-blk-pci options:\n  iothread=<link<iothread>>\n"
+                                        "  num-queues=<uint16>  - (default: 65535)\n  discard=<bool>\n"
+}
+LINE = b"[    0.123456] virtio_blk virtio1: [vda] 41943040 512-byte logical blocks (21.5 GB/20.0 GiB)\n"
+TICK = 0.01
+
+
+def option(args, name):
+    return args[args.index(name) + 1] if name in args[:-1] else None
+
+
+def chardevs(args):
+    # -chardev socket,id=X,path=P -> {X: P}
+    sockets = {}
+    for i, arg in enumerate(args[:-1]):
+        if arg == "-chardev" and args[i + 1].startswith("socket,"):
+            fields = dict(part.split("=", 1) for part in args[i + 1].split(",")[1:] if "=" in part)
+            sockets[fields.get("id")] = fields.get("path")
+    return sockets
+
+
+async def connect_chardev(path):
+    # Come QEMU con server=off: senza nessuno in ascolto l'avvio fallisce
+    try:
+        _, writer = await asyncio.open_unix_connection(path)
+    except OSError as e:
+        sys.stderr.write(f"qemu-system: -chardev socket,path={path}: Failed to connect to '{path}': {e.strerror}\n")
+        sys.exit(1)
+    return writer
+
+
+def env(name, default):
+    return float(os.environ.get(name, default))
+
+
+async def console(out, rate, limit):
+    # Output a blocchi ogni TICK; con rate "max" scrive senza pause
+    written = 0
+    chunk = LINE * 64
+    while limit is None or written < limit:
+        if rate == "max":
+            data = chunk
+        else:
+            data = (LINE * (int(float(rate) * TICK) // len(LINE) + 1))[:int(float(rate) * TICK)]
+        if limit is not None:
+            data = data[:limit - written]
+        out.write(data)
+        await flush(out)
+        written += len(data)
+        await asyncio.sleep(0 if rate == "max" else TICK)
+
+
+async def serial(out, boot):
+    # out: stdout (-serial stdio) o lo StreamWriter del chardev
+    await asyncio.sleep(boot / 2)
+    out.write(b"Linux version 6.1.0 (fake) booting\n")
+    await flush(out)
+    await asyncio.sleep(boot / 2)
+    out.write(b"\nfake login: ")
+    await flush(out)
+
+
+async def flush(out):
+    if isinstance(out, asyncio.StreamWriter):
+        await out.drain()
+    else:
+        out.flush()
+
+
+async def run(args):
+    stdout = sys.stdout.buffer
+    qmp = option(args, "-qmp")
+    startup = env("FAKE_QEMU_STARTUP", 0)
+    if startup:
+        await asyncio.sleep(startup)
+    ram = option(args, "-m")
+    vm = fake_qmp.FakeVM(exit_on_quit=True, ram=int(ram) << 20 if ram and ram.isdigit() else 1 << 30,
+                         dirty_rate=int(env("FAKE_QEMU_DIRTY_MB", 64)) << 20)
+    if option(args, "-incoming"):
+        vm.running, vm.status = False, "inmigrate"
+    if qmp:
+        await fake_qmp.start_server(qmp.split("unix:", 1)[1].split(",")[0], vm)
+    sockets = chardevs(args)
+    port = option(args, "-serial")
+    serial_out = None
+    if port and port.startswith("chardev:"):
+        serial_out = await connect_chardev(sockets[port.split(":", 1)[1]])
+    elif port:
+        serial_out = stdout
+    monitor = option(args, "-mon")
+    if monitor:
+        writer = await connect_chardev(sockets[monitor.split("chardev=", 1)[1].split(",")[0]])
+        writer.write(b"QEMU 9.0.0 monitor - type 'help' for more information\r\n(qemu) ")
+    output = None
+    rate = os.environ.get("FAKE_QEMU_RATE", "0")
+    if rate != "0":
+        limit = os.environ.get("FAKE_QEMU_BYTES")
+        target = serial_out if os.environ.get("FAKE_QEMU_OUTPUT") == "serial" and serial_out else stdout
+        output = asyncio.ensure_future(console(target, rate, int(limit) if limit else None))
+    if serial_out is not None:
+        asyncio.ensure_future(serial(serial_out, env("FAKE_QEMU_BOOT", 0.5)))
+    lifetime = os.environ.get("FAKE_QEMU_LIFETIME")
+    if output is not None and os.environ.get("FAKE_QEMU_BYTES"):
+        # Con un limite di output la durata conta da quando ha finito di scrivere
+        await output
+    if lifetime is None:
+        await asyncio.Event().wait()
+    await asyncio.sleep(float(lifetime))
+    stdout.flush()
+    return int(os.environ.get("FAKE_QEMU_EXIT", "0"))
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["-version"]:
+        sys.stdout.write(VERSION)
+        return 0
+    if tuple(args[:2]) in HELP:
+        sys.stdout.write(HELP[tuple(args[:2])])
+        return 0
+    # Come QEMU: SIGTERM/SIGINT chiudono la VM con codice 0
+    signal.signal(signal.SIGTERM, lambda signum, frame: os._exit(0))
+    try:
+        return asyncio.run(run(args))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+
+# Server QMP finto su socket unix: risponde ai comandi usati dal launcher
+# con valori plausibili, cosi' client e dashboard si provano senza QEMU.
+
+# Blocco scritto per volta da una migrazione live simulata
+MIGRATE_BLOCK = 1 << 20
+PAGE_SIZE = 4096
+
+GREETING = {"QMP": {"version": {"qemu": {"major": 9, "minor": 0, "micro": 0}, "package": "fake"},
+                    "capabilities": []}}
+
+
+class FakeVM:
+    def __init__(self, vcpus=2, thread_base=None, exit_on_quit=False, ram=1 << 30, mapped_ram=True,
+                 migrate_rate=4 << 30, dirty_rate=64 << 20):
+        self.vcpus = vcpus
+        self.exit_on_quit = exit_on_quit
+        self.thread_base = thread_base or os.getpid()
+        self.running = True
+        self.started = time.monotonic()
+        self.status = "running"
+        # Migrazione simulata: la RAM "passa" a migrate_rate byte/s
+        self.ram = ram
+        self.capabilities = {"xbzrle": False, "multifd": False, "postcopy-ram": False}
+        if mapped_ram:
+            self.capabilities["mapped-ram"] = False
+        self.migrate_rate = migrate_rate
+        self.migration_start = None
+        self.incoming = False
+        # Migrazione live simulata (unix:/tcp:): i byte passano davvero sul socket e il
+        # guest "sporca" dirty_rate byte/s finche' gira
+        self.dirty_rate = dirty_rate
+        self.live = None
+        self.downtime_limit = 300
+        self.multifd_channels = 2
+        self.postcopy_requested = False
+        self.cancel = False
+        self.server = None
+
+    def migration(self):
+        if self.live is not None:
+            return self.live_migration()
+        if self.migration_start is None:
+            return {}
+        done = min(self.ram, int((time.monotonic() - self.migration_start) * self.migrate_rate))
+        if done < self.ram:
+            status = "active"
+        else:
+            status = "completed"
+            if self.incoming:
+                # Lo stato salvato era in pausa: il guest resta fermo fino a "cont"
+                self.incoming = False
+                self.status = "paused"
+        return {"status": status, "ram": {"transferred": done, "total": self.ram, "remaining": self.ram - done,
+                                          "mbps": self.migrate_rate * 8 / 1e6}}
+
+    def start_migration(self, uri, incoming):
+        if uri.startswith("file:") and not incoming:
+            with open(uri[len("file:"):], "wb") as f:
+                f.truncate(self.ram)
+        elif uri.startswith("exec:"):
+            # Solo una piccola parte dei dati: basta a provare la pipeline di compressione
+            subprocess.run(["sh", "-c", uri[len("exec:"):]], input=None if incoming else bytes(65536),
+                           stdout=subprocess.DEVNULL, check=True)
+        self.incoming = incoming
+        if incoming:
+            self.running, self.status = False, "inmigrate"
+        self.migration_start = time.monotonic()
+
+    def live_migration(self):
+        live = self.live
+        elapsed = (live.get("end") or time.monotonic()) - live["start"]
+        info = {"status": live["status"], "ram": {
+            "transferred": live["transferred"], "total": self.ram, "remaining": live["remaining"],
+            "mbps": live["transferred"] * 8 / max(elapsed, 1e-6) / 1e6,
+            "dirty-pages-rate": int(live["dirty_rate"] / PAGE_SIZE), "page-size": PAGE_SIZE,
+            "dirty-sync-count": live["passes"]}}
+        if live["status"] == "completed":
+            info.update({"total-time": int(elapsed * 1000), "downtime": int(live["downtime"] * 1000),
+                         "setup-time": int(live["setup"] * 1000)})
+        elif live["status"] == "failed":
+            info["error-desc"] = live["error"]
+        else:
+            info["expected-downtime"] = int(live["expected"])
+        return info
+
+    async def send(self, live, writers, amount, postcopy):
+        # Ritorna i byte mandati: meno di amount se nel frattempo e' stato chiesto post-copy
+        block = bytes(MIGRATE_BLOCK)
+        sent = 0
+        while sent < amount:
+            if self.cancel:
+                raise ConnectionError("migration cancelled")
+            if self.postcopy_requested and not postcopy:
+                break
+            n = min(MIGRATE_BLOCK, amount - sent)
+            writer = writers[(sent // MIGRATE_BLOCK) % len(writers)]
+            writer.write(block[:n])
+            await writer.drain()
+            sent += n
+            live["transferred"] += n
+            live["remaining"] = max(0, live["remaining"] - n)
+        return sent
+
+    async def send_ram(self, uri):
+        # Pre-copy a passate: quello che il guest sporca durante una passata si rimanda nella
+        # successiva; quando il resto sta nel downtime massimo si ferma il guest e si chiude
+        live = self.live = {"status": "setup", "transferred": 0, "remaining": self.ram, "passes": 0,
+                            "start": time.monotonic(), "end": None, "dirty_rate": 0, "expected": 0,
+                            "downtime": 0, "setup": 0, "error": ""}
+        channels = self.multifd_channels if self.capabilities.get("multifd") else 1
+        writers = []
+        try:
+            for _ in range(channels):
+                writers.append((await open_migration(uri))[1])
+            live["setup"] = time.monotonic() - live["start"]
+            live["status"] = "active"
+            pending = self.ram
+            postcopy = False
+            while True:
+                live["passes"] += 1
+                live["remaining"] = pending
+                started = time.monotonic()
+                sent = await self.send(live, writers, pending, postcopy)
+                elapsed = max(time.monotonic() - started, 1e-6)
+                dirtied = min(self.ram, int(elapsed * self.dirty_rate)) if self.running else 0
+                bandwidth = sent / elapsed if sent else 1
+                live["dirty_rate"] = dirtied / elapsed
+                live["expected"] = dirtied / bandwidth * 1000
+                if postcopy:
+                    break
+                if self.postcopy_requested:
+                    # La destinazione riparte; le pagine mancanti arrivano a guest fermo qui
+                    stop = time.monotonic()
+                    self.running, self.status = False, "postmigrate"
+                    postcopy = True
+                    live["status"] = "postcopy-active"
+                    await self.send(live, writers, MIGRATE_BLOCK, postcopy)
+                    live["downtime"] = time.monotonic() - stop
+                    pending = pending - sent + dirtied
+                    continue
+                if dirtied <= bandwidth * self.downtime_limit / 1000:
+                    stop = time.monotonic()
+                    self.running, self.status = False, "postmigrate"
+                    await self.send(live, writers, dirtied + MIGRATE_BLOCK, True)
+                    live["downtime"] = time.monotonic() - stop
+                    break
+                pending = dirtied
+            for writer in writers:
+                writer.close()
+            live["status"] = "completed"
+        except (OSError, ConnectionError) as e:
+            if live["status"] == "postcopy-active":
+                live["status"] = "postcopy-paused"
+            else:
+                live["status"] = "cancelled" if self.cancel else "failed"
+                if self.status == "postmigrate":
+                    # Pre-copy fallita: il guest riparte sulla sorgente
+                    self.running, self.status = True, "running"
+            live["error"] = str(e)
+            for writer in writers:
+                writer.close()
+        live["end"] = time.monotonic()
+
+    async def receive_ram(self, uri):
+        # Destinazione: conta i byte di tutti i canali, riparte quando la sorgente li chiude
+        self.running, self.status = False, "inmigrate"
+        live = self.live = {"status": "active", "transferred": 0, "remaining": self.ram, "passes": 0,
+                            "start": time.monotonic(), "end": None, "dirty_rate": 0, "expected": 0,
+                            "downtime": 0, "setup": 0, "error": ""}
+        channels = [0]
+
+        async def handle(reader, writer):
+            channels[0] += 1
+            while True:
+                data = await reader.read(MIGRATE_BLOCK)
+                if not data:
+                    break
+                live["transferred"] += len(data)
+                live["remaining"] = max(0, self.ram - live["transferred"])
+            writer.close()
+            channels[0] -= 1
+            if not channels[0]:
+                live["status"], live["end"] = "completed", time.monotonic()
+                self.running, self.status = True, "running"
+                self.server.close()
+        if uri.startswith("unix:"):
+            self.server = await asyncio.start_unix_server(handle, uri[len("unix:"):])
+        else:
+            host, port = uri[len("tcp:"):].rsplit(":", 1)
+            self.server = await asyncio.start_server(handle, host, int(port))
+        return {}
+
+    def blockstats(self):
+        elapsed = time.monotonic() - self.started
+        return [{"device": "", "node-name": "disk0", "stats": {
+            "rd_bytes": int(elapsed * 50e6), "wr_bytes": int(elapsed * 20e6),
+            "rd_operations": int(elapsed * 12000), "wr_operations": int(elapsed * 5000)}}]
+
+    def handle(self, command, arguments):
+        if command == "qmp_capabilities":
+            return {}
+        if command == "query-status":
+            return {"running": self.running, "status": self.status, "singlestep": False}
+        if command == "query-cpus-fast":
+            return [{"cpu-index": i, "thread-id": self.thread_base + i, "qom-path": f"/machine/unattached/device[{i}]",
+                     "target": "x86_64"} for i in range(self.vcpus)]
+        if command == "query-blockstats":
+            return self.blockstats()
+        if command == "query-stats":
+            elapsed = time.monotonic() - self.started
+            return [{"provider": "kvm", "stats": [
+                {"name": "remote_tlb_flush", "value": int(elapsed * 300)},
+                {"name": "pages_4k", "value": 262144}]}]
+        if command == "query-balloon":
+            return {"actual": 1 << 30}
+        if command == "stop":
+            self.running, self.status = False, "paused"
+            return {}
+        if command == "cont":
+            self.running, self.status = True, "running"
+            return {}
+        if command == "query-migrate-capabilities":
+            return [{"capability": name, "state": state} for name, state in self.capabilities.items()]
+        if command == "migrate-set-capabilities":
+            for item in arguments["capabilities"]:
+                if item["capability"] not in self.capabilities:
+                    raise KeyError(command)
+                self.capabilities[item["capability"]] = item["state"]
+            return {}
+        if command == "migrate-set-parameters":
+            self.downtime_limit = arguments.get("downtime-limit", self.downtime_limit)
+            self.multifd_channels = arguments.get("multifd-channels", self.multifd_channels)
+            return {}
+        if command in ("migrate", "migrate-incoming") and arguments["uri"].startswith(("unix:", "tcp:")):
+            if command == "migrate-incoming":
+                # Coroutine: serve_client la aspetta, il socket e' in ascolto prima della risposta
+                return self.receive_ram(arguments["uri"])
+            self.cancel = self.postcopy_requested = False
+            asyncio.ensure_future(self.send_ram(arguments["uri"]))
+            return {}
+        if command == "migrate-start-postcopy":
+            self.postcopy_requested = True
+            return {}
+        if command == "migrate_cancel":
+            self.cancel = True
+            return {}
+        if command == "qom-get" and arguments.get("property") == "type":
+            return "pc-q35-9.0-machine"
+        if command in ("migrate", "migrate-incoming"):
+            self.start_migration(arguments["uri"], command == "migrate-incoming")
+            return {}
+        if command == "query-migrate":
+            return self.migration()
+        if command in ("quit", "system_powerdown"):
+            self.running, self.status = False, "shutdown"
+            return {}
+        raise KeyError(command)
+
+
+async def open_migration(uri):
+    if uri.startswith("unix:"):
+        return await asyncio.open_unix_connection(uri[len("unix:"):])
+    host, port = uri[len("tcp:"):].rsplit(":", 1)
+    return await asyncio.open_connection(host, int(port))
+
+
+def event(name, data=None):
+    now = time.time()
+    message = {"event": name, "timestamp": {"seconds": int(now), "microseconds": int(now % 1 * 1e6)}}
+    if data is not None:
+        message["data"] = data
+    return (json.dumps(message) + "\n").encode()
+
+
+async def serve_client(vm, reader, writer):
+    writer.write((json.dumps(GREETING) + "\n").encode())
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            request = json.loads(line)
+            command = request.get("execute")
+            response = {"id": request.get("id")} if "id" in request else {}
+            try:
+                result = vm.handle(command, request.get("arguments", {}))
+                if asyncio.iscoroutine(result):
+                    result = await result
+                response["return"] = result
+            except KeyError:
+                response["error"] = {"class": "CommandNotFound", "desc": f"The command {command} has not been found"}
+            writer.write((json.dumps(response) + "\n").encode())
+            if command in ("stop", "cont"):
+                writer.write(event("STOP" if command == "stop" else "RESUME"))
+            await writer.drain()
+            if vm.status == "shutdown":
+                writer.write(event("SHUTDOWN", {"guest": False, "reason": "host-qmp-quit"}))
+                await writer.drain()
+                if vm.exit_on_quit:
+                    os._exit(0)
+                break
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(path, vm=None):
+    vm = vm or FakeVM()
+    if os.path.exists(path):
+        os.unlink(path)
+    return await asyncio.start_unix_server(lambda r, w: serve_client(vm, r, w), path)
+
+
+async def serve_forever(path, vcpus):
+    server = await start_server(path, FakeVM(vcpus, exit_on_quit=True))
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake QMP server")
+    parser.add_argument("socket")
+    parser.add_argument("--vcpus", type=int, default=2)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_forever(args.socket, args.vcpus))
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import os
+import re
+import json
+import math
+import time
+import asyncio
+import itertools
+import statistics
+import admission
+import overlays
+import vm_command
+from qmp_client import QMPClient, QMPError
+
+# Tempi di boot misurati dallo spawn di QEMU: primo byte in console, milestone
+# (regex sull'output, es. "login:") ed eventi QMP. boot_once legge la seriale da
+# stdout ("serial_console"); nella GUI arriva dal socket chardev di serial_log.
+# I risultati si accodano in boot_times/<profilo>.jsonl.
+
+RESULTS_DIR = "boot_times"
+DEFAULT_TIMEOUT = 300.0
+# Output gia' visto tenuto per le regex che cadono a cavallo di due chunk
+TAIL_BYTES = 4096
+SPAWN = "spawn"
+FIRST_OUTPUT = "first_output"
+CONNECTED = "CONNECTED"
+QMP_RETRY = 0.05
+
+
+def milestones(config):
+    # Nel profilo: "login:; Reached target" oppure una lista
+    value = config.get("boot_milestones") or []
+    if isinstance(value, str):
+        value = value.split(";")
+    return [pattern.strip() for pattern in value if pattern.strip()]
+
+
+class BootTimer:
+    def __init__(self, patterns=(), start=None):
+        self.start = time.monotonic() if start is None else start
+        self.patterns = [(pattern, re.compile(pattern.encode())) for pattern in patterns]
+        self.marks = {SPAWN: 0.0}
+        self.tail = b""
+
+    def restart(self):
+        self.start = time.monotonic()
+
+    def mark(self, name, now=None):
+        if name not in self.marks:
+            self.marks[name] = round((now or time.monotonic()) - self.start, 4)
+
+    def feed(self, data, now=None):
+        # Ritorna le milestone raggiunte con questo chunk
+        if not data:
+            return []
+        now = now or time.monotonic()
+        self.mark(FIRST_OUTPUT, now)
+        pending = [(pattern, regex) for pattern, regex in self.patterns if pattern not in self.marks]
+        if not pending:
+            return []
+        text = self.tail + data
+        self.tail = text[-TAIL_BYTES:]
+        hits = []
+        for pattern, regex in pending:
+            if regex.search(text):
+                self.mark(pattern, now)
+                hits.append(pattern)
+        return hits
+
+    def event(self, message, now=None):
+        self.mark(f"qmp:{message['event']}", now)
+
+    def done(self):
+        if not self.patterns:
+            return FIRST_OUTPUT in self.marks
+        return all(pattern in self.marks for pattern, _ in self.patterns)
+
+    def result(self):
+        # boot_seconds: ultima milestone, o il primo output se il profilo non ne ha
+        names = [pattern for pattern, _ in self.patterns] or [FIRST_OUTPUT]
+        boot = max(self.marks[name] for name in names) if self.done() else None
+        return {"marks": dict(sorted(self.marks.items(), key=lambda item: item[1])), "boot_seconds": boot}
+
+
+def describe(result):
+    marks = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in result["marks"].items() if name != SPAWN)
+    boot = f"{result['boot_seconds']:.2f}s" if result["boot_seconds"] is not None else "not reached"
+    return f"boot {boot} ({marks})"
+
+
+def results_path(name):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    return os.path.join(RESULTS_DIR, f"{overlays.safe_name(os.path.splitext(name)[0])}.jsonl")
+
+
+def record(name, result, variant=None):
+    entry = dict(result, time=time.time())
+    if variant:
+        entry["variant"] = variant
+    with open(results_path(name), "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def history(name):
+    path = results_path(name)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def _watch_qmp(qmp_socket, timer, deadline):
+    # Eventi QMP (RESUME, RESET, ...) dalla prima connessione riuscita
+    while time.monotonic() < deadline:
+        client = QMPClient(qmp_socket)
+        try:
+            await client.connect()
+        except (OSError, asyncio.TimeoutError, QMPError, ValueError):
+            await client.close()
+            await asyncio.sleep(QMP_RETRY)
+            continue
+        timer.event({"event": CONNECTED})
+        client.event_handlers.append(timer.event)
+        return client
+    return None
+
+
+async def boot_once(name, config, patterns, paths=None, timeout=DEFAULT_TIMEOUT, key=None):
+    # Avvia, misura fino all'ultima milestone (o al timeout) e spegne. Il disco e' in
+    # snapshot: ogni run parte dallo stesso stato.
+    config = dict(vm_command.from_profile(config), snapshot=True, serial_console=True)
+    vm_command.preflight(config)
+    key = key or f"boot-{os.getpid()}"
+    ledger = admission.Ledger(vm_command.runtime_path("admission.json"))
+    config = ledger.admit(key, config, resize=False)
+    qmp_socket = vm_command.runtime_path(f"{key}.qmp")
+    overlay = process = client = None
+    try:
+        launch_config, overlay = overlays.prepare(config, name, paths)
+        cmd = vm_command.build_command(launch_config, paths, qmp_socket=qmp_socket)
+        timer = BootTimer(patterns)
+        deadline = timer.start + timeout
+        try:
+            process = await asyncio.create_subprocess_exec(*cmd, stdin=asyncio.subprocess.DEVNULL,
+                                                           stdout=asyncio.subprocess.PIPE,
+                                                           stderr=asyncio.subprocess.STDOUT)
+        except OSError as e:
+            raise vm_command.LaunchError(f"Failed to start {cmd[0]}: {e.strerror}")
+        ledger.attach(key, process.pid)
+        watcher = asyncio.ensure_future(_watch_qmp(qmp_socket, timer, deadline))
+        while not timer.done():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(process.stdout.read(1 << 16), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                break
+            timer.feed(chunk)
+        result = timer.result()
+        if process.returncode is not None or process.stdout.at_eof():
+            result["exit_code"] = await process.wait()
+        if watcher.done():
+            client = watcher.result()
+        else:
+            watcher.cancel()
+        return result
+    finally:
+        if client is not None:
+            await client.close()
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
+        overlays.discard(overlay)
+        ledger.release(key)
+        if os.path.exists(qmp_socket):
+            os.remove(qmp_socket)
+
+
+def variants(vary):
+    # {"accel": ["kvm", "tcg"], "disk_type": ["virtio", "ide"]} -> prodotto cartesiano
+    keys = list(vary)
+    return [dict(zip(keys, values)) for values in itertools.product(*(vary[key] for key in keys))]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(variant, results):
+    times = [r["boot_seconds"] for r in results if r["boot_seconds"] is not None]
+    return {
+        "variant": variant,
+        "runs": len(results),
+        "failures": len(results) - len(times),
+        "median": round(statistics.median(times), 3) if times else None,
+        "p95": round(percentile(times, 0.95), 3) if times else None,
+        "min": round(min(times), 3) if times else None
+    }
+
+
+def bench(name, config, vary, runs, patterns, paths=None, timeout=DEFAULT_TIMEOUT, save=True, progress=None):
+    # Stesso profilo, runs boot per ogni variante; le varianti si alternano a ogni giro
+    # cosi' cache del disco e carico dell'host pesano allo stesso modo su tutte
+    matrix = variants(vary)
+    results = [[] for _ in matrix]
+    for run in range(runs):
+        for index, variant in enumerate(matrix):
+            try:
+                result = asyncio.run(boot_once(name, dict(config, **variant), patterns, paths, timeout))
+            except vm_command.LaunchError as e:
+                result = {"marks": {}, "boot_seconds": None, "error": str(e).splitlines()[0]}
+            results[index].append(result)
+            if save and "error" not in result:
+                record(name, result, variant)
+            if progress:
+                progress(run, variant, result)
+    return [summarize(variant, rs) for variant, rs in zip(matrix, results)]
@@ -0,0 +1,90 @@
+from PyQt6.QtWidgets import (
+    QDialog, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QGridLayout, QScrollArea
+)
+from PyQt6.QtCore import pyqtSignal
+import threading
+import qemu_caps
+from qemu_config import load_paths
+from qemu_config import save_paths
+
+
+class QemuConfigDialog(QDialog):
+    probed = pyqtSignal(object)
+
+    def __init__(self, paths, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Configure Qemu Binaries")
+        self.paths = load_paths()
+        self.inputs = {}
+        self.resize(1024, 768)
+        layout = QVBoxLayout(self)
+
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        container = QWidget()
+        grid = QGridLayout(container)
+
+        keys = sorted(self.paths.keys())
+        half = (len(keys) + 1) // 2
+       
+
+        self.status_labels = {}
+        for i, arch in enumerate(keys):
+            col = 0 if i < half else 3
+            row = i if i < half else i - half
+
+            label = QLabel(arch)
+            input_field = QLineEdit(self.paths[arch])
+            self.inputs[arch] = input_field
+            status = QLabel()
+            self.status_labels[arch] = status
+
+            grid.addWidget(label, row, col)
+            grid.addWidget(input_field, row, col + 1)
+            grid.addWidget(status, row, col + 2)
+
+        scroll.setWidget(container)
+        layout.addWidget(scroll)
+        self.show_status({arch: qemu_caps.cached_caps(self.paths[arch]) for arch in keys})
+
+        self.probe_button = QPushButton("Probe binaries")
+        self.probe_button.clicked.connect(self.probe)
+        layout.addWidget(self.probe_button)
+        self.probed.connect(self.on_probed)
+        save_button = QPushButton("Save")
+        save_button.clicked.connect(self.save_and_close)
+        layout.addWidget(save_button)
+
+    def show_status(self, caps_by_arch):
+        for arch, caps in caps_by_arch.items():
+            if caps:
+                self.status_labels[arch].setText(f"QEMU {caps['version']} ({', '.join(caps['accels'])})")
+            elif qemu_caps.resolve(self.inputs[arch].text()):
+                self.status_labels[arch].setText("not probed")
+            else:
+                self.status_labels[arch].setText("not found")
+
+    def probe(self):
+        # Qualche "-help" per architettura: in un thread, come start_capability_probe
+        paths = {arch: field.text() for arch, field in self.inputs.items()}
+        self.probe_button.setEnabled(False)
+        self.probe_button.setText("Probing...")
+        threading.Thread(target=self.run_probe, args=(paths,), daemon=True).start()
+
+    def run_probe(self, paths):
+        caps = qemu_caps.probe_all(paths)
+        try:
+            self.probed.emit(caps)
+        except RuntimeError:
+            # Dialogo gia' chiuso
+            pass
+
+    def on_probed(self, caps_by_arch):
+        self.show_status(caps_by_arch)
+        self.probe_button.setText("Probe binaries")
+        self.probe_button.setEnabled(True)
+
+    def save_and_close(self):
+        updated = {arch: field.text() for arch, field in self.inputs.items()}
+        save_paths(updated)
+        self.accept()
@@ -0,0 +1,56 @@
+import codecs
+from collections import deque
+
+# Circa 1 MB di testo per VM, oltre si scartano i chunk piu' vecchi
+DEFAULT_MAX_CHARS = 1 << 20
+
+
+class ConsoleBuffer:
+    def __init__(self, max_chars=DEFAULT_MAX_CHARS):
+        self.max_chars = max_chars
+        self.chunks = deque()
+        self.size = 0
+        # Caratteri scritti dall'avvio: i lettori tengono la propria posizione
+        self.written = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, data):
+        # Decoder incrementale: una sequenza UTF-8 spezzata tra due chunk
+        # resta in attesa nel decoder invece di diventare U+FFFD
+        self.write(self._decoder.decode(bytes(data)))
+
+    def finish(self):
+        self.write(self._decoder.decode(b"", final=True))
+
+    def write(self, text):
+        if not text:
+            return
+        if len(text) > self.max_chars:
+            self.written += len(text) - self.max_chars
+            text = text[-self.max_chars:]
+        self.chunks.append((self.written, text))
+        self.size += len(text)
+        self.written += len(text)
+        while self.size > self.max_chars:
+            _, old = self.chunks.popleft()
+            self.size -= len(old)
+
+    def text(self):
+        return "".join(chunk for _, chunk in self.chunks)
+
+    def read_since(self, pos):
+        # Ritorna (testo nuovo dopo pos, nuova posizione); se pos e' gia'
+        # uscito dal buffer si riparte dal chunk piu' vecchio disponibile
+        if pos >= self.written:
+            return "", self.written
+        parts = []
+        for start, chunk in reversed(self.chunks):
+            if start + len(chunk) <= pos:
+                break
+            parts.append(chunk[pos - start:] if start < pos else chunk)
+        parts.reverse()
+        return "".join(parts), self.written
+
+    def clear(self):
+        self.chunks.clear()
+        self.size = 0
@@ -0,0 +1,204 @@
+import os
+import asyncio
+import state_file
+from qmp_client import QMPClient, QMPError
+from host_info import parse_cpulist
+
+# Topologia CPU dell'host, -smp coerente e pinning dei thread vCPU.
+# Le assegnazioni stanno in un file condiviso (run/placement.json) protetto
+# da flock, cosi' GUI e CLI lanciati in parallelo non usano gli stessi core.
+# Le VM "shared" usano tutte le CPU non dedicate: quando una VM dedicata
+# prende o libera dei core i loro thread vengono ripinnati.
+
+SYS_CPU = "/sys/devices/system/cpu"
+SYS_NODE = "/sys/devices/system/node"
+
+NONE = "none"
+DEDICATED = "dedicated"
+SHARED = "shared"
+NUMA = "numa"
+POLICIES = [NONE, DEDICATED, SHARED, NUMA]
+
+
+def read_file(path, default=None):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+
+def read_topology():
+    online = read_file(os.path.join(SYS_CPU, "online"))
+    cpus = parse_cpulist(online) if online else list(range(os.cpu_count() or 1))
+    node_of = {}
+    if os.path.isdir(SYS_NODE):
+        for entry in os.listdir(SYS_NODE):
+            if entry.startswith("node") and entry[4:].isdigit():
+                for cpu in parse_cpulist(read_file(os.path.join(SYS_NODE, entry, "cpulist"), "")):
+                    node_of[cpu] = int(entry[4:])
+    topology = []
+    for cpu in cpus:
+        base = os.path.join(SYS_CPU, f"cpu{cpu}", "topology")
+        topology.append({
+            "cpu": cpu,
+            "package": int(read_file(os.path.join(base, "physical_package_id"), "0")),
+            "core": int(read_file(os.path.join(base, "core_id"), str(cpu))),
+            "node": node_of.get(cpu, 0)
+        })
+    return topology
+
+
+def host_shape(topology):
+    cores = {(c["package"], c["core"]) for c in topology}
+    packages = {c["package"] for c in topology}
+    threads = max(1, len(topology) // max(1, len(cores)))
+    return len(packages), max(1, len(cores) // max(1, len(packages))), threads
+
+
+def smp_option(vcpus, topology=None):
+    # -smp con sockets/cores/threads che ricalcano l'host
+    topology = topology or read_topology()
+    _, host_cores, host_threads = host_shape(topology)
+    threads = host_threads if vcpus % host_threads == 0 else 1
+    cores = vcpus // threads
+    sockets = 1
+    if cores > host_cores:
+        sockets = -(-cores // host_cores)
+        if cores % sockets:
+            sockets = 1
+    return f"{vcpus},sockets={sockets},cores={cores // sockets},threads={threads}"
+
+
+class PlacementAllocator:
+    def __init__(self, state_file, topology=None):
+        self.state_file = state_file
+        self.topology = topology or read_topology()
+
+    def _locked(self, update):
+        return state_file.update(self.state_file, update)
+
+    def dedicated_cpus(self, state):
+        return {cpu for entry in state.values() if entry["policy"] != SHARED for cpu in entry["cpus"]}
+
+    def shared_pool(self, state):
+        busy = self.dedicated_cpus(state)
+        return [c["cpu"] for c in self.topology if c["cpu"] not in busy]
+
+    def rebalance(self, state, warnings=None):
+        pool = self.shared_pool(state)
+        for entry in state.values():
+            if entry["policy"] == SHARED and entry["cpus"] != pool:
+                entry["cpus"] = pool
+                pin_threads(entry.get("threads", []), [set(pool)] * len(entry.get("threads", [])), warnings)
+
+    def allocate(self, key, vcpus, policy, node=None, warnings=None):
+        # Ritorna una lista di insiemi di CPU host, uno per vCPU, oppure None.
+        # node: solo CPU di quel nodo NUMA (migrazione verso un nodo scelto)
+        if policy == NONE:
+            return None
+
+        def update(state):
+            if policy == SHARED:
+                pool = self.shared_pool(state)
+                if not pool:
+                    return None
+                state[key] = {"pid": os.getpid(), "policy": policy, "cpus": pool}
+                return [set(pool)] * vcpus
+            busy = self.dedicated_cpus(state)
+            free = [c for c in sorted(self.topology, key=lambda c: (c["node"], c["package"], c["core"], c["cpu"]))
+                    if c["cpu"] not in busy and (node is None or c["node"] == node)]
+            # Alle VM condivise gia' avviate resta almeno una CPU
+            reserve = any(entry["policy"] == SHARED for entry in state.values())
+            if policy == NUMA:
+                by_node = {}
+                for c in free:
+                    by_node.setdefault(c["node"], []).append(c)
+                nodes = [cpus for cpus in by_node.values() if len(cpus) >= vcpus]
+                if not nodes:
+                    return None
+                free = min(nodes, key=len)
+            if len(free) < vcpus:
+                return None
+            chosen = [c["cpu"] for c in free[:vcpus]]
+            if reserve and len(self.topology) - len(busy) - vcpus < 1:
+                return None
+            state[key] = {"pid": os.getpid(), "policy": policy, "cpus": chosen}
+            self.rebalance(state, warnings)
+            return [{cpu} for cpu in chosen]
+        return self._locked(update)
+
+    def record_threads(self, key, thread_ids, warnings=None):
+        # Dopo pin_vm: i thread servono per ripinnare una VM condivisa quando il pool cambia.
+        # Ritorna l'assegnazione valida ora (il pool puo' essersi ristretto nel frattempo).
+        def update(state):
+            entry = state.get(key)
+            if entry is None:
+                return None
+            entry["threads"] = [tid for tid in thread_ids if tid]
+            if entry["policy"] != SHARED:
+                return [{cpu} for cpu in entry["cpus"]]
+            assignment = [set(entry["cpus"])] * len(thread_ids)
+            pin_threads(thread_ids, assignment, warnings)
+            return assignment
+        return self._locked(update)
+
+    def free_per_node(self):
+        # {nodo: CPU non dedicate ad altre VM}
+        busy = self._locked(self.dedicated_cpus)
+        free = {}
+        for c in self.topology:
+            free[c["node"]] = free.get(c["node"], 0) + (c["cpu"] not in busy)
+        return free
+
+    def least_loaded_node(self, vcpus, exclude=None):
+        # Il nodo con piu' CPU libere che ne ha almeno vcpus, preferendo uno diverso da exclude
+        free = {node: count for node, count in self.free_per_node().items() if count >= vcpus}
+        others = {node: count for node, count in free.items() if node != exclude}
+        candidates = others or free
+        return max(candidates, key=lambda node: (candidates[node], -node)) if candidates else None
+
+    def node_of(self, cpus):
+        nodes = {c["node"] for c in self.topology if c["cpu"] in cpus}
+        return nodes.pop() if len(nodes) == 1 else None
+
+    def release(self, key):
+        def update(state):
+            state.pop(key, None)
+            self.rebalance(state)
+        self._locked(update)
+
+    def usage(self):
+        return self._locked(lambda state: dict(state))
+
+
+def pin_threads(thread_ids, assignment, warnings=None):
+    for tid, cpus in zip(thread_ids, assignment):
+        if tid:
+            try:
+                os.sched_setaffinity(tid, cpus)
+            except ProcessLookupError:
+                # VM appena uscita: la sua voce sparisce al prossimo accesso
+                pass
+            except PermissionError:
+                # QEMU di un altro utente (placement.json e' condiviso): si salta il thread
+                if warnings is not None:
+                    warnings.append(f"Cannot pin vCPU thread {tid}: permission denied")
+
+
+async def pin_vm(qmp_socket, assignment, attempts=50, delay=0.2, warnings=None):
+    # I thread vCPU esistono appena QEMU ha creato la macchina
+    for _ in range(attempts):
+        client = QMPClient(qmp_socket)
+        try:
+            await client.connect()
+            cpus = await client.execute("query-cpus-fast")
+        except (OSError, asyncio.TimeoutError, QMPError):
+            await asyncio.sleep(delay)
+            continue
+        finally:
+            await client.close()
+        thread_ids = [cpu.get("thread-id") for cpu in sorted(cpus, key=lambda c: c.get("cpu-index", 0))]
+        pin_threads(thread_ids, assignment, warnings)
+        return thread_ids
+    raise QMPError(f"could not reach {qmp_socket} to pin vCPUs")
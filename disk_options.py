@@ -0,0 +1,108 @@
+import os
+import sys
+import host_info
+
+# Profilo prestazioni del disco: cache, aio, iothread dedicato, code multiple,
+# discard/detect-zeroes. "auto" sceglie in base al binario e all'host; senza
+# capability sondate si resta sui default di QEMU (writeback, threads).
+
+AUTO = "auto"
+CACHE_MODES = [AUTO, "none", "writeback", "writethrough", "directsync", "unsafe"]
+AIO_MODES = [AUTO, "io_uring", "native", "threads"]
+DRIVE_ID = "disk0"
+IOTHREAD_ID = "io0"
+# Tipo disco -> device QEMU richiesto (per filtrare con le capability del binario)
+DISK_DEVICES = {
+    "ide": "ide-hd",
+    "scsi": "scsi-hd",
+    "virtio-blk": "virtio-blk-pci",
+    "usb-storage": "usb-storage"
+}
+
+
+def io_uring_enabled():
+    # 2 = io_uring disabilitato per tutti (Linux >= 6.6)
+    try:
+        with open("/proc/sys/kernel/io_uring_disabled", "r") as f:
+            return f.read().strip() != "2"
+    except OSError:
+        return sys.platform.startswith("linux")
+
+
+def resolve(config, caps=None):
+    probed = bool(caps)
+    caps = caps or {}
+    blk_props = caps.get("blk_props")
+    cache = config.get("disk_cache", AUTO)
+    aio = config.get("disk_aio", AUTO)
+    if cache == AUTO:
+        # O_DIRECT evita la doppia cache (page cache host + guest), ma tmpfs non lo supporta
+        disk = config.get("disk")
+        tmpfs = bool(disk) and host_info.fs_type(os.path.dirname(os.path.abspath(disk))) == "tmpfs"
+        cache = "none" if probed and sys.platform.startswith("linux") and not tmpfs else "writeback"
+    if aio == AUTO:
+        if caps.get("io_uring") and io_uring_enabled():
+            aio = "io_uring"
+        elif caps.get("linux_aio") and cache in ("none", "directsync"):
+            aio = "native"
+        else:
+            aio = "threads"
+    elif aio == "native" and cache not in ("none", "directsync"):
+        # aio=native richiede O_DIRECT
+        aio = "threads"
+    iothread = bool(config.get("disk_iothread", True)) and (blk_props is None or "iothread" in blk_props)
+    queues = None
+    if blk_props is None or "num-queues" in blk_props:
+        try:
+            queues = max(1, int(str(config.get("cpu", "1")).strip()))
+        except ValueError:
+            queues = None
+    return {
+        "cache": cache,
+        "aio": aio,
+        "iothread": iothread,
+        "queues": queues,
+        "discard": bool(config.get("disk_discard", True))
+    }
+
+
+def drive_args(config, caps=None, warnings=None):
+    disk = config["disk"]
+    disk_type = config["disk_type"]
+    options = resolve(config, caps)
+    tuning = [f"cache={options['cache']}", f"aio={options['aio']}"]
+    if options["discard"]:
+        tuning += ["discard=unmap", "detect-zeroes=unmap"]
+    known = {name for names in caps.get("devices", {}).values() for name in names} if caps else None
+    needed = [DISK_DEVICES.get(disk_type, "ide-hd")] + (["virtio-scsi-pci"] if disk_type == "scsi" else [])
+    if known is not None and not known.issuperset(needed):
+        # Es. ide-hd sulla "virt" di aarch64: -drive senza if=none usa l'interfaccia della board
+        if warnings is not None:
+            warnings.append(f"{', '.join(d for d in needed if d not in known)} is not available for this machine, "
+                            f"using the board's default disk interface")
+        return ["-drive", ",".join([f"file={disk.replace(',', ',,')}"] + tuning)]
+    drive = [f"file={disk.replace(',', ',,')}", "if=none", f"id={DRIVE_ID}"] + tuning
+    args = []
+    iothread = options["iothread"] and disk_type in ("virtio-blk", "scsi")
+    if iothread:
+        args += ["-object", f"iothread,id={IOTHREAD_ID}"]
+    args += ["-drive", ",".join(drive)]
+    if disk_type == "virtio-blk":
+        device = ["virtio-blk-pci", f"drive={DRIVE_ID}"]
+        if iothread:
+            device.append(f"iothread={IOTHREAD_ID}")
+        if options["queues"]:
+            device.append(f"num-queues={options['queues']}")
+        args += ["-device", ",".join(device)]
+    elif disk_type == "scsi":
+        controller = ["virtio-scsi-pci", "id=scsi0"]
+        if iothread:
+            controller.append(f"iothread={IOTHREAD_ID}")
+        if options["queues"]:
+            controller.append(f"num_queues={options['queues']}")
+        args += ["-device", ",".join(controller), "-device", f"scsi-hd,drive={DRIVE_ID},bus=scsi0.0"]
+    elif disk_type == "usb-storage":
+        args += ["-device", f"usb-storage,drive={DRIVE_ID}"]
+    else:
+        args += ["-device", f"ide-hd,drive={DRIVE_ID}"]
+    return args
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import asyncio
+import admission
+import profile_manager
+import qmp_client
+import vm_command
+
+# Avvio di gruppi di VM da un manifest (JSON, o YAML se PyYAML e' installato):
+#
+# {"concurrency": 4, "stagger": 2,
+#  "groups": [{"name": "router", "profile": "router", "ready": {"qmp": "running", "delay": 5}},
+#             {"name": "client", "profile": "client", "count": 10, "after": ["router"],
+#              "overrides": {"ram": "512"}, "instances": [{"cpu": "4"}], "ready": {"tcp": "127.0.0.1:2222"}}]}
+#
+# step() non blocca: lo chiama un QTimer nella GUI o un ciclo nella CLI. I
+# controlli di prontezza girano come coroutine sul loop QMP condiviso.
+
+PENDING = "pending"
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_STAGGER = 1.0
+GATE_TIMEOUT = 300.0
+GATE_POLL = 0.5
+
+
+class ManifestError(Exception):
+    pass
+
+
+def load_manifest(path):
+    with open(path, "r") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ManifestError("YAML manifests need PyYAML (pip install pyyaml), or use JSON")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+class FleetInstance:
+    def __init__(self, name, group, config, after, gate):
+        self.name = name
+        self.group = group
+        self.config = config
+        self.after = after
+        self.gate = gate
+        self.state = PENDING
+        self.vm = None
+        self.gate_future = None
+        self.launched_at = None
+        self.ready_at = None
+        self.error = None
+
+    def describe(self):
+        info = {"name": self.name, "group": self.group, "state": self.state}
+        if self.vm is not None:
+            info["qmp"] = os.path.abspath(self.vm.qmp_socket)
+        if self.ready_at:
+            info["ready_seconds"] = round(self.ready_at - self.launched_at, 3)
+        if self.error:
+            info["error"] = self.error
+        return info
+
+
+def expand(manifest):
+    groups = manifest.get("groups") if isinstance(manifest, dict) else None
+    if not groups:
+        raise ManifestError("The manifest has no 'groups'")
+    names = [group.get("name") or group.get("profile") for group in groups]
+    if len(set(names)) != len(names):
+        raise ManifestError("Group names must be unique")
+    instances = []
+    for name, group in zip(names, groups):
+        if not group.get("profile"):
+            raise ManifestError(f"Group '{name}' has no profile")
+        profile_file = group["profile"] if group["profile"].endswith(".json") else group["profile"] + ".json"
+        profile = profile_manager.load_profile(profile_file)
+        if profile is None:
+            raise ManifestError(f"Group '{name}': profile '{group['profile']}' not found in {profile_manager.PROFILE_DIR}")
+        after = set(group.get("after", []))
+        unknown = after - set(names)
+        if unknown:
+            raise ManifestError(f"Group '{name}' depends on unknown group(s) {sorted(unknown)}")
+        count = int(group.get("count", 1))
+        per_instance = group.get("instances", [])
+        for i in range(count):
+            config = dict(profile, **group.get("overrides", {}))
+            if i < len(per_instance):
+                config.update(per_instance[i])
+            instances.append(FleetInstance(name if count == 1 else f"{name}-{i + 1}", name, config, after,
+                                           group.get("ready", {})))
+    check_cycles({name: set(group.get("after", [])) for name, group in zip(names, groups)})
+    return instances
+
+
+def check_cycles(deps):
+    done, visiting = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ManifestError(f"Dependency cycle through group '{name}'")
+        visiting.add(name)
+        for dep in deps[name]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+    for name in deps:
+        visit(name)
+
+
+async def wait_ready(gate, qmp_socket):
+    # Tutte le condizioni del gate, in ordine: qmp (stato runstate), tcp (porta aperta), delay
+    deadline = time.monotonic() + float(gate.get("timeout", GATE_TIMEOUT))
+    if gate.get("qmp"):
+        while True:
+            try:
+                status = await qmp_client.execute_once(qmp_socket, "query-status", timeout=2.0)
+                if status.get("status") == gate["qmp"]:
+                    break
+            except (OSError, asyncio.TimeoutError, qmp_client.QMPError):
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"QMP status never became '{gate['qmp']}'")
+            await asyncio.sleep(GATE_POLL)
+    if gate.get("tcp"):
+        host, _, port = gate["tcp"].rpartition(":")
+        while True:
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host or "127.0.0.1", int(port)), 2.0)
+                writer.close()
+                break
+            except (OSError, asyncio.TimeoutError):
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{gate['tcp']} never accepted connections")
+            await asyncio.sleep(GATE_POLL)
+    if gate.get("delay"):
+        await asyncio.sleep(float(gate["delay"]))
+
+
+class Fleet:
+    def __init__(self, manifest, launch, concurrency=None, stagger=None):
+        # launch(name, config) -> VM con qmp_socket, alive() e stop()
+        self.instances = expand(manifest)
+        self.launch = launch
+        self.concurrency = concurrency or int(manifest.get("concurrency", DEFAULT_CONCURRENCY))
+        self.stagger = float(manifest.get("stagger", DEFAULT_STAGGER) if stagger is None else stagger)
+        self.next_launch = 0.0
+
+    def group_state(self, group):
+        states = {i.state for i in self.instances if i.group == group}
+        if states == {READY}:
+            return READY
+        if states & {FAILED, SKIPPED}:
+            return FAILED
+        return PENDING
+
+    def done(self):
+        return all(i.state in (READY, FAILED, SKIPPED) for i in self.instances)
+
+    def step(self):
+        # Ritorna i messaggi da mostrare (una riga per cambio di stato)
+        events = []
+        now = time.monotonic()
+        for inst in self.instances:
+            if inst.state != STARTING:
+                continue
+            if not inst.vm.alive():
+                inst.state, inst.error = FAILED, "exited before becoming ready"
+            elif inst.gate_future.done():
+                error = inst.gate_future.exception()
+                if error is None:
+                    inst.state, inst.ready_at = READY, now
+                else:
+                    inst.state, inst.error = FAILED, str(error)
+            if inst.state == READY:
+                events.append(f"{inst.name}: ready after {now - inst.launched_at:.1f}s")
+            elif inst.state == FAILED:
+                events.append(f"{inst.name}: failed ({inst.error})")
+        starting = sum(1 for i in self.instances if i.state == STARTING)
+        for inst in self.instances:
+            if inst.state != PENDING:
+                continue
+            deps = {self.group_state(group) for group in inst.after}
+            if FAILED in deps:
+                inst.state, inst.error = SKIPPED, "a dependency failed"
+                events.append(f"{inst.name}: skipped ({inst.error})")
+                continue
+            if deps - {READY} or starting >= self.concurrency or now < self.next_launch:
+                continue
+            try:
+                inst.vm = self.launch(inst.name, inst.config)
+            except admission.Deferred:
+                # L'host non ha posto adesso: si riprova al prossimo step, nello stesso ordine
+                break
+            except vm_command.LaunchError as e:
+                inst.state, inst.error = FAILED, str(e).splitlines()[0]
+                events.append(f"{inst.name}: failed ({inst.error})")
+                continue
+            inst.state, inst.launched_at = STARTING, now
+            inst.gate_future = qmp_client.shared_loop().submit(wait_ready(inst.gate, inst.vm.qmp_socket))
+            starting += 1
+            # Gli avvii si distanziano di "stagger" secondi: niente picco di I/O al boot
+            self.next_launch = now + self.stagger
+            events.append(f"{inst.name}: launched ({starting}/{self.concurrency} starting)")
+        return events
+
+    def summary(self):
+        return [inst.describe() for inst in self.instances]
+
+    def stop(self):
+        for inst in self.instances:
+            if inst.gate_future is not None:
+                inst.gate_future.cancel()
+            if inst.vm is not None and inst.vm.alive():
+                inst.vm.stop()
@@ -0,0 +1,144 @@
+import os
+import sys
+import platform
+import subprocess
+
+# Rilevamento degli acceleratori dell'host e scelta del piu' veloce per
+# l'architettura richiesta. I profili salvano "auto" e restano veloci anche
+# spostati su un altro host.
+
+AUTO = "auto"
+ACCELS = ["kvm", "hvf", "whpx", "nvmm", "hax", "tcg"]
+KVM_DEVICE = "/dev/kvm"
+KVM_GET_API_VERSION = 0xAE00
+KVM_API_VERSION = 12
+
+# Architetture guest che un host puo' eseguire senza emulazione
+HOST_GUESTS = {
+    "x86_64": {"x86_64", "i386"},
+    "amd64": {"x86_64", "i386"},
+    "aarch64": {"aarch64"},
+    "arm64": {"aarch64"},
+    "ppc64le": {"ppc64"},
+    "ppc64": {"ppc64"},
+    "s390x": {"s390x"},
+    "riscv64": {"riscv64"},
+    "loongarch64": {"loongarch64"},
+    "mips64": {"mips64", "mips64el"}
+}
+
+_host = None
+
+
+def read_cpu_flags():
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def kvm_nested():
+    for module in ("kvm_intel", "kvm_amd"):
+        try:
+            with open(f"/sys/module/{module}/parameters/nested", "r") as f:
+                return f.read().strip() in ("1", "Y", "y")
+        except OSError:
+            continue
+    return None
+
+
+def check_kvm():
+    if not sys.platform.startswith("linux"):
+        return False, "not a Linux host"
+    if not os.path.exists(KVM_DEVICE):
+        flags = read_cpu_flags()
+        if not flags & {"vmx", "svm"} and platform.machine() in ("x86_64", "amd64"):
+            if "hypervisor" in flags:
+                return False, f"{KVM_DEVICE} missing: nested virtualization is not exposed by the outer hypervisor"
+            return False, f"{KVM_DEVICE} missing: CPU virtualization extensions (vmx/svm) are disabled"
+        return False, f"{KVM_DEVICE} missing: load the kvm module"
+    if not os.access(KVM_DEVICE, os.R_OK | os.W_OK):
+        return False, f"no access to {KVM_DEVICE}: add the user to the 'kvm' group"
+    try:
+        import fcntl
+        fd = os.open(KVM_DEVICE, os.O_RDWR | os.O_CLOEXEC)
+        try:
+            version = fcntl.ioctl(fd, KVM_GET_API_VERSION)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        return False, f"cannot open {KVM_DEVICE}: {e.strerror}"
+    if version != KVM_API_VERSION:
+        return False, f"unsupported KVM API version {version}"
+    return True, "KVM API 12" + (", nested" if kvm_nested() else "")
+
+
+def check_hvf():
+    if sys.platform != "darwin":
+        return False, "not a macOS host"
+    try:
+        result = subprocess.run(["sysctl", "-n", "kern.hv_support"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return False, "sysctl not available"
+    return (True, "Hypervisor.framework") if result.stdout.strip() == "1" else (False, "kern.hv_support is 0")
+
+
+def check_whpx():
+    if sys.platform != "win32":
+        return False, "not a Windows host"
+    return True, "Windows Hypervisor Platform (if enabled)"
+
+
+def host_accels():
+    # Risultato in cache: /proc e ioctl si leggono una volta per processo
+    global _host
+    if _host is None:
+        _host = {
+            "kvm": check_kvm(),
+            "hvf": check_hvf(),
+            "whpx": check_whpx(),
+            "nvmm": (sys.platform.startswith("netbsd"), "NetBSD NVMM"),
+            "hax": (False, "HAXM is deprecated"),
+            "tcg": (True, "software emulation")
+        }
+    return _host
+
+
+def native_guest(arch):
+    guests = HOST_GUESTS.get(platform.machine().lower(), {platform.machine().lower()})
+    # Le chiavi "...w" sono le varianti Windows dei binari (qemu-system-x86_64w)
+    return arch in guests or (arch.endswith("w") and arch[:-1] in guests)
+
+
+def best_accel(arch, binary_accels=None):
+    # Ritorna (acceleratore, usare -cpu host, avviso o None)
+    host = host_accels()
+    reasons = []
+    for accel in ACCELS[:-1]:
+        available, reason = host[accel]
+        if not available:
+            if accel == "kvm" and sys.platform.startswith("linux"):
+                reasons.append(reason)
+            continue
+        if not native_guest(arch):
+            reasons.append(f"{arch} guests cannot use {accel} on a {platform.machine()} host")
+            continue
+        if binary_accels is not None and accel not in binary_accels:
+            reasons.append(f"the {arch} QEMU binary does not support {accel}")
+            continue
+        return accel, accel in ("kvm", "hvf"), None
+    warning = "No hardware accelerator available, using TCG (10-50x slower)"
+    if reasons:
+        warning += ": " + "; ".join(reasons)
+    return "tcg", False, warning
+
+
+def check_accel(accel):
+    if accel in (AUTO, "tcg", ""):
+        return None
+    available, reason = host_accels().get(accel, (False, "unknown accelerator"))
+    return None if available else f"{accel} is not available on this host ({reason})"
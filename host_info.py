@@ -0,0 +1,135 @@
+import os
+
+SYS_HUGEPAGES = "/sys/kernel/mm/hugepages"
+SYS_NODE = "/sys/devices/system/node"
+
+
+def parse_cpulist(text):
+    # "0-3,8" -> [0, 1, 2, 3, 8] (stesso formato per CPU e nodi NUMA)
+    items = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            low, high = part.split("-")
+            items.extend(range(int(low), int(high) + 1))
+        else:
+            items.append(int(part))
+    return items
+
+
+def read_meminfo(path="/proc/meminfo"):
+    # Valori in kB, come in /proc/meminfo (HugePages_* sono conteggi di pagine)
+    info = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                fields = value.split()
+                if fields:
+                    info[key] = int(fields[0])
+    except OSError:
+        pass
+    return info
+
+
+def read_pressure(resource):
+    # /proc/pressure/<resource> (PSI): {"some": {"avg10": 0.5, ...}, "full": {...}}, {} senza PSI
+    pressure = {}
+    try:
+        with open(f"/proc/pressure/{resource}", "r") as f:
+            for line in f:
+                kind, *fields = line.split()
+                pressure[kind] = {key: float(value) for key, value in (field.split("=") for field in fields)}
+    except (OSError, ValueError):
+        pass
+    return pressure
+
+
+def online_cpus():
+    try:
+        with open("/sys/devices/system/cpu/online", "r") as f:
+            return len(parse_cpulist(f.read()))
+    except OSError:
+        return os.cpu_count() or 1
+
+
+def read_int(path, default=0):
+    try:
+        with open(path, "r") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return default
+
+
+def hugepage_sizes():
+    # Dimensioni disponibili in kB, es. [2048, 1048576]
+    try:
+        entries = os.listdir(SYS_HUGEPAGES)
+    except OSError:
+        return []
+    return sorted(int(e[len("hugepages-"):-2]) for e in entries if e.startswith("hugepages-") and e.endswith("kB"))
+
+
+def free_hugepages(size_kb, nodes=None):
+    if nodes:
+        return sum(read_int(os.path.join(SYS_NODE, f"node{node}", "hugepages", f"hugepages-{size_kb}kB",
+                                         "free_hugepages")) for node in nodes)
+    path = os.path.join(SYS_HUGEPAGES, f"hugepages-{size_kb}kB", "free_hugepages")
+    if os.path.exists(path):
+        return read_int(path)
+    meminfo = read_meminfo()
+    return meminfo.get("HugePages_Free", 0) if meminfo.get("Hugepagesize") == size_kb else 0
+
+
+def numa_nodes():
+    try:
+        return sorted(int(e[4:]) for e in os.listdir(SYS_NODE) if e.startswith("node") and e[4:].isdigit())
+    except OSError:
+        return [0]
+
+
+def hugetlbfs_mounts():
+    # {dimensione pagina in kB: mount point}
+    mounts = {}
+    default = read_meminfo().get("Hugepagesize")
+    try:
+        with open("/proc/mounts", "r") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 4 or fields[2] != "hugetlbfs":
+                    continue
+                size = default
+                for option in fields[3].split(","):
+                    if option.startswith("pagesize="):
+                        size = parse_size_kb(option[len("pagesize="):])
+                mounts.setdefault(size, fields[1])
+    except OSError:
+        pass
+    return mounts
+
+
+def fs_type(path):
+    # Filesystem del mount point piu' lungo che contiene path
+    path = os.path.realpath(path)
+    best, fstype = "", None
+    try:
+        with open("/proc/mounts", "r") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount = fields[1]
+                if (path == mount or path.startswith(mount.rstrip("/") + "/")) and len(mount) >= len(best):
+                    best, fstype = mount, fields[2]
+    except OSError:
+        pass
+    return fstype
+
+
+def parse_size_kb(text):
+    text = text.strip().upper().rstrip("B")
+    units = {"K": 1, "M": 1024, "G": 1024 * 1024}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text) // 1024
@@ -0,0 +1,306 @@
+import os
+import csv
+import time
+import threading
+from array import array
+
+# Metriche lato host dei processi QEMU: /proc/<pid>/stat, status, io e lo
+# schedstat dei thread vCPU ("CPU 0/KVM"), che da' tempo in esecuzione e tempo
+# in attesa della runqueue (l'equivalente host dello steal). I file restano
+# aperti e si rileggono con pread dall'offset 0: il kernel rigenera il
+# contenuto, niente open/close a ogni giro. Storia in array("d") a dimensione fissa.
+
+DEFAULT_INTERVAL = 1.0
+HISTORY = 300
+# Ogni quanto si cercano i thread vCPU finche' non compaiono
+RESCAN_SECONDS = 5.0
+# status e' il file piu' costoso da generare: serve solo per lo swap, si legge un giro su 10
+STATUS_EVERY = 10
+READ_SIZE = 8192
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+NAN = float("nan")
+PROM_PREFIX = "qemu_vm_"
+PROM_HELP = {
+    "cpu_percent": "CPU used by the QEMU process, percent of one host CPU",
+    "rss_bytes": "Resident set size of the QEMU process",
+    "swap_bytes": "Swapped out memory of the QEMU process",
+    "major_faults_per_s": "Major page faults per second",
+    "io_read_bytes_per_s": "Bytes read from storage per second",
+    "io_write_bytes_per_s": "Bytes written to storage per second",
+    "threads": "Threads of the QEMU process",
+    "vcpu_run_percent": "Time the vCPU thread ran on a host CPU",
+    "vcpu_wait_percent": "Time the vCPU thread was runnable but waiting for a host CPU"
+}
+
+
+class RingSeries:
+    # Una colonna per metrica, tutte allineate sullo stesso indice; NaN = nessun valore
+    def __init__(self, size=HISTORY):
+        self.size = size
+        self.pos = 0
+        self.count = 0
+        self.times = array("d", [NAN]) * size
+        self.columns = {}
+
+    def append(self, now, values):
+        for name in values:
+            if name not in self.columns:
+                self.columns[name] = array("d", [NAN]) * self.size
+        self.times[self.pos] = now
+        for name, column in self.columns.items():
+            column[self.pos] = values.get(name, NAN)
+        self.pos = (self.pos + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def ordered(self, column):
+        if self.count < self.size:
+            return column[:self.count].tolist()
+        return (column[self.pos:] + column[:self.pos]).tolist()
+
+    def points(self, name):
+        return [(t, v) for t, v in zip(self.ordered(self.times), self.ordered(self.columns[name])) if v == v]
+
+    def last(self):
+        index = self.pos - 1
+        return {name: column[index] for name, column in self.columns.items() if column[index] == column[index]}
+
+
+def read(fd):
+    return os.pread(fd, READ_SIZE, 0)
+
+
+def parse_stat(data):
+    # Il nome del processo puo' contenere spazi e parentesi: si parte dall'ultima ")"
+    fields = data[data.rindex(b")") + 2:].split()
+    # majflt, utime + stime, num_threads, rss in pagine (campi 12, 14, 15, 20 e 24 di proc(5))
+    return int(fields[9]), int(fields[11]) + int(fields[12]), int(fields[17]), int(fields[21])
+
+
+def parse_field(data, name):
+    start = data.find(name)
+    if start < 0:
+        return 0
+    return int(data[start + len(name):data.index(b"\n", start)].split()[0])
+
+
+class ProcSampler:
+    def __init__(self, pid, name):
+        self.pid = pid
+        self.name = name
+        base = f"/proc/{pid}"
+        self.fds = {}
+        for file in ("stat", "status", "io"):
+            try:
+                self.fds[file] = os.open(f"{base}/{file}", os.O_RDONLY)
+            except PermissionError:
+                # /proc/<pid>/io richiede gli stessi permessi di ptrace
+                pass
+        self.vcpus = []
+        self.scanned_at = 0.0
+        self.previous = None
+        self.samples = 0
+        self.swap_bytes = 0
+        self.series = RingSeries()
+
+    def scan_vcpus(self, now):
+        self.close_vcpus()
+        self.scanned_at = now
+        task_dir = f"/proc/{self.pid}/task"
+        for tid in os.listdir(task_dir):
+            try:
+                with open(f"{task_dir}/{tid}/comm", "rb") as f:
+                    comm = f.read().strip()
+                if comm.startswith(b"CPU ") and b"/" in comm:
+                    index = int(comm[4:comm.index(b"/")])
+                    self.vcpus.append((index, os.open(f"{task_dir}/{tid}/schedstat", os.O_RDONLY)))
+            except (OSError, ValueError):
+                continue
+        self.vcpus.sort()
+
+    def sample(self, now):
+        majflt, ticks, threads, rss = parse_stat(read(self.fds["stat"]))
+        if self.samples % STATUS_EVERY == 0:
+            self.swap_bytes = parse_field(read(self.fds["status"]), b"VmSwap:") * 1024
+        self.samples += 1
+        io = read(self.fds["io"]) if "io" in self.fds else b""
+        if not self.vcpus and now - self.scanned_at >= RESCAN_SECONDS:
+            self.scan_vcpus(now)
+        sched = []
+        for index, fd in self.vcpus:
+            try:
+                run_ns, wait_ns = read(fd).split()[:2]
+            except OSError:
+                # Thread sparito (unplug o riavvio del guest): si ricerca al prossimo giro
+                self.close_vcpus()
+                sched = []
+                break
+            sched.append((index, int(run_ns), int(wait_ns)))
+        counters = {
+            "ticks": ticks,
+            "majflt": majflt,
+            "read_bytes": parse_field(io, b"read_bytes:"),
+            "write_bytes": parse_field(io, b"write_bytes:")
+        }
+        values = {
+            "rss_bytes": rss * PAGE_SIZE,
+            "swap_bytes": self.swap_bytes,
+            "threads": threads
+        }
+        previous, self.previous = self.previous, (now, counters, sched)
+        if previous is not None:
+            elapsed = max(now - previous[0], 1e-6)
+            old = previous[1]
+            values["cpu_percent"] = (ticks - old["ticks"]) / CLK_TCK / elapsed * 100
+            values["major_faults_per_s"] = (majflt - old["majflt"]) / elapsed
+            if io:
+                values["io_read_bytes_per_s"] = (counters["read_bytes"] - old["read_bytes"]) / elapsed
+                values["io_write_bytes_per_s"] = (counters["write_bytes"] - old["write_bytes"]) / elapsed
+            old_sched = {index: (run, wait) for index, run, wait in previous[2]}
+            for index, run_ns, wait_ns in sched:
+                if index in old_sched:
+                    values[f"vcpu_run_percent/{index}"] = (run_ns - old_sched[index][0]) / 1e7 / elapsed
+                    values[f"vcpu_wait_percent/{index}"] = (wait_ns - old_sched[index][1]) / 1e7 / elapsed
+        return values
+
+    def close_vcpus(self):
+        for _, fd in self.vcpus:
+            os.close(fd)
+        self.vcpus = []
+
+    def close(self):
+        self.close_vcpus()
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds = {}
+
+
+def prom_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class HostSampler:
+    def __init__(self, interval=DEFAULT_INTERVAL, prom_path=None):
+        self.interval = interval
+        self.prom_path = prom_path
+        self.procs = {}
+        # Le serie restano dopo l'uscita della VM, finche' non si chiama forget()
+        self.finished = {}
+        self.last_cost = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def add(self, key, pid, name=None):
+        if key in self.procs:
+            return
+        try:
+            proc = ProcSampler(pid, name or str(key))
+        except OSError:
+            return
+        with self._lock:
+            self.procs[key] = proc
+
+    def start(self):
+        # Campionamento in background (GUI); la CLI chiama sample() dal suo ciclo
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="host-metrics", daemon=True)
+            self._thread.start()
+
+    def remove(self, key):
+        with self._lock:
+            proc = self.procs.pop(key, None)
+            if proc is not None:
+                proc.close()
+                self.finished[key] = proc
+
+    def forget(self, key):
+        self.remove(key)
+        with self._lock:
+            self.finished.pop(key, None)
+
+    def sample(self):
+        start = time.process_time()
+        now = time.time()
+        with self._lock:
+            for key, proc in list(self.procs.items()):
+                try:
+                    values = proc.sample(now)
+                except (OSError, ValueError, IndexError):
+                    # Processo terminato: si tiene la storia
+                    proc.close()
+                    self.finished[key] = self.procs.pop(key)
+                    continue
+                proc.series.append(now, values)
+        if self.prom_path:
+            self.write_prometheus(self.prom_path)
+        self.last_cost = time.process_time() - start
+        return self.last_cost
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            for key in list(self.procs):
+                self.procs[key].close()
+                self.finished[key] = self.procs.pop(key)
+
+    def _proc(self, key):
+        return self.procs.get(key) or self.finished.get(key)
+
+    def snapshot(self, key):
+        # Stesso formato di VMStatsPoller.snapshot: {metrica: [(tempo, valore), ...]}
+        with self._lock:
+            proc = self._proc(key)
+            if proc is None:
+                return {}
+            return {name: proc.series.points(name) for name in proc.series.columns}
+
+    def latest(self):
+        with self._lock:
+            return {key: (proc.name, proc.pid, proc.series.last()) for key, proc in self.procs.items()}
+
+    def prometheus(self):
+        # Formato testuale per il textfile collector di node_exporter
+        families = {}
+        for key, (name, pid, values) in self.latest().items():
+            labels = f'vm="{prom_label(name)}",id="{prom_label(key)}",pid="{pid}"'
+            for metric, value in values.items():
+                family, _, vcpu = metric.partition("/")
+                extra = f',vcpu="{vcpu}"' if vcpu else ""
+                families.setdefault(family, []).append(f"{PROM_PREFIX}{family}{{{labels}{extra}}} {value:.10g}")
+        lines = []
+        for family in sorted(families):
+            lines.append(f"# HELP {PROM_PREFIX}{family} {PROM_HELP.get(family, family)}")
+            lines.append(f"# TYPE {PROM_PREFIX}{family} gauge")
+            lines.extend(families[family])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Scrittura atomica: il collector non deve mai leggere un file a meta'
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def write_csv(self, path):
+        with self._lock:
+            procs = list(self.procs.items()) + list(self.finished.items())
+            metrics = sorted({name for _, proc in procs for name in proc.series.columns})
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["time", "vm", "id", "pid"] + metrics)
+                for key, proc in procs:
+                    series = proc.series
+                    columns = [series.ordered(series.columns[name]) if name in series.columns else None
+                               for name in metrics]
+                    for i, now in enumerate(series.ordered(series.times)):
+                        writer.writerow([f"{now:.3f}", proc.name, key, proc.pid] +
+                                        ["" if c is None or c[i] != c[i] else f"{c[i]:.6g}" for c in columns])
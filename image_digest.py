@@ -0,0 +1,221 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import image_library
+import profile_manager
+
+# SHA-256 di immagini disco e ISO: lettura a blocchi grandi in un buffer riusato,
+# piu' file in parallelo (hashlib e la lettura rilasciano il GIL). I digest stanno
+# in image_library.db con chiave dispositivo/inode/dimensione/mtime: un file non
+# cambiato non si rilegge mai, nemmeno se rinominato o raggiunto da un altro link.
+
+CHUNK = 8 << 20
+WORKERS = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    dev INTEGER,
+    inode INTEGER,
+    size INTEGER,
+    mtime_ns INTEGER,
+    sha256 TEXT,
+    PRIMARY KEY (dev, inode)
+)
+"""
+
+# "<hex>  nome" o "<hex> *nome" (sha256sum) e "SHA256 (nome) = <hex>" (BSD)
+_GNU_LINE = re.compile(r"^\\?([0-9a-fA-F]{64}) [ *](.+)$")
+_BSD_LINE = re.compile(r"^SHA256 \((.+)\) = ([0-9a-fA-F]{64})$")
+
+
+def file_key(st):
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class DigestCache:
+    def __init__(self, path=None):
+        self.db = sqlite3.connect(path or image_library.CACHE_FILE)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(SCHEMA)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def get(self, st):
+        row = self.db.execute("SELECT size, mtime_ns, sha256 FROM digests WHERE dev = ? AND inode = ?",
+                              (st.st_dev, st.st_ino)).fetchone()
+        if row and (row[0], row[1]) == (st.st_size, st.st_mtime_ns):
+            return row[2]
+        return None
+
+    def put(self, st, digest):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?)", file_key(st) + (digest,))
+
+
+def hash_file(path, progress=None, stop=None):
+    # -> (digest esadecimale, stat del file letto); None se interrotto con stop
+    h = hashlib.sha256()
+    buffer = bytearray(CHUNK)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        st = os.fstat(f.fileno())
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        while True:
+            if stop is not None and stop.is_set():
+                return None, st
+            n = f.readinto(buffer)
+            if not n:
+                break
+            h.update(view[:n])
+            if progress is not None:
+                progress(n)
+        if hasattr(os, "posix_fadvise"):
+            # Un'immagine da 5 GB letta una volta non deve svuotare la page cache
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    return h.hexdigest(), st
+
+
+def digests(paths, progress=None, stop=None, workers=WORKERS, cache_path=None):
+    # -> ({percorso: digest}, {percorso: errore}, percorsi davvero letti).
+    # progress(byte letti, byte da leggere) arriva dai thread di lavoro.
+    results, errors, pending = {}, {}, {}
+    cache = DigestCache(cache_path)
+    try:
+        for path in dict.fromkeys(paths):
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                errors[path] = str(e)
+                continue
+            digest = cache.get(st)
+            if digest:
+                results[path] = digest
+            else:
+                pending[path] = st
+        total = sum(st.st_size for st in pending.values())
+        done = [0]
+        lock = threading.Lock()
+
+        def advance(n):
+            with lock:
+                done[0] += n
+                current = done[0]
+            progress(current, total)
+
+        hashed = []
+        if pending:
+            # I file piu' grandi per primi: il pool finisce insieme invece che su un ultimo file enorme
+            order = sorted(pending, key=lambda path: pending[path].st_size, reverse=True)
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                futures = {pool.submit(hash_file, path, advance if progress else None, stop): path
+                           for path in order}
+                for future in as_completed(futures):
+                    path = futures[future]
+                    try:
+                        digest, st = future.result()
+                    except OSError as e:
+                        errors[path] = str(e)
+                        continue
+                    if digest is None:
+                        continue
+                    results[path] = digest
+                    hashed.append(path)
+                    # Modificato durante la lettura (una VM accesa): il digest vale ma non si salva
+                    if file_key(st) == file_key(pending[path]):
+                        cache.put(st, digest)
+    finally:
+        cache.close()
+    return results, errors, hashed
+
+
+def parse_sums(path):
+    # -> {percorso assoluto: digest atteso}; le righe di altri formati (firme gpg, MD5) si ignorano
+    base = os.path.dirname(os.path.abspath(path))
+    expected = {}
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            match = _GNU_LINE.match(line)
+            if match:
+                digest, name = match.groups()
+            else:
+                match = _BSD_LINE.match(line)
+                if not match:
+                    continue
+                name, digest = match.groups()
+            expected[os.path.normpath(os.path.join(base, name))] = digest.lower()
+    return expected
+
+
+def verify(sums_path, only=None, progress=None, stop=None, workers=WORKERS):
+    # -> [(percorso, atteso, calcolato o None, "ok" | "mismatch" | "missing" | errore)]
+    expected = parse_sums(sums_path)
+    if only:
+        wanted = {os.path.abspath(path) for path in only}
+        expected = {path: digest for path, digest in expected.items() if path in wanted}
+    present = [path for path in expected if os.path.exists(path)]
+    results, errors, _ = digests(present, progress, stop, workers)
+    report = []
+    for path, digest in expected.items():
+        if path not in present:
+            report.append((path, digest, None, "missing"))
+        elif path in errors:
+            report.append((path, digest, None, errors[path]))
+        elif path in results:
+            report.append((path, digest, results[path], "ok" if results[path] == digest else "mismatch"))
+    return report
+
+
+def find_sums(path):
+    # SHA256SUMS (o varianti comuni) nella cartella dell'immagine
+    directory = os.path.dirname(os.path.abspath(path))
+    for name in ("SHA256SUMS", "sha256sum.txt", "SHA256SUMS.txt", "CHECKSUM"):
+        candidate = os.path.join(directory, name)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def profile_images():
+    # Dischi e ISO citati dai profili salvati
+    paths = []
+    for name in profile_manager.list_profiles():
+        try:
+            config = profile_manager.load_profile(name) or {}
+        except (OSError, ValueError):
+            continue
+        for key in ("disk", "iso"):
+            path = config.get(key)
+            if path and os.path.isfile(path):
+                paths.append(os.path.abspath(path))
+    return paths
+
+
+def duplicates(paths, progress=None, stop=None, workers=WORKERS):
+    # -> [(dimensione, [percorsi con lo stesso contenuto])], con lo spazio recuperabile in testa.
+    # Si leggono solo i file che hanno la stessa dimensione di un altro; gli hard link
+    # allo stesso inode non sono duplicati (non occupano altro spazio).
+    by_size, sizes = {}, {}
+    for path in dict.fromkeys(os.path.abspath(path) for path in paths):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        sizes[path] = st.st_size
+        inodes = by_size.setdefault(st.st_size, {})
+        inodes.setdefault((st.st_dev, st.st_ino), path)
+    candidates = [path for size, inodes in by_size.items() if size and len(inodes) > 1
+                  for path in inodes.values()]
+    results, _, _ = digests(candidates, progress, stop, workers)
+    groups = {}
+    for path, digest in results.items():
+        groups.setdefault((sizes[path], digest), []).append(path)
+    found = [(size, sorted(group)) for (size, _), group in groups.items() if len(group) > 1]
+    found.sort(key=lambda item: item[0] * (len(item[1]) - 1), reverse=True)
+    return found
@@ -0,0 +1,291 @@
+import os
+import json
+import struct
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import overlays
+
+# Libreria di immagini disco e ISO nelle cartelle configurate (image_library.json).
+# Di ogni file si leggono solo gli header (qcow2, VMDK, descrittori ISO9660) con
+# una sola pread dei primi 64 KB, in parallelo. I risultati stanno in image_library.db con
+# chiave percorso/mtime/dimensione: una nuova scansione fa solo stat() e rilegge
+# gli header dei file nuovi o cambiati.
+
+LIBRARY_FILE = "image_library.json"
+CACHE_FILE = "image_library.db"
+DISK = "disk"
+ISO = "iso"
+DISK_EXTENSIONS = {".qcow2", ".qcow", ".img", ".raw", ".vmdk", ".vdi", ".vhd", ".vhdx"}
+ISO_EXTENSIONS = {".iso"}
+# Header qcow2 con le estensioni e i descrittori ISO9660 (settori 16..31 da 2048 byte)
+ISO_DESCRIPTORS = 0x8000
+ISO_SECTOR = 2048
+HEADER_WINDOW = ISO_DESCRIPTORS + 16 * ISO_SECTOR
+SCAN_WORKERS = 8
+MAX_BACKING_DEPTH = 16
+
+QCOW2_BACKING_FORMAT = 0xE2792ACA
+QCOW2_DATA_FILE = 0x44415441
+QCOW2_DIRTY = 1
+QCOW2_CORRUPT = 2
+VDI_SIGNATURE = 0xBEDA107F
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER,
+    size INTEGER,
+    kind TEXT,
+    format TEXT,
+    virtual_size INTEGER,
+    cluster_size INTEGER,
+    backing TEXT,
+    backing_format TEXT,
+    label TEXT,
+    flags TEXT,
+    error TEXT
+)
+"""
+
+COLUMNS = ["kind", "format", "virtual_size", "cluster_size", "backing", "backing_format", "label", "flags", "error"]
+
+
+def load_directories():
+    if os.path.exists(LIBRARY_FILE):
+        with open(LIBRARY_FILE, "r") as f:
+            return json.load(f).get("directories", [])
+    return []
+
+
+def save_directories(directories):
+    with open(LIBRARY_FILE, "w") as f:
+        json.dump({"directories": directories}, f, indent=4)
+
+
+def image_kind(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ISO_EXTENSIONS:
+        return ISO
+    if extension in DISK_EXTENSIONS:
+        return DISK
+    return None
+
+
+def walk(directories):
+    # (percorso, stat) dei file con estensione da immagine; i link a cartelle non si seguono
+    pending = [os.path.abspath(directory) for directory in directories]
+    seen = set()
+    while pending:
+        directory = pending.pop()
+        if directory in seen:
+            continue
+        seen.add(directory)
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif image_kind(entry.name) and entry.is_file():
+                            yield entry.path, entry.stat()
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def parse_qcow2(data, f):
+    version, backing_offset, backing_size, cluster_bits, virtual_size, crypt = struct.unpack_from(">IQIIQI", data, 4)
+    info = {"format": "qcow2", "virtual_size": virtual_size, "cluster_size": 1 << cluster_bits}
+    flags = []
+    if crypt:
+        flags.append("encrypted")
+    extensions = 72
+    if version >= 3:
+        incompatible, = struct.unpack_from(">Q", data, 72)
+        extensions, = struct.unpack_from(">I", data, 100)
+        if incompatible & QCOW2_DIRTY:
+            flags.append("dirty")
+        if incompatible & QCOW2_CORRUPT:
+            flags.append("corrupt")
+    if backing_offset and backing_size:
+        if backing_offset + backing_size <= len(data):
+            name = data[backing_offset:backing_offset + backing_size]
+        else:
+            name = os.pread(f.fileno(), backing_size, backing_offset)
+        info["backing"] = name.decode("utf-8", "replace")
+    # Estensioni dell'header: tipo, lunghezza, dati allineati a 8 byte
+    pos = extensions
+    while pos + 8 <= len(data):
+        kind, length = struct.unpack_from(">II", data, pos)
+        if kind == 0:
+            break
+        value = data[pos + 8:pos + 8 + length]
+        if kind == QCOW2_BACKING_FORMAT:
+            info["backing_format"] = value.decode("ascii", "replace")
+        elif kind == QCOW2_DATA_FILE:
+            flags.append(f"data-file={value.decode('utf-8', 'replace')}")
+        pos += 8 + (length + 7) // 8 * 8
+    info["flags"] = ",".join(flags)
+    return info
+
+
+def parse_iso(data):
+    info = {"format": "iso"}
+    flags = []
+    for sector in range(16):
+        offset = ISO_DESCRIPTORS + sector * ISO_SECTOR
+        if offset + ISO_SECTOR > len(data) or data[offset + 1:offset + 6] != b"CD001":
+            break
+        kind = data[offset]
+        if kind == 255:
+            break
+        if kind == 1:
+            blocks, = struct.unpack_from("<I", data, offset + 80)
+            block_size, = struct.unpack_from("<H", data, offset + 128)
+            info["virtual_size"] = blocks * block_size
+            info["label"] = data[offset + 40:offset + 72].decode("ascii", "replace").strip()
+        elif kind == 0 and data[offset + 7:offset + 30] == b"EL TORITO SPECIFICATION":
+            flags.append("bootable")
+    info["flags"] = ",".join(flags)
+    return info
+
+
+def probe(path):
+    # Metadati dagli header dell'immagine; la dimensione virtuale di un raw e' quella del file.
+    # Una pread della finestra costa meno di un mmap: sui file sparsi ogni pagina
+    # toccata in un buco e' un page fault.
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        info = {"format": "raw", "virtual_size": size}
+        data = os.pread(f.fileno(), min(size, HEADER_WINDOW), 0)
+        if data[:4] == overlays.QCOW2_MAGIC and len(data) >= 104:
+            info.update(parse_qcow2(data, f))
+        elif data[:4] == b"KDMV" and len(data) >= 20:
+            capacity, = struct.unpack_from("<Q", data, 12)
+            info.update(format="vmdk", virtual_size=capacity * 512)
+        elif data[:8] == b"vhdxfile":
+            info.update(format="vhdx", virtual_size=None)
+        elif data[:8] == b"conectix":
+            info.update(format="vpc", virtual_size=None)
+        elif len(data) >= 0x48 and struct.unpack_from("<I", data, 0x40)[0] == VDI_SIGNATURE:
+            info.update(format="vdi", virtual_size=None)
+        elif data[ISO_DESCRIPTORS + 1:ISO_DESCRIPTORS + 6] == b"CD001":
+            info.update(parse_iso(data))
+    info["kind"] = ISO if info["format"] == "iso" else image_kind(path) or DISK
+    return info
+
+
+def safe_probe(path):
+    try:
+        return probe(path)
+    except (OSError, ValueError, struct.error) as e:
+        return {"kind": image_kind(path) or DISK, "format": "unknown", "error": str(e)}
+
+
+def backing_path(path, backing):
+    # I percorsi relativi nell'header qcow2 sono relativi alla cartella dell'immagine
+    if backing.startswith(("json:", "nbd:", "http:", "https:")):
+        return backing
+    return os.path.normpath(os.path.join(os.path.dirname(path), backing))
+
+
+def backing_chain(path, entries=None):
+    # [(percorso, formato o None se manca)] dal primo backing file alla base
+    entries = entries or {}
+    chain = []
+    seen = {path}
+    entry = entries.get(path) or safe_probe(path)
+    while entry.get("backing") and len(chain) < MAX_BACKING_DEPTH:
+        path = backing_path(path, entry["backing"])
+        if path in seen:
+            chain.append((path, "loop"))
+            break
+        seen.add(path)
+        entry = entries.get(path) or (safe_probe(path) if os.path.isfile(path) else None)
+        if entry is None:
+            chain.append((path, None))
+            break
+        chain.append((path, entry.get("format")))
+    return chain
+
+
+def human_size(value):
+    if value is None:
+        return "?"
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(value) < 1024 or unit == "TiB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+def summary(row):
+    details = [row["format"] or "?", human_size(row["virtual_size"])]
+    if row["label"]:
+        details.append(row["label"])
+    if row["backing"]:
+        details.append(f"backing {os.path.basename(row['backing'])}")
+    if row["flags"]:
+        details.append(row["flags"])
+    if row["error"]:
+        details.append(row["error"])
+    return ", ".join(details)
+
+
+def describe(row):
+    return f"{os.path.basename(row['path'])}  ({summary(row)})"
+
+
+class ImageLibrary:
+    def __init__(self, path=None):
+        self.db = sqlite3.connect(path or CACHE_FILE)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(SCHEMA)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def refresh(self, directories=None):
+        # -> (percorsi riletti, percorsi spariti); gli header si leggono solo per i file cambiati
+        if directories is None:
+            directories = load_directories()
+        current = {path: (st.st_mtime_ns, st.st_size) for path, st in walk(directories)}
+        known = {row["path"]: (row["mtime_ns"], row["size"])
+                 for row in self.db.execute("SELECT path, mtime_ns, size FROM images")}
+        removed = [path for path in known if path not in current]
+        changed = [path for path, key in current.items() if known.get(path) != key]
+        rows = []
+        if changed:
+            with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as pool:
+                for path, info in zip(changed, pool.map(safe_probe, changed)):
+                    row = {column: info.get(column) for column in COLUMNS}
+                    row["path"] = path
+                    row["mtime_ns"], row["size"] = current[path]
+                    rows.append(row)
+        with self.db:
+            self.db.executemany("DELETE FROM images WHERE path = ?", [(path,) for path in removed])
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO images (path, mtime_ns, size, {', '.join(COLUMNS)}) "
+                f"VALUES (:path, :mtime_ns, :size, {', '.join(':' + c for c in COLUMNS)})", rows)
+        return changed, removed
+
+    def entries(self, kind=None):
+        sql = "SELECT * FROM images"
+        params = []
+        if kind:
+            sql += " WHERE kind = ?"
+            params.append(kind)
+        sql += " ORDER BY path"
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+
+def scan(directories=None, path=None):
+    # Refresh + elenco in una connessione propria: si puo' chiamare da un thread
+    library = ImageLibrary(path)
+    try:
+        library.refresh(directories)
+        return library.entries()
+    finally:
+        library.close()
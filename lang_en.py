@@ -25,6 +25,28 @@ translations = {
     "accel": "Acceleration",
     "configure_binaries": "Configure QEMU binaries",
     "language": "Language",
-    "about_me": "About"
+    "about_me": "About",
+    "running_vms": "Running VMs:",
+    "pause_vm": "Pause/Resume",
+    "stop_vm": "Stop",
+    "kill_vm": "Kill",
+    "clear_vms": "Clear exited",
+    "cpu_policy": "CPU placement:",
+    "memory_backend": "Memory backend:",
+    "disk_io": "Disk cache / AIO:",
+    "clone_profile": "Clone Profile",
+    "warm_pool": "Warm pool:",
+    "suspend_vm": "Suspend",
+    "launch_fleet": "Launch Fleet...",
+    "admission": "Admission:",
+    "serial_console": "Serial console in output",
+    "serial_log": "Serial log",
+    "hmp_monitor": "HMP monitor log",
+    "serial_attach": "Attach/Detach serial",
+    "log_viewer": "Log viewer...",
+    "image_library": "Image library:",
+    "migrate_vm": "Migrate...",
+    "pool_boot": "Max boot:",
+    "pool_idle": "Max idle:"
     
 }
\ No newline at end of file
@@ -25,6 +25,28 @@ translations = {
     "accel": "Accélération",
     "configure_binaries": "Configurer les binaires",
     "language": "Langue",
-    "about_me": "à propos"
+    "about_me": "à propos",
+    "running_vms": "VM en cours :",
+    "pause_vm": "Pause/Reprendre",
+    "stop_vm": "Arrêter",
+    "kill_vm": "Tuer",
+    "clear_vms": "Retirer terminées",
+    "cpu_policy": "Placement CPU :",
+    "memory_backend": "Backend mémoire :",
+    "disk_io": "Cache / AIO disque :",
+    "clone_profile": "Cloner le profil",
+    "warm_pool": "Pool de VM prêtes :",
+    "suspend_vm": "Suspendre",
+    "launch_fleet": "Lancer une flotte...",
+    "admission": "Admission :",
+    "serial_console": "Console série dans la sortie",
+    "serial_log": "Journal série",
+    "hmp_monitor": "Journal du moniteur HMP",
+    "serial_attach": "Attacher/Détacher la série",
+    "log_viewer": "Visionneuse de journaux...",
+    "image_library": "Bibliothèque d’images :",
+    "migrate_vm": "Migrer...",
+    "pool_boot": "Boot max :",
+    "pool_idle": "Inactivité max :"
     
 }
\ No newline at end of file
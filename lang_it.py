@@ -25,6 +25,28 @@ translations = {
     "accel": "Accelerazione",
     "configure_binaries": "Configura binari QEMU",
     "language": "Lingua",
-    "about_me": "Su di me"
+    "about_me": "Su di me",
+    "running_vms": "VM in esecuzione:",
+    "pause_vm": "Pausa/Riprendi",
+    "stop_vm": "Arresta",
+    "kill_vm": "Termina",
+    "clear_vms": "Rimuovi terminate",
+    "cpu_policy": "Posizionamento CPU:",
+    "memory_backend": "Backend memoria:",
+    "disk_io": "Cache / AIO disco:",
+    "clone_profile": "Clona profilo",
+    "warm_pool": "Pool VM pronte:",
+    "suspend_vm": "Sospendi",
+    "launch_fleet": "Avvia flotta...",
+    "admission": "Ammissione:",
+    "serial_console": "Console seriale nell'output",
+    "serial_log": "Log seriale",
+    "hmp_monitor": "Log monitor HMP",
+    "serial_attach": "Aggancia/Stacca seriale",
+    "log_viewer": "Visualizza log...",
+    "image_library": "Libreria immagini:",
+    "migrate_vm": "Migra...",
+    "pool_boot": "Boot max:",
+    "pool_idle": "Inattività max:"
     
 }
\ No newline at end of file
@@ -0,0 +1,237 @@
+import os
+import time
+import sqlite3
+import threading
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView, QFileDialog, QInputDialog, QMessageBox
+)
+from PyQt6.QtCore import Qt, pyqtSignal
+import image_library
+import image_digest
+
+
+def details(row):
+    parts = [f"file {image_library.human_size(row['size'])}"]
+    if row["label"]:
+        parts.append(row["label"])
+    if row["backing"]:
+        parts.append(f"backing {os.path.basename(row['backing'])}")
+    if row["flags"]:
+        parts.append(row["flags"])
+    if row["error"]:
+        parts.append(row["error"])
+    return ", ".join(parts)
+
+
+class LibraryPanel(QWidget):
+    # (image_library.DISK o ISO, percorso) quando si seleziona un'immagine
+    image_selected = pyqtSignal(str, str)
+    # Dal thread di scansione: elenco delle immagini o l'eccezione
+    scan_done = pyqtSignal(object, float)
+    # Dal thread dei checksum: percentuale, poi (azione, risultato o eccezione)
+    digest_progress = pyqtSignal(int)
+    digest_done = pyqtSignal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries = []
+        self.scanning = False
+        self.rescan_pending = False
+        self.hashing = False
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        header = QHBoxLayout()
+        self.title_label = QLabel("Image library:")
+        header.addWidget(self.title_label)
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("filter by name")
+        self.filter_input.textChanged.connect(self.fill_table)
+        header.addWidget(self.filter_input, 1)
+        layout.addLayout(header)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["Image", "Format", "Size", "Details"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.itemSelectionChanged.connect(self.on_selection)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        self.add_button = QPushButton("Add folder...")
+        self.add_button.clicked.connect(self.add_folder)
+        self.remove_button = QPushButton("Remove folder...")
+        self.remove_button.clicked.connect(self.remove_folder)
+        self.rescan_button = QPushButton("Rescan")
+        self.rescan_button.clicked.connect(self.rescan)
+        self.verify_button = QPushButton("Verify...")
+        self.verify_button.setToolTip("Check the selected image (or a whole SHA256SUMS file) against published checksums")
+        self.verify_button.clicked.connect(self.verify)
+        self.duplicates_button = QPushButton("Duplicates")
+        self.duplicates_button.setToolTip("Find identical images in the library and in the profiles")
+        self.duplicates_button.clicked.connect(self.find_duplicates)
+        self.status_label = QLabel("")
+        buttons.addWidget(self.add_button)
+        buttons.addWidget(self.remove_button)
+        buttons.addWidget(self.rescan_button)
+        buttons.addWidget(self.verify_button)
+        buttons.addWidget(self.duplicates_button)
+        buttons.addWidget(self.status_label, 1)
+        layout.addLayout(buttons)
+
+        self.scan_done.connect(self.on_scan_done)
+        self.digest_progress.connect(lambda percent: self.status_label.setText(f"Hashing... {percent}%"))
+        self.digest_done.connect(self.on_digest_done)
+
+    def rescan(self):
+        if self.scanning:
+            self.rescan_pending = True
+            return
+        self.scanning = True
+        self.status_label.setText("Scanning...")
+        directories = image_library.load_directories()
+
+        def run():
+            start = time.perf_counter()
+            try:
+                result = image_library.scan(directories)
+                # Catene di backing risolte qui: fuori dalla libreria richiedono letture di header
+                by_path = {row["path"]: row for row in result}
+                for row in result:
+                    row["chain"] = image_library.backing_chain(row["path"], by_path) if row["backing"] else []
+            except (OSError, sqlite3.Error) as e:
+                result = e
+            self.scan_done.emit(result, time.perf_counter() - start)
+        threading.Thread(target=run, daemon=True).start()
+
+    def on_scan_done(self, result, elapsed):
+        self.scanning = False
+        if isinstance(result, Exception):
+            self.status_label.setText(f"Scan failed: {result}")
+        else:
+            self.entries = result
+            self.fill_table()
+            self.status_label.setText(f"{len(result)} images in {len(image_library.load_directories())} "
+                                      f"folders, {elapsed * 1000:.0f} ms")
+        if self.rescan_pending:
+            self.rescan_pending = False
+            self.rescan()
+
+    def fill_table(self):
+        text = self.filter_input.text().lower()
+        rows = [row for row in self.entries if text in os.path.basename(row["path"]).lower()]
+        self.table.blockSignals(True)
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(rows))
+        for index, row in enumerate(rows):
+            name = QTableWidgetItem(os.path.basename(row["path"]))
+            name.setData(Qt.ItemDataRole.UserRole, (row["kind"], row["path"]))
+            tooltip = [row["path"]]
+            for path, fmt in row["chain"]:
+                tooltip.append(f"  -> {path} ({fmt or 'missing'})")
+            name.setToolTip("\n".join(tooltip))
+            size = QTableWidgetItem(image_library.human_size(row["virtual_size"]))
+            for column, item in enumerate((name, QTableWidgetItem(row["format"] or "?"), size,
+                                           QTableWidgetItem(details(row)))):
+                self.table.setItem(index, column, item)
+        self.table.setSortingEnabled(True)
+        self.table.blockSignals(False)
+
+    def selected_path(self):
+        items = self.table.selectedItems()
+        if not items:
+            return None
+        return self.table.item(items[0].row(), 0).data(Qt.ItemDataRole.UserRole)[1]
+
+    def on_selection(self):
+        items = self.table.selectedItems()
+        if not items:
+            return
+        item = self.table.item(items[0].row(), 0)
+        kind, path = item.data(Qt.ItemDataRole.UserRole)
+        self.image_selected.emit(kind, path)
+
+    def run_digest(self, action, work):
+        # Un solo lavoro di hash alla volta; work(progress) gira in un thread
+        if self.hashing:
+            return
+        self.hashing = True
+        self.verify_button.setEnabled(False)
+        self.duplicates_button.setEnabled(False)
+        self.status_label.setText("Hashing...")
+        last = [-1]
+
+        def progress(done, total):
+            percent = done * 100 // max(1, total)
+            if percent != last[0]:
+                last[0] = percent
+                self.digest_progress.emit(percent)
+
+        def run():
+            try:
+                result = work(progress)
+            except (OSError, sqlite3.Error) as e:
+                result = e
+            self.digest_done.emit(action, result)
+        threading.Thread(target=run, name="image-digest", daemon=True).start()
+
+    def verify(self):
+        path = self.selected_path()
+        sums = image_digest.find_sums(path) if path else None
+        if sums is None:
+            sums, _ = QFileDialog.getOpenFileName(self, "Checksum file (SHA256SUMS)",
+                                                  os.path.dirname(path) if path else "")
+            if not sums:
+                return
+        only = [path] if path else None
+        self.run_digest("verify", lambda progress: image_digest.verify(sums, only, progress))
+
+    def find_duplicates(self):
+        paths = [row["path"] for row in self.entries] + image_digest.profile_images()
+        self.run_digest("duplicates", lambda progress: image_digest.duplicates(paths, progress))
+
+    def on_digest_done(self, action, result):
+        self.hashing = False
+        self.verify_button.setEnabled(True)
+        self.duplicates_button.setEnabled(True)
+        if isinstance(result, Exception):
+            self.status_label.setText(f"Checksum failed: {result}")
+            return
+        if action == "verify":
+            if not result:
+                self.status_label.setText("The image is not listed in the checksum file")
+                return
+            bad = [f"{os.path.basename(path)}: {status}" for path, _, _, status in result if status != "ok"]
+            self.status_label.setText(f"{len(result) - len(bad)}/{len(result)} images match their checksum")
+            if bad:
+                QMessageBox.warning(self, "Checksum verification", "\n".join(bad))
+        else:
+            reclaim = sum(size * (len(group) - 1) for size, group in result)
+            self.status_label.setText(f"{len(result)} duplicate groups, "
+                                      f"{image_library.human_size(reclaim)} reclaimable")
+            if result:
+                QMessageBox.information(self, "Duplicate images", "\n\n".join(
+                    f"{image_library.human_size(size)}:\n" + "\n".join(group) for size, group in result))
+
+    def add_folder(self):
+        directory = QFileDialog.getExistingDirectory(self, "Add image folder")
+        if not directory:
+            return
+        directories = image_library.load_directories()
+        if directory not in directories:
+            image_library.save_directories(directories + [directory])
+        self.rescan()
+
+    def remove_folder(self):
+        directories = image_library.load_directories()
+        if not directories:
+            return
+        directory, ok = QInputDialog.getItem(self, "Remove image folder", "Folder:", directories, 0, False)
+        if ok and directory:
+            image_library.save_directories([d for d in directories if d != directory])
+            self.rescan()
@@ -0,0 +1,196 @@
+import os
+import re
+import mmap
+import threading
+from array import array
+
+# Indice delle righe di un log anche da molti GB. Il file e' mappato con mmap e
+# si tiene solo l'offset di una riga ogni STRIDE (8 byte ogni 64 righe): le altre
+# si trovano scorrendo al piu' STRIDE righe. refresh() indicizza a blocchi solo la
+# parte nuova del file; se il file viene ruotato (serial_log) si riparte da zero.
+# Un file troncato sul posto mentre e' mappato puo' dare SIGBUS: i log del
+# launcher si ruotano rinominandoli, mai troncandoli.
+
+STRIDE = 64
+# Byte indicizzati per chiamata a refresh()
+INDEX_CHUNK = 16 << 20
+SEARCH_CHUNK = 16 << 20
+MAX_RESULTS = 100000
+# Oltre questa lunghezza una riga si mostra troncata
+MAX_LINE = 64 << 10
+
+_STRIDE_RE = re.compile(rb"(?:[^\n]*\n){%d}" % STRIDE)
+
+
+def scan(data, since):
+    # -> (offset relativi a data dei nuovi checkpoint, newline dopo l'ultimo, fine dell'ultima riga completa)
+    checkpoints = []
+    at = 0
+    while 0 < since < STRIDE:
+        nl = data.find(b"\n", at)
+        if nl < 0:
+            break
+        at = nl + 1
+        since += 1
+    if since == STRIDE:
+        checkpoints.append(at)
+        since = 0
+    if since == 0:
+        # 64 righe per volta dentro il motore delle regex, non in Python
+        while True:
+            match = _STRIDE_RE.match(data, at)
+            if match is None:
+                break
+            at = match.end()
+            checkpoints.append(at)
+        since = data.count(b"\n", at)
+    return checkpoints, since, data.rfind(b"\n") + 1
+
+
+def release(mm, start, end):
+    # Le pagine gia' lette escono dall'RSS del processo (restano nella page cache):
+    # senza, scorrere un log da 4 GB lo porterebbe tutto in memoria
+    if end > start and hasattr(mmap, "MADV_DONTNEED"):
+        start -= start % mmap.PAGESIZE
+        mm.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
+class LogIndex:
+    # refresh() da un solo thread (indicizzazione), line_count() e lines() da qualunque thread
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.mm = None
+        self.generation = 0
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            if self.mm is not None:
+                self.mm.close()
+            if self.file is not None:
+                self.file.close()
+            self.file = self.mm = None
+            self.checkpoints = array("Q", [0])
+            # Byte indicizzati, newline dopo l'ultimo checkpoint, inizio dell'ultima riga
+            self.size = 0
+            self.since = 0
+            self.tail_start = 0
+            # Cambia a ogni reset: chi mostra le righe deve ripartire da capo
+            self.generation += 1
+
+    def close(self):
+        self.reset()
+
+    def refresh(self, budget=INDEX_CHUNK):
+        # True se ha indicizzato qualcosa: chi chiama ripete finche' torna False
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            # Ruotato e non ancora ricreato: resta la versione vecchia
+            return False
+        if self.file is not None:
+            current = os.fstat(self.file.fileno())
+            if current.st_ino != st.st_ino or current.st_size < self.size:
+                self.reset()
+        if self.file is None:
+            try:
+                file = open(self.path, "rb")
+            except FileNotFoundError:
+                return False
+            with self.lock:
+                self.file = file
+        size = os.fstat(self.file.fileno()).st_size
+        if size <= self.size:
+            return False
+        if self.mm is None or len(self.mm) < size:
+            mm = mmap.mmap(self.file.fileno(), size, access=mmap.ACCESS_READ)
+            with self.lock:
+                old, self.mm = self.mm, mm
+            if old is not None:
+                old.close()
+        start = self.size
+        end = min(size, start + budget)
+        checkpoints, since, tail = scan(self.mm[start:end], self.since)
+        release(self.mm, start, end)
+        with self.lock:
+            self.checkpoints.extend(start + offset for offset in checkpoints)
+            self.since = since
+            if tail:
+                self.tail_start = start + tail
+            self.size = end
+        return True
+
+    def _line_count(self):
+        complete = (len(self.checkpoints) - 1) * STRIDE + self.since
+        return complete + (1 if self.size > self.tail_start else 0)
+
+    def line_count(self):
+        with self.lock:
+            return self._line_count()
+
+    def lines(self, first, count):
+        with self.lock:
+            if self.mm is None:
+                return []
+            count = min(count, self._line_count() - first)
+            if count <= 0:
+                return []
+            pos = self.checkpoints[first // STRIDE]
+            for _ in range(first % STRIDE):
+                pos = self.mm.find(b"\n", pos, self.size) + 1
+            result = []
+            for _ in range(count):
+                nl = self.mm.find(b"\n", pos, self.size)
+                end = nl if nl >= 0 else self.size
+                result.append(self.mm[pos:min(end, pos + MAX_LINE)].decode("utf-8", "replace").rstrip("\r"))
+                pos = end + 1
+            return result
+
+    def memory_bytes(self):
+        return self.checkpoints.itemsize * len(self.checkpoints)
+
+
+def compile_pattern(pattern, ignore_case=False):
+    # La ricerca lavora sui byte del file: il pattern e' lo stesso in UTF-8
+    return re.compile(pattern.encode(), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+
+
+def search(path, pattern, ignore_case=False, stop=None, progress=None, max_results=MAX_RESULTS):
+    # Numeri di riga (in ordine, senza ripetizioni) con almeno un match, sul file com'e'
+    # all'inizio della ricerca. Usa un proprio mmap: puo' girare in un altro thread.
+    regex = compile_pattern(pattern, ignore_case)
+    results = array("Q")
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return results
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            line = start = 0
+            while start < size:
+                if stop is not None and stop.is_set():
+                    break
+                # Blocchi tagliati a fine riga: ^ e $ restano corretti
+                end = min(size, start + SEARCH_CHUNK)
+                if end < size:
+                    nl = mm.rfind(b"\n", start, end)
+                    if nl < 0:
+                        nl = mm.find(b"\n", end)
+                    end = nl + 1 if nl >= 0 else size
+                data = mm[start:end]
+                at = 0
+                for match in regex.finditer(data):
+                    line += data.count(b"\n", at, match.start())
+                    at = match.start()
+                    if not results or results[-1] != line:
+                        results.append(line)
+                        if len(results) >= max_results:
+                            return results
+                line += data.count(b"\n", at)
+                release(mm, start, end)
+                start = end
+                if progress is not None:
+                    progress(start, size)
+    return results
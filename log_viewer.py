@@ -0,0 +1,280 @@
+import re
+import bisect
+import threading
+from collections import OrderedDict
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QCheckBox, QListView,
+    QStyledItemDelegate, QStyle, QAbstractItemView
+)
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer, QRect, pyqtSignal
+from PyQt6.QtGui import QColor, QFontDatabase
+import log_index
+
+# Visualizzatore di log di qualunque dimensione: la vista chiede solo le righe
+# visibili a log_index (mmap + indice a campioni), un thread indicizza la parte
+# nuova del file e uno fa le ricerche. La memoria dipende dalle righe a schermo e
+# dalla cache, non dalla dimensione del file.
+
+FOLLOW_INTERVAL_MS = 250
+# Righe lette dall'indice per volta e blocchi tenuti in cache
+CACHE_BLOCK = 256
+CACHE_BLOCKS = 64
+# Match evidenziati al massimo per riga
+MAX_SPANS = 32
+HIGHLIGHT = QColor(255, 200, 0, 110)
+
+
+class LogLineModel(QAbstractListModel):
+    def __init__(self, log, parent=None):
+        super().__init__(parent)
+        # log: log_index.LogIndex (non "index": e' un metodo del modello Qt)
+        self.log = log
+        self.count = 0
+        self.generation = log.generation
+        self.cache = OrderedDict()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        block, offset = divmod(index.row(), CACHE_BLOCK)
+        lines = self.cache.get(block)
+        if lines is None:
+            lines = self.log.lines(block * CACHE_BLOCK, CACHE_BLOCK)
+            self.cache[block] = lines
+            if len(self.cache) > CACHE_BLOCKS:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(block)
+        return lines[offset] if offset < len(lines) else ""
+
+    def sync(self):
+        # Dal timer della GUI: allinea le righe a quelle indicizzate finora. True se e' ripartito da capo.
+        if self.log.generation != self.generation:
+            self.beginResetModel()
+            self.generation = self.log.generation
+            self.count = self.log.line_count()
+            self.cache.clear()
+            self.endResetModel()
+            return True
+        count = self.log.line_count()
+        if count > self.count:
+            # L'ultima riga poteva essere a meta'
+            last = self.count - 1
+            self.cache.pop(last // CACHE_BLOCK if last >= 0 else 0, None)
+            self.beginInsertRows(QModelIndex(), self.count, count - 1)
+            self.count = count
+            self.endInsertRows()
+            if last >= 0:
+                self.dataChanged.emit(self.index_of(last), self.index_of(last))
+        return False
+
+    def index_of(self, row):
+        return self.createIndex(row, 0)
+
+
+class HighlightDelegate(QStyledItemDelegate):
+    # Sopra il testo normale, un rettangolo semitrasparente per ogni match visibile
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.regex = None
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        if self.regex is None:
+            return
+        text = index.data() or ""
+        spans = []
+        for match in self.regex.finditer(text):
+            if match.end() > match.start():
+                spans.append(match.span())
+                if len(spans) >= MAX_SPANS:
+                    break
+        if not spans:
+            return
+        metrics = option.fontMetrics
+        style = option.widget.style() if option.widget else None
+        margin = style.pixelMetric(QStyle.PixelMetric.PM_FocusFrameHMargin, None, option.widget) + 1 if style else 3
+        left = option.rect.left() + margin
+        painter.save()
+        for start, end in spans:
+            x = left + metrics.horizontalAdvance(text[:start])
+            width = metrics.horizontalAdvance(text[start:end])
+            painter.fillRect(QRect(x, option.rect.top(), width, option.rect.height()), HIGHLIGHT)
+        painter.restore()
+
+
+class LogViewer(QWidget):
+    # Segnali dai thread di ricerca, consegnati nel thread della GUI
+    search_done = pyqtSignal(object, object, int)
+    search_progress = pyqtSignal(int)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent, Qt.WindowType.Window)
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.setWindowTitle(f"Log: {path}")
+        self.resize(1000, 700)
+        self.path = path
+        self.index = log_index.LogIndex(path)
+        self.results = []
+        self.search_stop = None
+        self.search_id = 0
+        self.closing = threading.Event()
+
+        layout = QVBoxLayout(self)
+        self.path_label = QLabel(path)
+        self.path_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(self.path_label)
+
+        search_row = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("regex, e.g. error|warn")
+        self.search_input.returnPressed.connect(self.start_search)
+        self.ignore_case_checkbox = QCheckBox("Ignore case")
+        self.search_button = QPushButton("Search")
+        self.search_button.clicked.connect(self.start_search)
+        self.prev_button = QPushButton("Previous")
+        self.prev_button.clicked.connect(lambda: self.goto_result(-1))
+        self.next_button = QPushButton("Next")
+        self.next_button.clicked.connect(lambda: self.goto_result(1))
+        self.search_status = QLabel("")
+        search_row.addWidget(self.search_input, 1)
+        search_row.addWidget(self.ignore_case_checkbox)
+        search_row.addWidget(self.search_button)
+        search_row.addWidget(self.prev_button)
+        search_row.addWidget(self.next_button)
+        search_row.addWidget(self.search_status)
+        layout.addLayout(search_row)
+
+        self.model = LogLineModel(self.index, self)
+        self.delegate = HighlightDelegate(self)
+        self.view = QListView()
+        # Righe tutte alte uguali: la vista non misura le righe fuori schermo
+        self.view.setUniformItemSizes(True)
+        self.view.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.view.setModel(self.model)
+        self.view.setItemDelegate(self.delegate)
+        layout.addWidget(self.view, 1)
+
+        bottom_row = QHBoxLayout()
+        self.follow_checkbox = QCheckBox("Follow tail")
+        self.follow_checkbox.setChecked(True)
+        self.lines_label = QLabel("")
+        bottom_row.addWidget(self.follow_checkbox)
+        bottom_row.addStretch()
+        bottom_row.addWidget(self.lines_label)
+        layout.addLayout(bottom_row)
+
+        self.search_done.connect(self.on_search_done)
+        self.search_progress.connect(lambda percent: self.search_status.setText(f"searching {percent}%"))
+        self.indexer = threading.Thread(target=self.index_loop, name="log-index", daemon=True)
+        self.indexer.start()
+        self.timer = QTimer(self)
+        self.timer.setInterval(FOLLOW_INTERVAL_MS)
+        self.timer.timeout.connect(self.sync)
+        self.timer.start()
+
+    def index_loop(self):
+        # Tutto il file a blocchi, poi solo cio' che si aggiunge
+        while not self.closing.is_set():
+            if not self.index.refresh():
+                self.closing.wait(FOLLOW_INTERVAL_MS / 1000)
+
+    def sync(self):
+        if self.model.sync():
+            self.clear_results()
+        self.lines_label.setText(f"{self.model.count} lines, {self.index.size / (1 << 20):.1f} MB")
+        if self.follow_checkbox.isChecked() and self.model.count:
+            self.view.scrollToBottom()
+
+    def start_search(self):
+        pattern = self.search_input.text()
+        if self.search_stop is not None:
+            self.search_stop.set()
+        if not pattern:
+            self.clear_results()
+            return
+        ignore_case = self.ignore_case_checkbox.isChecked()
+        try:
+            regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+            log_index.compile_pattern(pattern, ignore_case)
+        except re.error as e:
+            self.search_status.setText(f"invalid regex: {e}")
+            return
+        self.search_id += 1
+        search_id = self.search_id
+        stop = self.search_stop = threading.Event()
+        self.search_status.setText("searching...")
+        last = [-1]
+
+        def progress(done, total):
+            percent = done * 100 // total
+            if percent != last[0]:
+                last[0] = percent
+                self.search_progress.emit(percent)
+
+        def run():
+            try:
+                results = log_index.search(self.path, pattern, ignore_case, stop, progress)
+            except OSError as e:
+                results = e
+            if not stop.is_set():
+                self.search_done.emit(results, regex, search_id)
+        threading.Thread(target=run, name="log-search", daemon=True).start()
+
+    def on_search_done(self, results, regex, search_id):
+        if search_id != self.search_id:
+            return
+        if isinstance(results, OSError):
+            self.search_status.setText(f"search failed: {results}")
+            return
+        self.results = results
+        self.delegate.regex = regex
+        capped = " (stopped at the limit)" if len(results) >= log_index.MAX_RESULTS else ""
+        self.search_status.setText(f"{len(results)} matching lines{capped}")
+        self.view.viewport().update()
+        if len(results):
+            self.follow_checkbox.setChecked(False)
+            self.goto_result(1)
+
+    def clear_results(self):
+        self.results = []
+        self.delegate.regex = None
+        self.search_status.setText("")
+        self.view.viewport().update()
+
+    def goto_result(self, direction):
+        if not len(self.results):
+            return
+        current = self.view.currentIndex().row() if self.view.currentIndex().isValid() else -1
+        # results e' ordinato: il prossimo/precedente match rispetto alla riga corrente
+        if direction > 0:
+            pos = bisect.bisect_right(self.results, current)
+            row = self.results[pos] if pos < len(self.results) else self.results[0]
+        else:
+            pos = bisect.bisect_left(self.results, current) - 1
+            row = self.results[pos] if pos >= 0 else self.results[-1]
+        if row >= self.model.count:
+            return
+        self.follow_checkbox.setChecked(False)
+        index = self.model.index_of(row)
+        self.view.setCurrentIndex(index)
+        self.view.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.closing.set()
+        if self.search_stop is not None:
+            self.search_stop.set()
+        self.indexer.join(2.0)
+        self.index.close()
+        super().closeEvent(event)
+
+
+def default_log(logs):
+    # Per una VM della GUI: la seriale se c'e', altrimenti l'output di QEMU
+    return logs.serial.log.path if logs.serial else logs.qemu.path
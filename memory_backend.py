@@ -0,0 +1,93 @@
+import os
+import host_info
+
+# Memoria guest su memory-backend-memfd / memory-backend-file con hugepage,
+# prealloc e binding NUMA. check() verifica l'host prima dell'avvio, cosi'
+# si fallisce subito invece di far abortire QEMU a meta' boot.
+
+DEFAULT = "default"
+MEMFD = "memfd"
+FILE = "file"
+BACKENDS = [DEFAULT, MEMFD, FILE]
+HUGEPAGE_SIZES = ["", "2M", "1G"]
+NUMA_POLICIES = ["bind", "preferred", "interleave"]
+BACKEND_ID = "mem0"
+
+
+def ram_mb(config):
+    try:
+        return int(str(config["ram"]).strip())
+    except ValueError:
+        return None
+
+
+def host_nodes(config):
+    text = str(config.get("host_nodes", "")).strip()
+    return host_info.parse_cpulist(text) if text else []
+
+
+def node_ranges(nodes):
+    ranges = []
+    for node in sorted(set(nodes)):
+        if ranges and ranges[-1][1] == node - 1:
+            ranges[-1][1] = node
+        else:
+            ranges.append([node, node])
+    return [f"{low}-{high}" if low != high else str(low) for low, high in ranges]
+
+
+def hugepage_mount(size_kb):
+    return host_info.hugetlbfs_mounts().get(size_kb)
+
+
+def memory_object(config):
+    backend = config.get("mem_backend", DEFAULT)
+    if backend == DEFAULT or ram_mb(config) is None:
+        return None
+    parts = [f"memory-backend-{backend}", f"id={BACKEND_ID}", f"size={ram_mb(config)}M"]
+    hugepages = config.get("hugepages", "")
+    if backend == MEMFD and hugepages:
+        parts += ["hugetlb=on", f"hugetlbsize={hugepages}"]
+    elif backend == FILE:
+        path = config.get("mem_path") or (hugepage_mount(host_info.parse_size_kb(hugepages)) if hugepages else None)
+        parts.append(f"mem-path={(path or '/dev/hugepages').replace(',', ',,')}")
+    if config.get("mem_prealloc"):
+        parts.append("prealloc=on")
+    nodes = host_nodes(config)
+    if nodes:
+        # Nodi non contigui: host-nodes ripetuto, un intervallo per volta
+        parts += [f"host-nodes={r}" for r in node_ranges(nodes)]
+        parts.append(f"policy={config.get('mem_policy') or 'bind'}")
+    return ",".join(parts)
+
+
+def check(config):
+    errors = []
+    backend = config.get("mem_backend", DEFAULT)
+    if backend == DEFAULT:
+        return errors
+    ram = ram_mb(config)
+    if ram is None:
+        return [f"Invalid RAM size '{config['ram']}'"]
+    nodes = host_nodes(config)
+    missing = [n for n in nodes if n not in host_info.numa_nodes()]
+    if missing:
+        errors.append(f"NUMA node(s) {missing} do not exist on this host (nodes: {host_info.numa_nodes()})")
+    hugepages = config.get("hugepages", "")
+    if hugepages:
+        size_kb = host_info.parse_size_kb(hugepages)
+        if size_kb not in host_info.hugepage_sizes():
+            errors.append(f"The host has no {hugepages} hugepage pool")
+        else:
+            needed = -(-ram * 1024 // size_kb)
+            bound = nodes if nodes and (config.get("mem_policy") or "bind") == "bind" else None
+            free = host_info.free_hugepages(size_kb, bound)
+            if free < needed:
+                where = f" on node(s) {bound}" if bound else ""
+                errors.append(f"Need {needed} free {hugepages} hugepages{where}, only {free} available "
+                              f"(raise /sys/kernel/mm/hugepages/hugepages-{size_kb}kB/nr_hugepages)")
+        if backend == FILE and not config.get("mem_path") and hugepage_mount(size_kb) is None:
+            errors.append(f"No hugetlbfs mount for {hugepages} pages (mount -t hugetlbfs -o pagesize={hugepages} none /dev/hugepages)")
+    if backend == FILE and config.get("mem_path") and not os.path.isdir(config["mem_path"]):
+        errors.append(f"Memory path {config['mem_path']} is not a directory")
+    return errors
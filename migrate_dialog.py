@@ -0,0 +1,71 @@
+from PyQt6.QtWidgets import (
+    QDialog, QFormLayout, QHBoxLayout, QComboBox, QCheckBox, QSpinBox, QLineEdit, QPushButton, QFileDialog,
+    QDialogButtonBox
+)
+import host_info
+import vm_migrate
+
+
+class MigrateDialog(QDialog):
+    # Opzioni di vm_migrate per VMSupervisor.migrate
+    def __init__(self, label, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Migrate {label}")
+        layout = QFormLayout(self)
+
+        self.transport_combo = QComboBox()
+        self.transport_combo.addItem("Unix socket", vm_migrate.UNIX)
+        self.transport_combo.addItem("TCP (localhost)", vm_migrate.TCP)
+        layout.addRow("Transport:", self.transport_combo)
+
+        self.multifd_checkbox = QCheckBox(f"Multifd ({vm_migrate.MULTIFD_CHANNELS} channels)")
+        self.multifd_checkbox.setChecked(vm_migrate.DEFAULT_OPTIONS["multifd"])
+        layout.addRow(self.multifd_checkbox)
+        self.postcopy_checkbox = QCheckBox(f"Switch to post-copy after {vm_migrate.POSTCOPY_AFTER} passes")
+        self.postcopy_checkbox.setToolTip("For guests that dirty memory faster than it can be copied. "
+                                          "If the destination dies during post-copy the guest is lost.")
+        if not vm_migrate.postcopy_available():
+            self.postcopy_checkbox.setToolTip("Needs vm.unprivileged_userfaultfd=1")
+        layout.addRow(self.postcopy_checkbox)
+
+        self.node_combo = QComboBox()
+        self.node_combo.addItem("Same as now", None)
+        self.node_combo.addItem("Least loaded", "auto")
+        for node in host_info.numa_nodes():
+            self.node_combo.addItem(f"Node {node}", node)
+        layout.addRow("NUMA node:", self.node_combo)
+
+        self.downtime_spin = QSpinBox()
+        self.downtime_spin.setRange(10, 10000)
+        self.downtime_spin.setSuffix(" ms")
+        self.downtime_spin.setValue(vm_migrate.DOWNTIME_LIMIT_MS)
+        layout.addRow("Max downtime:", self.downtime_spin)
+
+        binary_row = QHBoxLayout()
+        self.binary_input = QLineEdit()
+        self.binary_input.setPlaceholderText("same QEMU binary")
+        browse = QPushButton("...")
+        browse.clicked.connect(self.browse_binary)
+        binary_row.addWidget(self.binary_input, 1)
+        binary_row.addWidget(browse)
+        layout.addRow("Destination QEMU:", binary_row)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def browse_binary(self):
+        path, _ = QFileDialog.getOpenFileName(self, "QEMU Binary")
+        if path:
+            self.binary_input.setText(path)
+
+    def options(self):
+        return {
+            "transport": self.transport_combo.currentData(),
+            "multifd": self.multifd_checkbox.isChecked(),
+            "postcopy": self.postcopy_checkbox.isChecked(),
+            "node": self.node_combo.currentData(),
+            "binary": self.binary_input.text().strip() or None,
+            "downtime_ms": self.downtime_spin.value()
+        }
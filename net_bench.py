@@ -0,0 +1,75 @@
+import time
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Misura di throughput TCP tra host e guest (o tra due guest). Il server scarta
+# i dati e riporta i byte ricevuti per connessione, quindi dal guest basta anche
+# "dd if=/dev/zero bs=1M count=2000 | nc 10.0.2.2 5201".
+
+DEFAULT_PORT = 5201
+BUFFER_SIZE = 1 << 20
+
+
+def receive(conn):
+    buffer = bytearray(BUFFER_SIZE)
+    view = memoryview(buffer)
+    total = 0
+    start = time.monotonic()
+    while True:
+        count = conn.recv_into(view)
+        if not count:
+            break
+        total += count
+    return total, time.monotonic() - start
+
+
+def serve(port=DEFAULT_PORT, host="0.0.0.0", report=print, once=False):
+    with socket.create_server((host, port)) as server:
+        while True:
+            conn, address = server.accept()
+
+            def handle(conn=conn, address=address):
+                with conn:
+                    total, seconds = receive(conn)
+                report(result(total, seconds, f"from {address[0]}:{address[1]}"))
+            if once:
+                handle()
+                return
+            threading.Thread(target=handle, daemon=True).start()
+
+
+def send(host, port, seconds):
+    payload = memoryview(bytes(BUFFER_SIZE))
+    sent = 0
+    with socket.create_connection((host, port), timeout=10) as conn:
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            conn.sendall(payload)
+            sent += len(payload)
+        conn.shutdown(socket.SHUT_WR)
+        # Attende la chiusura del server: i byte sono arrivati davvero
+        conn.recv(1)
+    return sent
+
+
+def run_client(host, port=DEFAULT_PORT, seconds=10.0, streams=1):
+    # Piu' flussi paralleli per sfruttare le code di virtio-net multiqueue
+    with ThreadPoolExecutor(max_workers=streams) as pool:
+        start = time.monotonic()
+        futures = [pool.submit(send, host, port, seconds) for _ in range(streams)]
+        total = sum(future.result() for future in futures)
+    return result(total, time.monotonic() - start, f"to {host}:{port}, {streams} stream(s)")
+
+
+def result(total, seconds, label=""):
+    return {
+        "bytes": total,
+        "seconds": round(seconds, 3),
+        "gbit_s": round(total * 8 / seconds / 1e9, 3) if seconds > 0 else 0.0,
+        "label": label
+    }
+
+
+def describe(res):
+    return f"{res['bytes'] / (1 << 20):.0f} MiB in {res['seconds']:.2f}s = {res['gbit_s']:.2f} Gbit/s {res['label']}"
@@ -0,0 +1,139 @@
+import os
+import hashlib
+
+# Rete con -netdev + -device: virtio-net-pci con vhost e multiqueue su tap,
+# bridge tramite qemu-bridge-helper, user-mode con regole hostfwd.
+# Con il modello "auto" virtio si usa solo sulle architetture la cui macchina
+# di default ha il bus giusto; altrove (e per modelli che il binario non
+# conosce) -nic lascia alla board la sua scheda di rete.
+
+USER = "user (NAT)"
+BRIDGE = "bridge"
+TAP = "tap"
+NONE = "none"
+NET_MODES = [USER, BRIDGE, TAP, NONE]
+NIC_MODELS = ["virtio-net-pci", "e1000e", "e1000", "rtl8139"]
+AUTO = "auto"
+# Architetture con una scheda virtio sul bus della macchina di default
+AUTO_MODELS = {
+    "x86_64": "virtio-net-pci",
+    "i386": "virtio-net-pci",
+    "ppc64": "virtio-net-pci",
+    "s390x": "virtio-net-ccw"
+}
+NETDEV_ID = "net0"
+VHOST_DEVICE = "/dev/vhost-net"
+SYS_NET = "/sys/class/net"
+# Limite di code per virtio-net nel kernel (tun)
+MAX_QUEUES = 16
+
+
+def backend(config):
+    # I profili vecchi e il wizard salvano "user", "user (NAT)", "tap", "bridge"
+    net = str(config.get("net") or USER)
+    for mode in (NONE, TAP, BRIDGE):
+        if mode in net:
+            return mode
+    return USER
+
+
+def queues(config):
+    value = str(config.get("net_queues", AUTO)).strip()
+    if value == AUTO:
+        value = str(config.get("cpu", "1")).strip()
+    try:
+        return max(1, min(MAX_QUEUES, int(value)))
+    except ValueError:
+        return 1
+
+
+def vhost_available():
+    return os.access(VHOST_DEVICE, os.R_OK | os.W_OK)
+
+
+def hostfwd_rules(config):
+    # "tcp::2222-:22, udp::5353-:53" -> ["tcp::2222-:22", "udp::5353-:53"]
+    return [rule.strip() for rule in str(config.get("net_hostfwd", "")).split(",") if rule.strip()]
+
+
+def mac_address(config):
+    # MAC stabile per disco: su un bridge le VM non devono avere tutte 52:54:00:12:34:56
+    if config.get("net_mac"):
+        return config["net_mac"]
+    if not config.get("disk"):
+        return None
+    digest = hashlib.sha1(os.path.abspath(config["disk"]).encode()).digest()
+    return "52:54:00:" + ":".join(f"{b:02x}" for b in digest[:3])
+
+
+def nic_model(config, arch=None, caps=None, warnings=None):
+    # -> modello per -device, o None per la scheda di default della board.
+    # caps: capability del binario (qemu_caps), None se non ancora sondato
+    model = config.get("net_model") or AUTO
+    known = {name for names in caps.get("devices", {}).values() for name in names} if caps else None
+    if model == AUTO:
+        model = AUTO_MODELS.get(arch)
+        if model and known is not None and model not in known:
+            return None
+        return model
+    if known is not None and model not in known:
+        if warnings is not None:
+            warnings.append(f"{model} is not available for {arch or 'this machine'}, using the board's default NIC")
+        return None
+    return model
+
+
+def netdev_args(config, warnings=None, arch=None, caps=None):
+    mode = backend(config)
+    if mode == NONE:
+        return ["-nic", "none"]
+    model = nic_model(config, arch, caps, warnings)
+    virtio = bool(model) and model.startswith("virtio-net")
+    count = 1
+    if mode == USER:
+        netdev = ["user", f"id={NETDEV_ID}"] + [f"hostfwd={rule}" for rule in hostfwd_rules(config)]
+    elif mode == BRIDGE:
+        netdev = ["bridge", f"id={NETDEV_ID}", f"br={config.get('net_bridge') or 'br0'}"]
+    else:
+        netdev = ["tap", f"id={NETDEV_ID}", f"ifname={config.get('net_tap') or 'tap0'}", "script=no", "downscript=no"]
+        if virtio:
+            count = queues(config)
+            if count > 1:
+                netdev.append(f"queues={count}")
+            if config.get("net_vhost", True):
+                if vhost_available():
+                    netdev.append("vhost=on")
+                elif warnings is not None:
+                    warnings.append(f"{VHOST_DEVICE} is not accessible, virtio-net runs without vhost")
+    mac = mac_address(config) if mode != USER else None
+    if model is None:
+        # -nic senza model=: la board sceglie la scheda (e il bus) che ha
+        nic = [netdev[0]] + netdev[2:] + ([f"mac={mac}"] if mac else [])
+        return ["-nic", ",".join(nic)]
+    device = [model, f"netdev={NETDEV_ID}"]
+    if virtio and count > 1:
+        device.append("mq=on")
+        if model.endswith("-pci"):
+            # Un vettore MSI-X per coda rx e tx, piu' config e control
+            device.append(f"vectors={2 * count + 2}")
+    if mac:
+        device.append(f"mac={mac}")
+    return ["-netdev", ",".join(netdev), "-device", ",".join(device)]
+
+
+def check(config):
+    errors = []
+    mode = backend(config)
+    if mode == TAP:
+        tap = config.get("net_tap") or "tap0"
+        if not os.path.exists(os.path.join(SYS_NET, tap)):
+            errors.append(f"Tap device {tap} does not exist "
+                          f"(ip tuntap add {tap} mode tap multi_queue user $USER; ip link set {tap} up)")
+    elif mode == BRIDGE:
+        bridge = config.get("net_bridge") or "br0"
+        if not os.path.isdir(os.path.join(SYS_NET, bridge, "bridge")):
+            errors.append(f"Bridge {bridge} does not exist")
+    for rule in hostfwd_rules(config) if mode == USER else []:
+        if "-" not in rule or rule.split(":", 1)[0] not in ("tcp", "udp"):
+            errors.append(f"Invalid hostfwd rule '{rule}' (expected e.g. tcp::2222-:22)")
+    return errors
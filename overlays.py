@@ -0,0 +1,159 @@
+import os
+import re
+import shutil
+import itertools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import vm_command
+
+# Overlay qcow2 sottili sopra un'immagine base: avvii usa e getta al posto di
+# -snapshot e cloni collegati. Gli overlay effimeri hanno il pid del launcher
+# nel nome, gc() elimina quelli lasciati da processi non piu' in esecuzione.
+
+QCOW2_MAGIC = b"QFI\xfb"
+OVERLAY_DIR = os.path.join(vm_command.RUN_DIR, "overlays")
+TMPFS_DIR = "/dev/shm/qemu-launcher"
+CLONE_DIR = "clones"
+QEMU_IMG_TIMEOUT = 60
+# ioctl FICLONE: copia reflink (btrfs, xfs, bcachefs)
+FICLONE = 0x40049409
+EPHEMERAL_NAME = re.compile(r"^.+\.(\d+)\.\d+\.qcow2$")
+# Formati riconosciuti da image_library.probe che QEMU apre con lo stesso nome
+BACKING_FORMATS = {"qcow2", "raw", "vmdk", "vdi", "vhdx", "vpc"}
+
+_counter = itertools.count(1)
+
+
+def qemu_img(binary=None):
+    # Preferisce il qemu-img installato accanto al binario QEMU scelto
+    path = shutil.which(binary) if binary else None
+    if path:
+        sibling = os.path.join(os.path.dirname(path), "qemu-img")
+        if os.access(sibling, os.X_OK):
+            return sibling
+    return shutil.which("qemu-img") or "qemu-img"
+
+
+def image_format(path):
+    # Formato per -F: un vmdk/vdi/... dichiarato raw mostrerebbe al guest il contenitore
+    import image_library
+    info = image_library.safe_probe(path)
+    fmt = "raw" if info["format"] == "iso" else info["format"]
+    if fmt not in BACKING_FORMATS:
+        raise vm_command.LaunchError(f"Cannot create an overlay on {path}: unknown image format"
+                                     + (f" ({info['error']})" if info.get("error") else ""))
+    return fmt
+
+
+def safe_name(name):
+    return re.sub(r"[^\w.-]", "_", name) or "vm"
+
+
+def create_overlay(base, path, binary=None):
+    base = os.path.abspath(base)
+    if not os.path.isfile(base):
+        raise vm_command.LaunchError(f"Base image {base} not found")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    cmd = [qemu_img(binary), "create", "-q", "-f", "qcow2", "-F", image_format(base), "-b", base, path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=QEMU_IMG_TIMEOUT,
+                                stdin=subprocess.DEVNULL)
+    except OSError as e:
+        raise vm_command.LaunchError(f"Cannot run {cmd[0]}: {e.strerror}")
+    except subprocess.TimeoutExpired:
+        raise vm_command.LaunchError(f"{cmd[0]} create timed out")
+    if result.returncode != 0:
+        raise vm_command.LaunchError(f"qemu-img create failed: {result.stderr.strip()}")
+    return path
+
+
+def reflink_copy(src, dst):
+    # True se la copia e' un reflink istantaneo, False se e' stata una copia completa
+    try:
+        import fcntl
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except (ImportError, OSError):
+        shutil.copyfile(src, dst)
+        return False
+
+
+def ephemeral_path(name, directory=None):
+    return os.path.join(directory or OVERLAY_DIR, f"{safe_name(name)}.{os.getpid()}.{next(_counter)}.qcow2")
+
+
+def prepare(config, name, paths=None, create=True):
+    # Con "snapshot" il disco diventa un overlay effimero (eliminato all'uscita)
+    config = vm_command.from_profile(config)
+    if not config["snapshot"] or not config["disk"]:
+        return config, None
+    overlay = ephemeral_path(name, config["overlay_dir"])
+    if create:
+        create_overlay(config["disk"], overlay, vm_command.resolve_binary(config["arch"], paths))
+    config["disk"] = overlay
+    config["snapshot"] = False
+    return config, overlay
+
+
+def discard(path):
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def gc(directories=None):
+    # Overlay effimeri di launcher terminati (crash, kill -9)
+    from state_file import pid_alive
+    removed = []
+    for directory in directories or [OVERLAY_DIR, TMPFS_DIR]:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            match = EPHEMERAL_NAME.match(entry.name)
+            if match and entry.is_file() and not pid_alive(int(match.group(1))):
+                discard(entry.path)
+                removed.append(entry.path)
+    return removed
+
+
+def clone_names(name, count=1):
+    return [name] if count == 1 else [f"{name}-{i}" for i in range(1, count + 1)]
+
+
+def clone_profile(profile, name, count=1, full=False, directory=None, paths=None, max_workers=None):
+    # Ritorna [(nome, profilo)] con un overlay (o una copia reflink) del disco per clone
+    config = vm_command.from_profile(profile)
+    if not config["disk"]:
+        raise vm_command.LaunchError("The profile has no disk image to clone")
+    base = os.path.abspath(config["disk"])
+    binary = vm_command.resolve_binary(config["arch"], paths)
+    directory = directory or CLONE_DIR
+    os.makedirs(directory, exist_ok=True)
+    extension = ".qcow2" if not full else os.path.splitext(base)[1] or ".img"
+    targets = {clone: os.path.abspath(os.path.join(directory, safe_name(clone) + extension))
+               for clone in clone_names(name, count)}
+    existing = [path for path in targets.values() if os.path.exists(path)]
+    if existing:
+        raise vm_command.LaunchError(f"Clone image already exists: {existing[0]}")
+
+    def make(clone):
+        if full:
+            reflink_copy(base, targets[clone])
+        else:
+            create_overlay(base, targets[clone], binary)
+        return clone, {**profile, "disk": targets[clone], "snapshot": False}
+
+    # qemu-img e' un processo per clone: in parallelo 50 cloni richiedono pochi secondi
+    with ThreadPoolExecutor(max_workers=max_workers or min(16, len(targets))) as pool:
+        futures = [pool.submit(make, clone) for clone in targets]
+    try:
+        return [future.result() for future in futures]
+    except (vm_command.LaunchError, OSError):
+        for path in targets.values():
+            discard(path)
+        raise
@@ -0,0 +1,154 @@
+import os
+import re
+import sqlite3
+import profile_manager
+
+# Indice SQLite dei profili accanto alla cartella profiles/: i metadati si
+# rileggono solo per i file con mtime o dimensione cambiati.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    name TEXT PRIMARY KEY,
+    mtime_ns INTEGER,
+    size INTEGER,
+    arch TEXT,
+    ram INTEGER,
+    cpu INTEGER,
+    disk TEXT,
+    iso TEXT,
+    accel TEXT,
+    machine TEXT,
+    disk_type TEXT,
+    net TEXT
+)
+"""
+
+COLUMNS = ["arch", "ram", "cpu", "disk", "iso", "accel", "machine", "disk_type", "net"]
+NUMERIC = {"ram", "cpu"}
+
+
+def index_path():
+    return os.path.normpath(profile_manager.PROFILE_DIR) + ".index.db"
+
+
+def to_int(value):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def to_text(value):
+    # Liste, oggetti o null scritti a mano nel JSON non diventano testo nell'indice
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return ""
+    return str(value)
+
+
+def profile_row(name, profile):
+    # None se il file non contiene un oggetto JSON: non deve fermare il refresh degli altri
+    if not isinstance(profile, dict):
+        return None
+    row = {column: to_text(profile.get(column, "")) for column in COLUMNS}
+    arch = row["arch"].split()
+    row["arch"] = arch[0] if arch else ""
+    row["ram"] = to_int(row["ram"])
+    row["cpu"] = to_int(row["cpu"])
+    row["name"] = name
+    return row
+
+
+def parse_query(text):
+    # "web arch:x86_64 accel:kvm ram>=2048" -> (parole libere, condizioni SQL, parametri)
+    words, conditions, params = [], [], []
+    for token in text.split():
+        match = re.fullmatch(r"(\w+)(:|>=|<=|>|<|=)(.+)", token)
+        if match and match.group(1) in COLUMNS:
+            column, op, value = match.groups()
+            if column in NUMERIC and to_int(value) is not None:
+                conditions.append(f"{column} {'=' if op == ':' else op} ?")
+                params.append(to_int(value))
+            else:
+                conditions.append(f"{column} LIKE ?")
+                params.append(value.replace("*", "%"))
+        else:
+            words.append(token)
+    for word in words:
+        conditions.append("(name LIKE ? OR disk LIKE ? OR iso LIKE ? OR machine LIKE ?)")
+        params += [f"%{word}%"] * 4
+    return conditions, params
+
+
+class ProfileIndex:
+    def __init__(self, path=None):
+        profile_manager.ensure_profile_dir()
+        self.db = sqlite3.connect(path or index_path())
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(SCHEMA)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def scan(self):
+        entries = {}
+        with os.scandir(profile_manager.PROFILE_DIR) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and entry.is_file():
+                    st = entry.stat()
+                    entries[entry.name] = (st.st_mtime_ns, st.st_size)
+        return entries
+
+    def refresh(self):
+        current = self.scan()
+        known = {row["name"]: (row["mtime_ns"], row["size"])
+                 for row in self.db.execute("SELECT name, mtime_ns, size FROM profiles")}
+        removed = [name for name in known if name not in current]
+        changed = [name for name, key in current.items() if known.get(name) != key]
+        rows = []
+        for name in changed:
+            row = profile_row(name, self.read_profile(name))
+            if row is None:
+                continue
+            row["mtime_ns"], row["size"] = current[name]
+            rows.append(row)
+        with self.db:
+            self.db.executemany("DELETE FROM profiles WHERE name = ?", [(name,) for name in removed])
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO profiles (name, mtime_ns, size, {', '.join(COLUMNS)}) "
+                f"VALUES (:name, :mtime_ns, :size, {', '.join(':' + c for c in COLUMNS)})", rows)
+        return changed, removed
+
+    def read_profile(self, name):
+        try:
+            return profile_manager.load_profile(name)
+        except (OSError, ValueError):
+            # JSON scritto a meta' o non valido: si riprova al prossimo refresh
+            return None
+
+    def search(self, text="", limit=None):
+        conditions, params = parse_query(text)
+        sql = "SELECT * FROM profiles"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY name COLLATE NOCASE"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+
+def describe(row):
+    details = [row["arch"] or "?"]
+    if row["ram"]:
+        details.append(f"{row['ram']} MB")
+    if row["cpu"]:
+        details.append(f"{row['cpu']} CPU")
+    if row["accel"]:
+        details.append(row["accel"])
+    if row["disk"]:
+        details.append(os.path.basename(row["disk"]))
+    return f"{row['name']}  ({', '.join(details)})"
@@ -0,0 +1,54 @@
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+import profile_index
+
+FETCH_BATCH = 500
+
+
+class ProfileListModel(QAbstractListModel):
+    # Le righe arrivano dall'indice SQLite; la vista ne chiede a blocchi
+    # con fetchMore, cosi' anche 10k profili non costano nulla all'avvio
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.loaded = 0
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.loaded = min(len(rows), FETCH_BATCH)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < len(self.rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(FETCH_BATCH, len(self.rows) - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self.loaded:
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return profile_index.describe(row)
+        if role == Qt.ItemDataRole.UserRole:
+            return row["name"]
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return "\n".join(f"{key}: {value}" for key, value in row.items() if value not in (None, ""))
+        return None
+
+    def find_name(self, name):
+        for row, data in enumerate(self.rows):
+            if data["name"] == name:
+                while row >= self.loaded and self.canFetchMore():
+                    self.fetchMore()
+                return self.index(row)
+        return QModelIndex()
@@ -0,0 +1,218 @@
+import os
+import re
+import json
+import shutil
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import qemu_config
+import vm_command
+
+CACHE_FILE = "qemu_caps.json"
+# Da incrementare quando cambiano PROBES: invalida le voci gia' in cache
+CACHE_VERSION = 3
+PROBE_TIMEOUT = 15
+
+PROBES = {
+    "version": ["-version"],
+    "machines": ["-machine", "help"],
+    "cpus": ["-cpu", "help"],
+    "devices": ["-device", "help"],
+    "accels": ["-accel", "help"],
+    "blk_props": ["-device", "virtio-blk-pci,help"]
+}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def parse_version(text):
+    match = re.search(r"version\s+(\d+\.\d+(?:\.\d+)?)", text)
+    return match.group(1) if match else text.strip().splitlines()[0] if text.strip() else ""
+
+
+def parse_machines(text):
+    machines = []
+    default = None
+    for line in text.splitlines():
+        if not line.strip() or line.rstrip().endswith(":"):
+            continue
+        name = line.split()[0]
+        machines.append(name)
+        if "(default)" in line:
+            default = name
+    return {"names": machines, "default": default}
+
+
+def parse_cpus(text):
+    cpus = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        # Dopo la lista dei modelli x86 stampa i flag CPUID: non sono modelli
+        if line.lower().startswith("recognized") or line.lower().startswith("available features"):
+            break
+        if line.rstrip().endswith(":"):
+            continue
+        tokens = line.split()
+        # "x86 Broadwell ...", "PowerPC 970 ..." oppure "  cortex-a53"
+        name = tokens[0] if line[0].isspace() or len(tokens) == 1 else tokens[1]
+        if name not in cpus:
+            cpus.append(name)
+    return cpus
+
+
+def parse_devices(text):
+    devices = {}
+    category = "Other"
+    for line in text.splitlines():
+        match = re.match(r'name "([^"]+)"', line.strip())
+        if match:
+            devices.setdefault(category, []).append(match.group(1))
+        elif line.strip().endswith(":"):
+            category = line.strip()[:-1].replace(" devices", "")
+    return devices
+
+
+def parse_accels(text):
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.strip().endswith(":")]
+
+
+def parse_props(text):
+    # "  iothread=<link<iothread>>" -> "iothread"
+    return [line.split("=", 1)[0].strip() for line in text.splitlines()
+            if "=" in line and not line.strip().startswith("name ")]
+
+
+def linked_libraries(path):
+    # aio=io_uring e aio=native esistono solo se QEMU e' compilato con liburing e libaio
+    try:
+        result = subprocess.run(["ldd", path], capture_output=True, text=True, timeout=PROBE_TIMEOUT,
+                                stdin=subprocess.DEVNULL)
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    return result.stdout
+
+
+PARSERS = {
+    "version": parse_version,
+    "machines": parse_machines,
+    "cpus": parse_cpus,
+    "devices": parse_devices,
+    "accels": parse_accels,
+    "blk_props": parse_props
+}
+
+
+def resolve(binary):
+    path = shutil.which(binary) if binary else None
+    return os.path.realpath(path) if path else None
+
+
+def stat_key(path):
+    st = os.stat(path)
+    return [CACHE_VERSION, st.st_ino, st.st_mtime_ns, st.st_size]
+
+
+def load_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                with open(CACHE_FILE, "r") as f:
+                    _cache = json.load(f)
+            except (OSError, ValueError):
+                _cache = {}
+        return _cache
+
+
+def save_cache():
+    # File temporaneo proprio: probe all'avvio e dialog di configurazione possono salvare insieme.
+    # Se la scrittura fallisce restano le capability in memoria
+    with _cache_lock:
+        data = json.dumps(_cache, indent=1)
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=".qemu_caps.", suffix=".tmp",
+                                   dir=os.path.dirname(os.path.abspath(CACHE_FILE)))
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp, CACHE_FILE)
+    except OSError:
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def run_probe(path, args):
+    try:
+        result = subprocess.run([path, *args], capture_output=True, text=True, timeout=PROBE_TIMEOUT,
+                                stdin=subprocess.DEVNULL)
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    return result.stdout if result.stdout.strip() else result.stderr
+
+
+def cached_caps(binary):
+    # Solo lettura: None se il binario manca o la cache non e' aggiornata
+    path = resolve(binary)
+    if path is None:
+        return None
+    entry = load_cache().get(path)
+    if entry and entry.get("key") == stat_key(path):
+        return entry["caps"]
+    return None
+
+
+def probe_binaries(binaries, max_workers=None):
+    cache = load_cache()
+    results = {}
+    todo = {}
+    for binary in binaries:
+        path = resolve(binary)
+        if path is None:
+            results[binary] = None
+            continue
+        entry = cache.get(path)
+        if entry and entry.get("key") == stat_key(path):
+            results[binary] = entry["caps"]
+        else:
+            todo.setdefault(path, []).append(binary)
+
+    if todo:
+        # Ogni probe e' un processo QEMU separato: il pool ne tiene diversi in volo
+        with ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+            jobs = {(path, name): pool.submit(run_probe, path, args)
+                    for path in todo for name, args in PROBES.items()}
+            libraries = {path: pool.submit(linked_libraries, path) for path in todo}
+            for path, binaries_for_path in todo.items():
+                caps = {name: PARSERS[name](jobs[(path, name)].result()) for name in PROBES}
+                caps["io_uring"] = "liburing" in libraries[path].result()
+                caps["linux_aio"] = "libaio" in libraries[path].result()
+                with _cache_lock:
+                    cache[path] = {"key": stat_key(path), "caps": caps}
+                for binary in binaries_for_path:
+                    results[binary] = caps
+        save_cache()
+    return results
+
+
+def probe_all(paths=None, max_workers=None):
+    if paths is None:
+        paths = qemu_config.load_paths()
+    by_binary = probe_binaries(sorted(set(paths.values())), max_workers)
+    return {arch: by_binary.get(binary) for arch, binary in paths.items()}
+
+
+def caps_for_arch(arch, paths=None):
+    binary = vm_command.resolve_binary(arch, paths)
+    return probe_binaries([binary])[binary]
+
+
+def devices(caps, category=None):
+    if not caps:
+        return []
+    groups = caps.get("devices", {})
+    if category:
+        return groups.get(category, [])
+    return [name for names in groups.values() for name in names]
@@ -0,0 +1,648 @@
+import os
+import sys
+import argparse
+import subprocess
+import profile_manager
+import qemu_config
+import vm_command
+
+# Entry point senza PyQt6: "qemu-launcher run <profilo>" per CI e script.
+# I moduli usati da un solo sottocomando si importano li' per tenere basso l'avvio.
+
+ADMISSION_RETRY = 2.0
+
+
+def profile_name(name):
+    return name if name.endswith(".json") else name + ".json"
+
+
+def cmd_list(args):
+    import profile_index
+    index = profile_index.ProfileIndex()
+    index.refresh()
+    for row in index.search(" ".join(args.query)):
+        print(profile_index.describe(row) if args.long else row["name"])
+    index.close()
+    return 0
+
+
+def cmd_caps(args):
+    import qemu_caps
+    paths = qemu_config.load_paths()
+    if args.arch:
+        paths = {arch: paths.get(arch, vm_command.resolve_binary(arch, paths)) for arch in args.arch}
+    for arch, caps in sorted(qemu_caps.probe_all(paths).items()):
+        if caps is None:
+            print(f"{arch}: not found")
+        else:
+            print(f"{arch}: QEMU {caps['version']}, accels: {', '.join(caps['accels'])}, "
+                  f"{len(caps['machines']['names'])} machines, {len(caps['cpus'])} cpus")
+    return 0
+
+
+def admit(ledger, key, profile, warnings, resize, wait):
+    # In modalita' "queue" si aspetta fino a wait secondi che l'host abbia posto
+    import time
+    import admission
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            return ledger.admit(key, profile, warnings, resize)
+        except admission.Deferred as e:
+            if time.monotonic() >= deadline:
+                raise
+            print(f"{e}\nRetrying...", file=sys.stderr)
+            time.sleep(min(ADMISSION_RETRY, max(0.1, deadline - time.monotonic())))
+
+
+def cmd_run(args):
+    import admission
+    import overlays
+    import vm_state
+    import serial_log
+    profile = profile_manager.load_profile(profile_name(args.profile))
+    if profile is None:
+        print(f"Profile '{args.profile}' not found in {profile_manager.PROFILE_DIR}", file=sys.stderr)
+        return 2
+    name = os.path.splitext(profile_name(args.profile))[0]
+    qmp_socket = args.qmp or vm_command.runtime_path(f"{name}-{os.getpid()}.qmp", create=not args.dry_run)
+    state = vm_state.saved_state(profile_name(args.profile))
+    if state and args.fresh:
+        if not args.dry_run:
+            vm_state.unlink(profile_name(args.profile))
+        state = None
+    elif state:
+        # Si riparte con la configurazione usata al momento della sospensione
+        profile = state["config"]
+    warnings = []
+    ledger = logs = overlay = None
+    key = f"{os.getpid()}-cli"
+    try:
+        if not args.dry_run:
+            vm_command.preflight(profile)
+            overlays.gc()
+            ledger = admission.Ledger(vm_command.runtime_path("admission.json"))
+            profile = admit(ledger, key, profile, warnings, not state, args.wait)
+        # In dry-run l'overlay non viene creato, il comando mostra il percorso che userebbe
+        config, overlay = overlays.prepare(profile, name, create=not args.dry_run)
+        # In primo piano la seriale su stdio resta interattiva: niente socket per serial_console
+        config = vm_command.from_profile(config)
+        config["serial_log"] = config["serial_log"] and not config["serial_console"]
+        if args.dry_run:
+            sockets = serial_log.socket_paths(config, key, create=False)
+        else:
+            logs = serial_log.VMLogs(config, name, key)
+            sockets = logs.sockets()
+    except (vm_command.LaunchError, OSError) as e:
+        # OSError: cartella dei log, socket o overlay non creabili (come in vm_supervisor.launch)
+        if logs:
+            logs.close()
+        if ledger:
+            ledger.release(key)
+        overlays.discard(overlay)
+        print(f"Cannot launch VM:\n{e}", file=sys.stderr)
+        return 1
+    cmd = vm_command.build_command(config, qmp_socket=qmp_socket, warnings=warnings,
+                                   incoming="defer" if state else None, **sockets)
+    for warning in warnings:
+        print(f"WARNING: {warning}", file=sys.stderr)
+    if args.dry_run:
+        import shlex
+        print(shlex.join(cmd))
+        return 0
+    allocator = assignment = None
+    # Thread vCPU saltati (di un altro utente) al pinning o al ribilanciamento
+    pin_warnings = []
+    try:
+        if config["cpu_policy"] != "none" and str(config["cpu"]).strip().isdigit():
+            import cpu_placement
+            allocator = cpu_placement.PlacementAllocator(vm_command.runtime_path("placement.json"))
+            assignment = allocator.allocate(key, int(config["cpu"]), config["cpu_policy"], warnings=pin_warnings)
+            if assignment is None:
+                print(f"WARNING: not enough free host CPUs for '{config['cpu_policy']}' placement", file=sys.stderr)
+        if logs.serial or logs.monitor:
+            print(f"Serial/monitor logs in {logs.directory}", file=sys.stderr)
+        try:
+            process = subprocess.Popen(cmd)
+        except FileNotFoundError:
+            print(f"QEMU binary not found: {cmd[0]}", file=sys.stderr)
+            return 127
+        ledger.attach(key, process.pid)
+        import asyncio
+        if state:
+            try:
+                result = asyncio.run(vm_state.restore(qmp_socket, state))
+            except (OSError, vm_state.QMPError, asyncio.TimeoutError) as e:
+                print(f"Resume from {state['file']} failed: {e}", file=sys.stderr)
+                process.kill()
+                return process.wait() or 1
+            vm_state.unlink(profile_name(args.profile))
+            print(f"Resumed from {state['file']}: {vm_state.describe(result)}", file=sys.stderr)
+        if assignment:
+            try:
+                allocator.record_threads(key, asyncio.run(cpu_placement.pin_vm(qmp_socket, assignment,
+                                                                               warnings=pin_warnings)), pin_warnings)
+            except (OSError, cpu_placement.QMPError) as e:
+                print(f"WARNING: vCPU pinning failed: {e}", file=sys.stderr)
+        for warning in pin_warnings:
+            print(f"WARNING: {warning}", file=sys.stderr)
+        return process.wait()
+    finally:
+        if allocator:
+            allocator.release(key)
+        logs.close(wait=2.0)
+        ledger.release(key)
+        overlays.discard(overlay)
+        if os.path.exists(qmp_socket):
+            os.remove(qmp_socket)
+
+
+def instance_sockets(name):
+    # run/<profile>-<pid>.qmp creati da "run" ancora in esecuzione
+    import glob
+    from state_file import pid_alive
+    sockets = []
+    for path in glob.glob(os.path.join(vm_command.RUN_DIR, f"{glob.escape(name)}-*.qmp")):
+        pid = path[:-len(".qmp")].rsplit("-", 1)[1]
+        if pid.isdigit() and pid_alive(int(pid)):
+            sockets.append(path)
+    return sockets
+
+
+def cmd_suspend(args):
+    import asyncio
+    import vm_state
+    profile = profile_manager.load_profile(profile_name(args.profile))
+    if profile is None:
+        print(f"Profile '{args.profile}' not found in {profile_manager.PROFILE_DIR}", file=sys.stderr)
+        return 2
+    if vm_command.from_profile(profile)["snapshot"]:
+        print("Cannot suspend a snapshot launch: its overlay is discarded on exit", file=sys.stderr)
+        return 1
+    name = os.path.splitext(profile_name(args.profile))[0]
+    sockets = [args.qmp] if args.qmp else instance_sockets(name)
+    if len(sockets) != 1:
+        print(f"Found {len(sockets)} running instances of '{name}', pass --qmp SOCKET", file=sys.stderr)
+        return 1
+    try:
+        result = asyncio.run(vm_state.suspend(sockets[0], profile_name(args.profile)))
+    except (OSError, asyncio.TimeoutError, vm_state.QMPError) as e:
+        print(f"Suspend failed: {e}", file=sys.stderr)
+        return 1
+    vm_state.link(profile_name(args.profile), result, profile)
+    print(f"Suspended to {result['file']} ({result['format']}): {vm_state.describe(result)}")
+    return 0
+
+
+def cmd_clone(args):
+    import time
+    import overlays
+    profile = profile_manager.load_profile(profile_name(args.profile))
+    if profile is None:
+        print(f"Profile '{args.profile}' not found in {profile_manager.PROFILE_DIR}", file=sys.stderr)
+        return 2
+    names = overlays.clone_names(args.name, args.count)
+    existing = [n for n in names if profile_manager.load_profile(profile_name(n)) is not None]
+    if existing:
+        print(f"Profile '{existing[0]}' already exists", file=sys.stderr)
+        return 1
+    start = time.monotonic()
+    try:
+        clones = overlays.clone_profile(profile, args.name, args.count, args.full, args.dir)
+    except (vm_command.LaunchError, OSError) as e:
+        print(f"Cannot clone '{args.profile}': {e}", file=sys.stderr)
+        return 1
+    for clone, clone_profile in clones:
+        profile_manager.save_profile(profile_name(clone), clone_profile)
+        print(f"{clone}: {clone_profile['disk']}")
+    print(f"{len(clones)} clone(s) in {time.monotonic() - start:.2f}s", file=sys.stderr)
+    return 0
+
+
+def cmd_pool(args):
+    import json
+    import threading
+    import warm_pool
+    profile = profile_manager.load_profile(profile_name(args.profile))
+    if profile is None:
+        print(f"Profile '{args.profile}' not found in {profile_manager.PROFILE_DIR}", file=sys.stderr)
+        return 2
+    name = os.path.splitext(profile_name(args.profile))[0]
+    pool = warm_pool.WarmPool(name, profile, size=args.size, boot_seconds=args.boot_seconds, max_idle=args.max_idle)
+    path = args.socket or vm_command.runtime_path(f"pool-{name}.sock")
+    server = warm_pool.serve(pool, path)
+    pool.maintain()
+    threading.Thread(target=pool.run, daemon=True).start()
+    print(f"Warm pool '{name}': {args.size} instance(s), send 'get' or 'stats' to {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.shutdown()
+        if os.path.exists(path):
+            os.remove(path)
+        print(json.dumps(pool.stats()))
+    return 0
+
+
+def cmd_netbench(args):
+    import json
+    import net_bench
+    try:
+        if args.mode == "serve":
+            print(f"Receiving on port {args.port} (guest side: send with net_bench or dd | nc)", file=sys.stderr)
+            net_bench.serve(args.port, report=lambda r: print(json.dumps(r) if args.json else net_bench.describe(r),
+                                                             flush=True), once=args.once)
+        else:
+            res = net_bench.run_client(args.host, args.port, args.seconds, args.streams)
+            print(json.dumps(res) if args.json else net_bench.describe(res))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"netbench failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def parse_vary(items):
+    # "accel=kvm,tcg" -> {"accel": ["kvm", "tcg"]}; true/false diventano booleani
+    vary = {}
+    for item in items or []:
+        key, sep, values = item.partition("=")
+        if not sep or not values:
+            raise ValueError(f"--vary expects KEY=VALUE[,VALUE...], got '{item}'")
+        vary[key] = [{"true": True, "false": False}.get(v.lower(), v) for v in values.split(",")]
+    return vary
+
+
+def cmd_boottime(args):
+    import json
+    import boot_timing
+    profile = profile_manager.load_profile(profile_name(args.profile))
+    if profile is None:
+        print(f"Profile '{args.profile}' not found in {profile_manager.PROFILE_DIR}", file=sys.stderr)
+        return 2
+    try:
+        vary = parse_vary(args.vary)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    unknown = set(vary) - set(vm_command.DEFAULT_CONFIG)
+    if unknown:
+        print(f"Unknown profile keys in --vary: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    patterns = args.milestone or boot_timing.milestones(profile)
+
+    def progress(run, variant, result):
+        label = " ".join(f"{k}={v}" for k, v in variant.items()) or "profile"
+        detail = result.get("error") or boot_timing.describe(result)
+        print(f"[{run + 1}/{args.runs}] {label}: {detail}", file=sys.stderr)
+    summary = boot_timing.bench(profile_name(args.profile), profile, vary, args.runs, patterns,
+                                qemu_config.load_paths(), args.timeout, not args.no_save, progress)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    for row in summary if not args.json else []:
+        label = " ".join(f"{k}={v}" for k, v in row["variant"].items()) or "profile"
+        if row["median"] is None:
+            print(f"{label}: no successful boot in {row['runs']} run(s)")
+        else:
+            print(f"{label}: median {row['median']:.2f}s, p95 {row['p95']:.2f}s, min {row['min']:.2f}s "
+                  f"({row['runs'] - row['failures']}/{row['runs']} ok)")
+    return 0 if all(row["median"] is not None for row in summary) else 1
+
+
+def cmd_metrics(args):
+    import time
+    import admission
+    import host_metrics
+    if args.pid:
+        targets = {str(pid): pid for pid in args.pid}
+    else:
+        # Le VM avviate dal launcher (GUI o CLI) sono nel registro del controllo di ammissione
+        targets = admission.Ledger(vm_command.runtime_path("admission.json"), admission.DEFAULT_POLICY).qemu_pids()
+    sampler = host_metrics.HostSampler(args.interval, prom_path=args.prom)
+    for key, pid in targets.items():
+        sampler.add(key, pid)
+    if not sampler.procs:
+        print("No QEMU processes to sample (start VMs with the launcher or pass --pid)", file=sys.stderr)
+        return 1
+    count = 0
+    try:
+        while sampler.procs and (not args.count or count < args.count):
+            sampler.sample()
+            count += 1
+            if count > 1:
+                for key, (name, pid, values) in sorted(sampler.latest().items()):
+                    wait = [v for k, v in values.items() if k.startswith("vcpu_wait_percent/")]
+                    print(f"{name} pid {pid}: cpu {values.get('cpu_percent', 0):.1f}%, "
+                          f"rss {values.get('rss_bytes', 0) / (1 << 20):.0f} MiB, "
+                          f"majflt {values.get('major_faults_per_s', 0):.0f}/s, "
+                          f"io r {values.get('io_read_bytes_per_s', 0) / (1 << 20):.1f} "
+                          f"w {values.get('io_write_bytes_per_s', 0) / (1 << 20):.1f} MiB/s, "
+                          f"vcpu wait max {max(wait, default=0):.1f}%")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.stop()
+    if args.csv:
+        sampler.write_csv(args.csv)
+    return 0
+
+
+def cmd_fleet(args):
+    import json
+    import time
+    import signal
+    import fleet
+    from vm_process import VMProcess
+    try:
+        manifest = fleet.load_manifest(args.manifest)
+        if args.dry_run:
+            for inst in fleet.expand(manifest):
+                after = f" after {', '.join(sorted(inst.after))}" if inst.after else ""
+                print(f"{inst.name}: {inst.config.get('arch', '')} ram={inst.config.get('ram', '')} "
+                      f"cpu={inst.config.get('cpu', '')}{after}")
+            return 0
+        log_dir = vm_command.runtime_path("fleet")
+        os.makedirs(log_dir, exist_ok=True)
+        launch = lambda name, config: VMProcess(name, config, log_path=os.path.join(log_dir, f"{name}.log"))
+        run = fleet.Fleet(manifest, launch, args.concurrency, args.stagger)
+    except (OSError, ValueError, fleet.ManifestError) as e:
+        print(f"Invalid manifest {args.manifest}: {e}", file=sys.stderr)
+        return 2
+    # SIGTERM come Ctrl-C: le VM della flotta vengono fermate in ogni caso
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        while not run.done():
+            for event in run.step():
+                print(event, file=sys.stderr)
+            time.sleep(0.1)
+        print(json.dumps(run.summary(), indent=1))
+        failed = any(inst.state != fleet.READY for inst in run.instances)
+        if args.exit_when_ready or failed:
+            return 1 if failed else 0
+        print("Fleet ready, Ctrl-C stops all VMs", file=sys.stderr)
+        while any(inst.vm.alive() for inst in run.instances if inst.vm):
+            time.sleep(1)
+        return 0
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if not args.exit_when_ready:
+            run.stop()
+
+
+def cmd_admission(args):
+    import json
+    import admission
+    policy = admission.load_policy()
+    changes = {field: getattr(args, field) for field in admission.DEFAULT_POLICY if getattr(args, field) is not None}
+    if changes:
+        policy.update(changes)
+        admission.save_policy(policy)
+    status = admission.Ledger(vm_command.runtime_path("admission.json"), policy).status()
+    if args.json:
+        print(json.dumps({"policy": policy, "status": status}, indent=2))
+    else:
+        print(f"policy: {', '.join(f'{k}={v}' for k, v in policy.items())}")
+        print(admission.describe(status))
+    return 0
+
+
+def cmd_images(args):
+    import json
+    import image_library
+    directories = image_library.load_directories()
+    if args.add or args.remove:
+        removed = {os.path.abspath(d) for d in args.remove or []}
+        directories = [d for d in directories if os.path.abspath(d) not in removed]
+        directories += [os.path.abspath(d) for d in args.add or [] if os.path.abspath(d) not in directories]
+        image_library.save_directories(directories)
+    if not directories:
+        print("No image folders configured, add one with --add DIR", file=sys.stderr)
+        return 1
+    library = image_library.ImageLibrary()
+    try:
+        changed, removed = library.refresh(directories)
+        entries = library.entries(args.kind)
+    finally:
+        library.close()
+    by_path = {row["path"]: row for row in entries}
+    for row in entries:
+        row["backing_chain"] = [{"path": path, "format": fmt}
+                                for path, fmt in image_library.backing_chain(row["path"], by_path)] \
+            if row["backing"] else []
+    if args.json:
+        print(json.dumps(entries, indent=2))
+    else:
+        for row in entries:
+            print(f"{row['path']}  ({image_library.summary(row)})")
+            for link in row["backing_chain"]:
+                print(f"    -> {link['path']} ({link['format'] or 'missing'})")
+    print(f"{len(entries)} images, {len(changed)} headers read, {len(removed)} gone", file=sys.stderr)
+    return 0
+
+
+def cmd_checksum(args):
+    import json
+    import time
+    import image_digest
+    import image_library
+    last = [0.0]
+
+    def progress(done, total):
+        # Al piu' due volte al secondo e solo su un terminale
+        now = time.monotonic()
+        if sys.stderr.isatty() and (now - last[0] >= 0.5 or done == total):
+            last[0] = now
+            print(f"\rhashing {done / (1 << 30):.1f}/{total / (1 << 30):.1f} GiB ({done * 100 // max(1, total)}%)",
+                  end="\n" if done == total else "", file=sys.stderr, flush=True)
+
+    workers = args.workers or image_digest.WORKERS
+    start = time.perf_counter()
+    if args.sums:
+        report = image_digest.verify(args.sums, args.files, progress, workers=workers)
+        if args.json:
+            print(json.dumps([{"path": path, "expected": expected, "sha256": actual, "status": status}
+                              for path, expected, actual, status in report], indent=2))
+        else:
+            for path, _, _, status in report:
+                print(f"{path}: {status.upper() if status in ('ok', 'mismatch', 'missing') else status}")
+        return 0 if report and all(status == "ok" for _, _, _, status in report) else 1
+    if args.duplicates:
+        paths = list(args.files) + image_digest.profile_images()
+        if args.library:
+            paths += [row["path"] for row in image_library.scan()]
+        groups = image_digest.duplicates(paths, progress, workers=workers)
+        if args.json:
+            print(json.dumps([{"size": size, "paths": group} for size, group in groups], indent=2))
+        else:
+            for size, group in groups:
+                print(f"{image_library.human_size(size)} x {len(group)}:")
+                for path in group:
+                    print(f"    {path}")
+            reclaim = sum(size * (len(group) - 1) for size, group in groups)
+            print(f"{len(groups)} duplicate groups among {len({os.path.abspath(path) for path in paths})} images, "
+                  f"{image_library.human_size(reclaim)} reclaimable", file=sys.stderr)
+        return 0
+    if not args.files:
+        print("Nothing to hash: pass files, --sums FILE or --duplicates", file=sys.stderr)
+        return 1
+    results, errors, hashed = image_digest.digests(args.files, progress, workers=workers)
+    if args.json:
+        print(json.dumps({"sha256": results, "errors": errors}, indent=2))
+    else:
+        # Stesso formato di sha256sum: l'output si puo' usare come SHA256SUMS
+        for path in args.files:
+            if path in results:
+                print(f"{results[path]}  {path}")
+            elif path in errors:
+                print(f"{path}: {errors[path]}", file=sys.stderr)
+    print(f"{len(results)} files, {len(hashed)} hashed, {len(results) - len(hashed)} cached "
+          f"in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def cmd_gc(args):
+    import overlays
+    for path in overlays.gc(args.dir or None):
+        print(f"removed {path}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="qemu-launcher", description="Headless QEMU launcher")
+    parser.add_argument("--profiles", metavar="DIR", help="profile directory (default: profiles)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="launch a VM from a saved profile")
+    run.add_argument("profile")
+    run.add_argument("--dry-run", action="store_true", help="print the QEMU command and exit")
+    run.add_argument("--qmp", metavar="SOCKET", help="QMP unix socket path (default: run/<profile>-<pid>.qmp)")
+    run.add_argument("--fresh", action="store_true", help="discard a suspended state and boot normally")
+    run.add_argument("--wait", type=float, default=0.0, metavar="SECONDS",
+                     help="how long to wait for host resources when admission control queues the launch")
+    run.set_defaults(func=cmd_run)
+
+    lst = sub.add_parser("list", help="list saved profiles")
+    lst.add_argument("query", nargs="*", help="search words and filters, e.g. arch:x86_64 ram>=2048")
+    lst.add_argument("-l", "--long", action="store_true", help="show arch, RAM, CPU and disk")
+    lst.set_defaults(func=cmd_list)
+
+    suspend = sub.add_parser("suspend", help="save a running VM's RAM and device state to a file and stop it")
+    suspend.add_argument("profile")
+    suspend.add_argument("--qmp", metavar="SOCKET", help="QMP socket of the instance (default: the only run/<profile>-*.qmp)")
+    suspend.set_defaults(func=cmd_suspend)
+
+    clone = sub.add_parser("clone", help="create linked clones of a profile's disk")
+    clone.add_argument("profile")
+    clone.add_argument("name", help="new profile name (NAME-1..NAME-N with --count)")
+    clone.add_argument("-n", "--count", type=int, default=1)
+    clone.add_argument("--full", action="store_true", help="independent copy (reflink when the filesystem supports it)")
+    clone.add_argument("--dir", metavar="DIR", help="where clone images are written (default: clones)")
+    clone.set_defaults(func=cmd_clone)
+
+    pool = sub.add_parser("pool", help="keep booted, paused VMs of a profile ready for instant handout")
+    pool.add_argument("profile")
+    pool.add_argument("-n", "--size", type=int, default=2, help="paused instances to keep (default: 2)")
+    pool.add_argument("--boot-seconds", type=float, default=120.0,
+                      help="pause an instance at the latest after this long, even if its serial console has not "
+                           "reached the profile's boot milestones or gone quiet (default: %(default)s)")
+    pool.add_argument("--max-idle", type=float, metavar="SECONDS", help="recycle instances paused longer than this")
+    pool.add_argument("--socket", metavar="PATH", help="control socket (default: run/pool-<profile>.sock)")
+    pool.set_defaults(func=cmd_pool)
+
+    netbench = sub.add_parser("netbench", help="TCP throughput check between host and guests")
+    netbench.add_argument("mode", choices=["serve", "client"])
+    netbench.add_argument("host", nargs="?", default="127.0.0.1", help="server address (client mode)")
+    netbench.add_argument("-p", "--port", type=int, default=5201)
+    netbench.add_argument("-t", "--seconds", type=float, default=10.0)
+    netbench.add_argument("-P", "--streams", type=int, default=1, help="parallel connections (client mode)")
+    netbench.add_argument("--once", action="store_true", help="exit after one connection (serve mode)")
+    netbench.add_argument("--json", action="store_true")
+    netbench.set_defaults(func=cmd_netbench)
+
+    fleet = sub.add_parser("fleet", help="launch the VMs listed in a JSON/YAML manifest")
+    fleet.add_argument("manifest")
+    fleet.add_argument("-j", "--concurrency", type=int, help="VMs booting at the same time (default: manifest or 4)")
+    fleet.add_argument("--stagger", type=float, help="seconds between two launches (default: manifest or 1)")
+    fleet.add_argument("--dry-run", action="store_true", help="print the expanded instances and exit")
+    fleet.add_argument("--exit-when-ready", action="store_true", help="leave the VMs running and exit once all are ready")
+    fleet.set_defaults(func=cmd_fleet)
+
+    boottime = sub.add_parser("boottime", help="time boots of a profile, optionally across a matrix of option variants")
+    boottime.add_argument("profile")
+    boottime.add_argument("-n", "--runs", type=int, default=1, help="boots per variant (default: 1)")
+    boottime.add_argument("--vary", action="append", metavar="KEY=V1,V2",
+                          help="profile option to compare, e.g. accel=kvm,tcg (repeat for a matrix)")
+    boottime.add_argument("--milestone", action="append", metavar="REGEX",
+                          help="console regex marking the end of the boot (default: the profile's boot_milestones)")
+    boottime.add_argument("--timeout", type=float, default=300.0, help="seconds before a boot counts as failed")
+    boottime.add_argument("--no-save", action="store_true", help="do not append the runs to boot_times/<profile>.jsonl")
+    boottime.add_argument("--json", action="store_true")
+    boottime.set_defaults(func=cmd_boottime)
+
+    metrics = sub.add_parser("metrics", help="sample CPU, RSS, faults, I/O and vCPU wait of running QEMU processes")
+    metrics.add_argument("--pid", type=int, action="append", help="QEMU pid to sample (default: all launcher VMs)")
+    metrics.add_argument("-i", "--interval", type=float, default=1.0)
+    metrics.add_argument("-n", "--count", type=int, help="number of samples (default: until Ctrl-C)")
+    metrics.add_argument("--prom", metavar="FILE", help="Prometheus text file rewritten after every sample")
+    metrics.add_argument("--csv", metavar="FILE", help="write the sampled time series as CSV on exit")
+    metrics.set_defaults(func=cmd_metrics)
+
+    adm = sub.add_parser("admission", help="show committed vs available host resources and set the admission policy")
+    adm.add_argument("--mode", choices=["queue", "reject", "downsize", "off"],
+                     help="what to do when a VM does not fit: wait, fail, shrink it, or only warn")
+    adm.add_argument("--ram-overcommit", dest="ram_overcommit", type=float, metavar="RATIO",
+                     help="committed guest RAM allowed per MB of host RAM")
+    adm.add_argument("--vcpu-overcommit", dest="vcpu_overcommit", type=float, metavar="RATIO",
+                     help="committed vCPUs allowed per online host CPU")
+    adm.add_argument("--reserve-mb", dest="reserve_mb", type=int, metavar="MB", help="RAM kept free for the host")
+    adm.add_argument("--psi-memory-max", dest="psi_memory_max", type=float, metavar="PCT",
+                     help="memory pressure (some avg10) above which launches wait")
+    adm.add_argument("--psi-cpu-max", dest="psi_cpu_max", type=float, metavar="PCT",
+                     help="CPU pressure (some avg10) above which launches wait")
+    adm.add_argument("--min-ram-mb", dest="min_ram_mb", type=int, metavar="MB", help="smallest RAM a VM is down-sized to")
+    adm.add_argument("--json", action="store_true")
+    adm.set_defaults(func=cmd_admission)
+
+    images = sub.add_parser("images", help="scan the image library folders for disk images and ISOs (headers only, cached)")
+    images.add_argument("--add", action="append", metavar="DIR", help="add a folder to the library")
+    images.add_argument("--remove", action="append", metavar="DIR", help="remove a folder from the library")
+    images.add_argument("--kind", choices=["disk", "iso"])
+    images.add_argument("--json", action="store_true")
+    images.set_defaults(func=cmd_images)
+
+    checksum = sub.add_parser("checksum", help="SHA-256 of images (cached by inode/size/mtime), "
+                                               "verification against SHA256SUMS and duplicate detection")
+    checksum.add_argument("files", nargs="*", help="images to hash (with --sums: only check these)")
+    checksum.add_argument("--sums", metavar="FILE", help="verify the files listed in a SHA256SUMS/CHECKSUM file")
+    checksum.add_argument("--duplicates", action="store_true",
+                          help="find identical images among the files and the disks/ISOs of all profiles")
+    checksum.add_argument("--library", action="store_true", help="with --duplicates: include the image library")
+    checksum.add_argument("--workers", type=int, help="files hashed in parallel (default 4)")
+    checksum.add_argument("--json", action="store_true")
+    checksum.set_defaults(func=cmd_checksum)
+
+    gc = sub.add_parser("gc", help="remove overlays left behind by launchers that are no longer running")
+    gc.add_argument("dir", nargs="*", help="overlay directories (default: run/overlays and /dev/shm/qemu-launcher)")
+    gc.set_defaults(func=cmd_gc)
+
+    caps = sub.add_parser("caps", help="probe configured QEMU binaries (cached)")
+    caps.add_argument("arch", nargs="*")
+    caps.set_defaults(func=cmd_caps)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profiles:
+        profile_manager.PROFILE_DIR = args.profiles
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,40 @@
 import sys
-import json
 from PyQt6.QtWidgets import (
-    QApplication, QWidget, QDialog, QLabel, QLineEdit, QPushButton,
-    QFileDialog, QVBoxLayout, QGridLayout, QScrollArea, QHBoxLayout, QTextEdit, QComboBox,
-    QCheckBox, QListWidget, QMessageBox, QFormLayout, QMenu, QWizard, QWizardPage,
-    QMenuBar
+    QApplication, QWidget, QLabel, QLineEdit, QPushButton,
+    QFileDialog, QVBoxLayout, QHBoxLayout, QTextEdit, QComboBox,
+    QCheckBox, QListWidget, QListWidgetItem, QMessageBox, QMenu,
+    QMenuBar, QCompleter, QListView, QInputDialog, QSpinBox
 )
-from PyQt6.QtCore import QProcess, Qt
-from PyQt6.QtGui import QAction, QPalette, QColor, QGuiApplication
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QFileSystemWatcher
+from PyQt6.QtGui import QAction, QPalette, QGuiApplication, QTextCursor
 import profile_manager  
+import profile_index
+from profile_model import ProfileListModel
 import qemu_config
-from qemu_config import load_paths
-from qemu_config import save_paths
+import qemu_caps
+import vm_command
+import host_accel
+import cpu_placement
+import memory_backend
+import disk_options
+import overlays
+import network
+import vm_supervisor
+from vm_dashboard import VMDashboard
 import importlib
+import threading
+
+# Aggiornamenti della console al massimo 30 volte al secondo
+CONSOLE_FPS = 30
+CONSOLE_MAX_LINES = 20000
+
+_languages = {}
 
 def load_language(lang_code):
-    module = importlib.import_module(f"lang_{lang_code}")
-    return module.translations
-    
-is_dark = QGuiApplication.styleHints().colorScheme().name == "Dark"
+    # I moduli lingua si importano solo alla prima richiesta
+    if lang_code not in _languages:
+        _languages[lang_code] = importlib.import_module(f"lang_{lang_code}").translations
+    return _languages[lang_code]
 
 def is_dark_mode():
     palette = QGuiApplication.palette()
@@ -26,198 +42,122 @@ def is_dark_mode():
     return bg_color.lightness() < 128
 
 
-class VMWizard(QWizard):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("New VM Configuration")
-        self.setWizardStyle(QWizard.WizardStyle.ModernStyle)
-
-        self.addPage(self.architecture_page())
-        self.addPage(self.resources_page())
-        self.addPage(self.disk_page())
-        self.addPage(self.iso_page())
-        self.addPage(self.bios_page())
-        self.addPage(self.network_page())
-        self.addPage(self.summary_page())
-
-    def architecture_page(self):
-        page = QWizardPage()
-        page.setTitle("Architecture")
-        layout = QVBoxLayout()
-        layout.addWidget(QLabel("Select Architecture:"))
-        self.arch_combo = QComboBox()
-        self.arch_combo.addItems(["x86_64", "arm", "aarch64", "riscv64"])
-        layout.addWidget(self.arch_combo)
-        page.setLayout(layout)
-        return page
-
-    def resources_page(self):
-        page = QWizardPage()
-        page.setTitle("Resources")
-        layout = QVBoxLayout()
-        layout.addWidget(QLabel("RAM (MB):"))
-        self.ram_input = QLineEdit()
-        layout.addWidget(self.ram_input)
-        layout.addWidget(QLabel("CPU cores:"))
-        self.cpu_input = QLineEdit()
-        layout.addWidget(self.cpu_input)
-        page.setLayout(layout)
-        return page
-
-    def disk_page(self):
-        page = QWizardPage()
-        page.setTitle("Disk")
-        layout = QVBoxLayout()
-        layout.addWidget(QLabel("Disk path:"))
-        self.disk_input = QLineEdit()
-        browse_btn = QPushButton("Sfoglia...")
-        browse_btn.clicked.connect(self.browse_disk)
-        layout.addWidget(self.disk_input)
-        layout.addWidget(browse_btn)
-        page.setLayout(layout)
-        return page
-
-    def iso_page(self):
-        page = QWizardPage()
-        page.setTitle("ISO")
-        layout = QVBoxLayout()
-        layout.addWidget(QLabel("Iso path:"))
-        self.iso_input = QLineEdit()
-        browse_btn = QPushButton("Browse...")
-        browse_btn.clicked.connect(self.browse_iso)
-        layout.addWidget(self.iso_input)
-        layout.addWidget(browse_btn)
-        page.setLayout(layout)
-        return page
-        
-    def bios_page(self):
-        page = QWizardPage()
-        page.setTitle("BIOS / Firmware")
-        layout = QVBoxLayout()
-        layout.addWidget(QLabel("BIOS/UEFI path (optional):"))
-        self.bios_input = QLineEdit()
-        browse_btn = QPushButton("Browse...")
-        browse_btn.clicked.connect(self.browse_bios)
-        layout.addWidget(self.bios_input)
-        layout.addWidget(browse_btn)
-        page.setLayout(layout)
-        return page
-
-    def network_page(self):
-        page = QWizardPage()
-        page.setTitle("Network")
-        layout = QVBoxLayout()
-        layout.addWidget(QLabel("Network mode:"))
-        self.net_combo = QComboBox()
-        self.net_combo.addItems(["user", "tap", "bridge"])
-        layout.addWidget(self.net_combo)
-        
-        page.setLayout(layout)
-        return page
-
-    def summary_page(self):
-        page = QWizardPage()
-        page.setTitle("Summary")
-        layout = QVBoxLayout()
-        layout.addWidget(QLabel("Click End to load VM..."))
-        page.setLayout(layout)
-        return page
-
-    def browse_disk(self):
-        file, _ = QFileDialog.getOpenFileName(self, "Select disk image")
-        if file:
-            self.disk_input.setText(file)
-    def browse_iso(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select ISO Image")
-        if file_path:
-            self.iso_input.setText(file_path)
-    def browse_bios(self):
-        file, _ = QFileDialog.getOpenFileName(self, "Select BIOS/UEFI")
-        if file:
-            self.bios_input.setText(file)
-
-    def get_vm_config(self):
-        return {
-            "arch": self.arch_combo.currentText(),
-            "ram": self.ram_input.text(),
-            "cpu": self.cpu_input.text(),
-            "disk": self.disk_input.text(),
-            "iso": self.iso_input.text(),
-            "bios": self.bios_input.text(),
-            "net": self.net_combo.currentText(),
-          
-        }
-
-
-        
-   
-
-
-
-
-
-class QemuConfigDialog(QDialog):
-    def __init__(self, paths, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("Configure Qemu Binaries")
-        self.paths = load_paths()
-        self.inputs = {}
-        self.resize(1024, 768)
-        layout = QVBoxLayout(self)
-
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        container = QWidget()
-        grid = QGridLayout(container)
-
-        keys = sorted(self.paths.keys())
-        half = (len(keys) + 1) // 2
-       
-
-        for i, arch in enumerate(keys):
-            col = 0 if i < half else 2
-            row = i if i < half else i - half
-
-            label = QLabel(arch)
-            input_field = QLineEdit(self.paths[arch])
-            self.inputs[arch] = input_field
-
-            grid.addWidget(label, row, col)
-            grid.addWidget(input_field, row, col + 1)
-
-        scroll.setWidget(container)
-        layout.addWidget(scroll)
-
-        save_button = QPushButton("Save")
-        save_button.clicked.connect(self.save_and_close)
-        layout.addWidget(save_button)
-
-    def save_and_close(self):
-        updated = {arch: field.text() for arch, field in self.inputs.items()}
-        save_paths(updated)
-        self.accept()
-
-
 class QemuLauncher(QWidget):
+    caps_ready = pyqtSignal(object)
     
 
 
     def change_language(self, lang_code):
-        lang_module = importlib.import_module(f"lang_{lang_code}")
-        self.translations = lang_module.translations
+        self.translations = load_language(lang_code)
         self.update_ui_texts()
 
 
     def open_config_dialog(self):
-        dialog = QemuConfigDialog(self)
+        from config_dialog import QemuConfigDialog
+        dialog = QemuConfigDialog(self.qemu_paths, self)
         dialog.exec()
         self.qemu_paths = qemu_config.load_paths()
+        self.start_capability_probe()
     def __init__(self):
         super().__init__()
         self.setWindowTitle("QEMU Launcher")
         self.setGeometry(100, 100, 700, 500)
+        self.current_profile = None
+        self.supervisor = vm_supervisor.VMSupervisor(self)
+        self.supervisor.vm_added.connect(self.on_vm_added)
+        self.supervisor.vm_changed.connect(self.on_vm_changed)
+        self.supervisor.vm_removed.connect(self.on_vm_removed)
+        self.capabilities = {}
+        # Pool di VM in pausa per profilo
+        self.pools = {}
+        self.fleet = None
+        self.caps_ready.connect(self.on_capabilities)
+        self.qemu_paths = qemu_config.DEFAULT_PATHS.copy()
         self.init_ui()
+        # Profili e binari si caricano dopo il primo paint della finestra
+        QTimer.singleShot(0, self.deferred_init)
+
+    def deferred_init(self):
         self.qemu_paths = qemu_config.load_paths()
+        for arch in self.qemu_paths:
+            if self.arch_combo.findText(arch) == -1:
+                self.arch_combo.addItem(arch)
+        self.profile_index = profile_index.ProfileIndex()
+        overlays.gc()
+        self.profile_watcher.addPath(profile_manager.PROFILE_DIR)
+        self.refresh_profiles()
+        # Pool, flotta, log, libreria e ammissione si importano qui o al primo uso, come vm_wizard
+        import admission
+        import warm_pool
+        from library_panel import LibraryPanel
+        self.admission_combo.blockSignals(True)
+        self.admission_combo.addItems(admission.MODES)
+        self.admission_combo.setCurrentText(admission.load_policy()["mode"])
+        self.admission_combo.blockSignals(False)
+        self.pool_boot_spin.blockSignals(True)
+        self.pool_boot_spin.setValue(int(warm_pool.BOOT_SECONDS))
+        self.pool_boot_spin.blockSignals(False)
+        self.library_panel = LibraryPanel()
+        self.library_panel.image_selected.connect(self.select_library_image)
+        self.library_slot.addWidget(self.library_panel)
+        if getattr(self, "translations", None):
+            self.library_panel.title_label.setText(self.translations["image_library"])
+        self.library_panel.rescan()
+        self.start_capability_probe()
+
+    def start_capability_probe(self):
+        # Con la cache aggiornata non parte nessun processo QEMU
+        paths = dict(self.qemu_paths)
+        threading.Thread(target=lambda: self.caps_ready.emit(qemu_caps.probe_all(paths)), daemon=True).start()
+
+    def on_capabilities(self, capabilities):
+        self.capabilities = capabilities
+        self.apply_capabilities()
+
+    def apply_capabilities(self):
+        self.update_accel_status()
+        caps = self.capabilities.get(vm_command.arch_key(self.arch_combo.currentText()))
+        if not caps:
+            self.fill_combo(self.vga_combo, vm_command.VGA_TYPES)
+            self.fill_combo(self.disk_type_combo, list(vm_command.DISK_DEVICES))
+            self.machine_input.setCompleter(None)
+            self.cpu_model_input.setCompleter(None)
+            return
+        available = set(qemu_caps.devices(caps))
+        self.fill_combo(self.vga_combo, [v for v in vm_command.VGA_TYPES if v == "none" or v in available])
+        self.fill_combo(self.disk_type_combo, [d for d, device in vm_command.DISK_DEVICES.items() if device in available]
+                        or list(vm_command.DISK_DEVICES))
+        self.machine_input.setCompleter(QCompleter(caps["machines"]["names"], self))
+        self.machine_input.setPlaceholderText(caps["machines"]["default"] or "")
+        self.cpu_model_input.setCompleter(QCompleter(caps["cpus"], self))
+
+    def update_accel_status(self):
+        arch = vm_command.arch_key(self.arch_combo.currentText())
+        accel = self.accel_combo.currentText()
+        if accel == host_accel.AUTO:
+            caps = self.capabilities.get(arch)
+            accel, host_cpu, warning = host_accel.best_accel(arch, caps["accels"] if caps else None)
+            text = f"auto: {accel}" + (" (-cpu host)" if host_cpu else "")
+        else:
+            warning = host_accel.check_accel(accel)
+            text = ""
+        self.accel_status.setText(warning or text)
+        self.accel_status.setStyleSheet("color: #d08000;" if warning else "")
+
+    def set_combo(self, combo, text):
+        index = combo.findText(text)
+        if index != -1:
+            combo.setCurrentIndex(index)
+
+    def fill_combo(self, combo, items):
+        current = combo.currentText()
+        combo.blockSignals(True)
+        combo.clear()
+        combo.addItems(items)
+        index = combo.findText(current)
+        if index != -1:
+            combo.setCurrentIndex(index)
+        combo.blockSignals(False)
 
     def show_about(self):
         QMessageBox.information(self, "About", "Created by Takeshi\nVersion: 0.99\nEmail: nathangray1981@msn.com")
@@ -245,82 +185,86 @@ class QemuLauncher(QWidget):
 
         main_layout.setMenuBar(menu_bar)
         # Sezione profili
-        self.profile_list = QListWidget()
-        self.refresh_profiles()
+        self.profile_index = None
+        self.profile_model = ProfileListModel(self)
+        self.profile_list = QListView()
+        self.profile_list.setModel(self.profile_model)
+        self.profile_list.setUniformItemSizes(True)
+        self.profile_list.doubleClicked.connect(self.load_selected_profile)
+        self.profile_search = QLineEdit()
+        self.profile_search.setPlaceholderText("Search (e.g. web arch:x86_64 accel:kvm ram>=2048)")
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.apply_profile_search)
+        self.profile_search.textChanged.connect(self.search_timer.start)
+        # La cartella profili viene osservata; i cambi ravvicinati si accorpano
+        self.profile_refresh_timer = QTimer(self)
+        self.profile_refresh_timer.setSingleShot(True)
+        self.profile_refresh_timer.setInterval(300)
+        self.profile_refresh_timer.timeout.connect(self.refresh_profiles)
+        self.profile_watcher = QFileSystemWatcher(self)
+        self.profile_watcher.directoryChanged.connect(self.profile_refresh_timer.start)
 
         profile_buttons = QHBoxLayout()
         self.load_button = QPushButton("Load Profile")
         self.load_button.clicked.connect(self.load_selected_profile)
         self.delete_button = QPushButton("Delete Profile")
         self.delete_button.clicked.connect(self.delete_selected_profile)
+        self.clone_button = QPushButton("Clone Profile")
+        self.clone_button.clicked.connect(self.clone_selected_profile)
         profile_buttons.addWidget(self.load_button)
+        profile_buttons.addWidget(self.clone_button)
         profile_buttons.addWidget(self.delete_button)
 
         profile_section = QVBoxLayout()
         self.profile_label = QLabel("Available Profiles:")
         profile_section.addWidget(self.profile_label)
+        profile_section.addWidget(self.profile_search)
         profile_section.addWidget(self.profile_list)
         profile_section.addLayout(profile_buttons)
 
+        # VM in esecuzione
+        self.vm_list = QListWidget()
+        self.vm_list.currentItemChanged.connect(self.on_vm_selected)
+        vm_buttons = QHBoxLayout()
+        self.pause_button = QPushButton("Pause/Resume")
+        self.pause_button.clicked.connect(self.pause_selected_vm)
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.clicked.connect(self.stop_selected_vm)
+        self.kill_button = QPushButton("Kill")
+        self.kill_button.clicked.connect(self.kill_selected_vm)
+        self.suspend_button = QPushButton("Suspend")
+        self.suspend_button.clicked.connect(self.suspend_selected_vm)
+        self.migrate_button = QPushButton("Migrate...")
+        self.migrate_button.clicked.connect(self.migrate_selected_vm)
+        self.clear_vms_button = QPushButton("Clear exited")
+        self.clear_vms_button.clicked.connect(self.supervisor.remove_exited)
+        self.serial_button = QPushButton("Attach/Detach serial")
+        self.serial_button.clicked.connect(self.toggle_serial_console)
+        self.log_viewer_button = QPushButton("Log viewer...")
+        self.log_viewer_button.clicked.connect(self.open_log_viewer)
+        vm_buttons.addWidget(self.pause_button)
+        vm_buttons.addWidget(self.suspend_button)
+        vm_buttons.addWidget(self.migrate_button)
+        vm_buttons.addWidget(self.stop_button)
+        vm_buttons.addWidget(self.kill_button)
+        vm_buttons.addWidget(self.serial_button)
+        vm_buttons.addWidget(self.log_viewer_button)
+        vm_buttons.addWidget(self.clear_vms_button)
+        self.vm_list_label = QLabel("Running VMs:")
+        profile_section.addWidget(self.vm_list_label)
+        profile_section.addWidget(self.vm_list)
+        profile_section.addLayout(vm_buttons)
+        # Immagini e ISO delle cartelle configurate: selezionarne una riempie disco o ISO
+        # (LibraryPanel arriva in deferred_init)
+        self.library_panel = None
+        self.library_slot = QVBoxLayout()
+        profile_section.addLayout(self.library_slot)
+
         # Campi configurazione
         self.arch_combo = QComboBox()
-        self.arch_combo.addItems([
-           
-           
-            "x86_64",
-            "x86_64w",
-            "aarch64",
-            "aarch64w",
-            "alpha",
-            "alphaw",
-            "arm",
-            "armw",
-            "avr",
-            "avrw",
-            "hppa",
-            "hppaw",
-            "i386",
-            "i386w",
-            "loongarch64",
-            "loongarch64w",
-            "microblaze",
-            "microblazeel",
-            "microblazeelw",
-            "mips",
-            "mips64",
-            "mips64el",
-            "mips64elw",
-            "mips64w",
-            "mipsel",
-            "mipselw",
-            "mipsw",
-            "or1k",
-            "or1kw",
-            "ppc",
-            "ppc64",
-            "ppc64w",
-            "riscv32",
-            "riscv32w",
-            "riscv64",
-            "riscv64w",
-            "rx",
-            "rxw",
-            "s390x",
-            "s390xw",
-            "sh4",
-            "sh4eb",
-            "sh4ebw",
-            "sparc",
-            "sparc64",
-            "sparc64w",
-            "sparcw",
-            "tricore",
-            "tricorew",
-            "xtensa",
-            "xtensaeb",
-            "ztensaebw",
-            "xtensaw"
-        ])
+        self.arch_combo.addItems(list(qemu_config.DEFAULT_PATHS))
         self.disk_input = QLineEdit()
         self.disk_button = QPushButton("Browse")
         self.disk_button.clicked.connect(self.browse_disk)
@@ -337,13 +281,45 @@ class QemuLauncher(QWidget):
         self.bios_button = QPushButton("Browse BIOS")
         self.bios_button.clicked.connect(self.browse_bios)
         self.net_combo = QComboBox()
-        self.net_combo.addItems(["user (NAT)", "bridge"])
+        self.net_combo.addItems(network.NET_MODES)
+        # -netdev + virtio-net: modello, vhost, code, interfaccia host e hostfwd
+        self.net_model_combo = QComboBox()
+        self.net_model_combo.addItems([network.AUTO] + network.NIC_MODELS)
+        self.net_vhost_checkbox = QCheckBox("vhost")
+        self.net_vhost_checkbox.setChecked(True)
+        self.net_queues_input = QLineEdit(network.AUTO)
+        self.net_queues_input.setToolTip("virtio-net queues on tap (auto = one per vCPU)")
+        self.net_bridge_input = QLineEdit("br0")
+        self.net_bridge_input.setPlaceholderText("bridge")
+        self.net_tap_input = QLineEdit()
+        self.net_tap_input.setPlaceholderText("prebuilt tap (default tap0)")
+        self.net_hostfwd_input = QLineEdit()
+        self.net_hostfwd_input.setPlaceholderText("hostfwd, e.g. tcp::2222-:22, tcp::8080-:80")
+        self.net_combo.currentTextChanged.connect(self.update_net_fields)
 
         self.snapshot_checkbox = QCheckBox("Launch as snapshot")
+        # Dove creare l'overlay effimero; tmpfs per le VM usa e getta piu' veloci
+        self.overlay_dir_combo = QComboBox()
+        self.overlay_dir_combo.setEditable(True)
+        self.overlay_dir_combo.addItems(["", overlays.TMPFS_DIR])
+        self.overlay_dir_combo.lineEdit().setPlaceholderText(f"overlay directory (default: {overlays.OVERLAY_DIR})")
+        # Seriale in console e milestone cronometrate al boot (boot_timing)
+        self.serial_console_checkbox = QCheckBox("Serial console in output")
+        # Seriale e monitor HMP su socket chardev, salvati in logs/ (serial_log)
+        self.serial_log_checkbox = QCheckBox("Serial log")
+        self.serial_log_checkbox.setChecked(True)
+        self.hmp_monitor_checkbox = QCheckBox("HMP monitor log")
+        self.boot_milestones_input = QLineEdit()
+        self.boot_milestones_input.setPlaceholderText("boot milestones, regex separated by ';' (e.g. login:)")
 
         # Log console
         self.log_output = QTextEdit()
         self.log_output.setReadOnly(True)
+        self.log_output.document().setMaximumBlockCount(CONSOLE_MAX_LINES)
+        self.console_pos = 0
+        self.console_timer = QTimer(self)
+        self.console_timer.setInterval(1000 // CONSOLE_FPS)
+        self.console_timer.timeout.connect(self.flush_console)
 
         # Pulsanti
         button_layout = QHBoxLayout()
@@ -356,6 +332,50 @@ class QemuLauncher(QWidget):
         button_layout.addWidget(self.launch_button)
         button_layout.addWidget(self.save_button)
 
+        # Warm pool: istanze avviate e in pausa, consegnate da launch_vm
+        pool_row = QHBoxLayout()
+        self.pool_label = QLabel("Warm pool:")
+        self.pool_size_spin = QSpinBox()
+        self.pool_size_spin.setRange(0, 32)
+        self.pool_size_spin.valueChanged.connect(self.resize_pool)
+        self.pool_status = QLabel()
+        # Limite del boot (di solito finisce prima, vedi warm_pool) e riciclo delle istanze ferme
+        self.pool_boot_label = QLabel("Max boot:")
+        self.pool_boot_spin = QSpinBox()
+        self.pool_boot_spin.setRange(5, 3600)
+        self.pool_boot_spin.setSuffix(" s")
+        self.pool_boot_spin.valueChanged.connect(self.set_pool_limits)
+        self.pool_idle_label = QLabel("Max idle:")
+        self.pool_idle_spin = QSpinBox()
+        self.pool_idle_spin.setRange(0, 86400)
+        self.pool_idle_spin.setSuffix(" s")
+        self.pool_idle_spin.setSpecialValueText("off")
+        self.pool_idle_spin.valueChanged.connect(self.set_pool_limits)
+        pool_row.addWidget(self.pool_label)
+        pool_row.addWidget(self.pool_size_spin)
+        pool_row.addWidget(self.pool_boot_label)
+        pool_row.addWidget(self.pool_boot_spin)
+        pool_row.addWidget(self.pool_idle_label)
+        pool_row.addWidget(self.pool_idle_spin)
+        pool_row.addWidget(self.pool_status, 1)
+        self.pool_timer = QTimer(self)
+        self.pool_timer.setInterval(1000)
+        self.pool_timer.timeout.connect(self.maintain_pools)
+
+        # Risorse dell'host: RAM/vCPU impegnate dalle VM del launcher, PSI e politica di ammissione
+        resource_row = QHBoxLayout()
+        self.admission_label = QLabel("Admission:")
+        self.admission_combo = QComboBox()
+        self.admission_combo.currentTextChanged.connect(self.set_admission_mode)
+        self.resource_status = QLabel()
+        resource_row.addWidget(self.admission_label)
+        resource_row.addWidget(self.admission_combo)
+        resource_row.addWidget(self.resource_status, 1)
+        self.resource_timer = QTimer(self)
+        self.resource_timer.setInterval(2000)
+        self.resource_timer.timeout.connect(self.update_resources)
+        self.resource_timer.start()
+
         # Layout configurazione
         self.disk_label = QLabel("Disk Image:")
         config_layout.addWidget(self.disk_label)
@@ -368,19 +388,41 @@ class QemuLauncher(QWidget):
 
         config_layout.addWidget(QLabel("RAM (MB):"))
         config_layout.addWidget(self.ram_input)
+        # Backend memoria: hugepage, prealloc e binding NUMA
+        memory_row = QHBoxLayout()
+        self.mem_backend_combo = QComboBox()
+        self.mem_backend_combo.addItems(memory_backend.BACKENDS)
+        self.hugepages_combo = QComboBox()
+        self.hugepages_combo.addItems(memory_backend.HUGEPAGE_SIZES)
+        self.hugepages_combo.setItemText(0, "no hugepages")
+        self.mem_prealloc_checkbox = QCheckBox("prealloc")
+        memory_row.addWidget(self.mem_backend_combo)
+        memory_row.addWidget(self.hugepages_combo)
+        memory_row.addWidget(self.mem_prealloc_checkbox)
+        numa_row = QHBoxLayout()
+        self.host_nodes_input = QLineEdit()
+        self.host_nodes_input.setPlaceholderText("host NUMA nodes, e.g. 0 or 0-1")
+        self.mem_policy_combo = QComboBox()
+        self.mem_policy_combo.addItems(memory_backend.NUMA_POLICIES)
+        self.mem_path_input = QLineEdit()
+        self.mem_path_input.setPlaceholderText("mem-path (default: hugetlbfs mount)")
+        numa_row.addWidget(self.host_nodes_input)
+        numa_row.addWidget(self.mem_policy_combo)
+        numa_row.addWidget(self.mem_path_input)
+        self.memory_label = QLabel("Memory backend:")
+        config_layout.addWidget(self.memory_label)
+        config_layout.addLayout(memory_row)
+        config_layout.addLayout(numa_row)
 
         config_layout.addWidget(QLabel("CPU:"))
         config_layout.addWidget(self.cpu_input)
+        self.cpu_policy_combo = QComboBox()
+        self.cpu_policy_combo.addItems(cpu_placement.POLICIES)
+        self.cpu_policy_label = QLabel("CPU placement:")
+        config_layout.addWidget(self.cpu_policy_label)
+        config_layout.addWidget(self.cpu_policy_combo)
         self.vga_combo = QComboBox()
-        self.vga_combo.addItems([
-            "none",
-            "VGA",
-            "cirrus-vga",
-            "qxl",
-            "virtio-gpu-pci",
-            "vmware-svga",
-            "bochs-display"
-        ])
+        self.vga_combo.addItems(vm_command.VGA_TYPES)
         self.usb_bus_combo = QComboBox()
         self.usb_bus_combo.addItems([
             "No USB",
@@ -399,14 +441,10 @@ class QemuLauncher(QWidget):
             "usb-kbd + usb-mouse + usb-tablet"
         ])
         self.disk_type_combo = QComboBox()
-        self.disk_type_combo.addItems([
-            "ide",
-            "scsi",
-            "virtio-blk",
-            "usb-storage"
-        ])
+        self.disk_type_combo.addItems(list(vm_command.DISK_DEVICES))
         self.accel_combo = QComboBox()
         self.accel_combo.addItems([
+            host_accel.AUTO,
             "tcg",
             "kvm",
             "hvf",
@@ -416,9 +454,30 @@ class QemuLauncher(QWidget):
         self.accel_label = QLabel("Acceleration (-accel):")
         config_layout.addWidget(self.accel_label)
         config_layout.addWidget(self.accel_combo)
+        self.accel_status = QLabel()
+        self.accel_status.setWordWrap(True)
+        config_layout.addWidget(self.accel_status)
+        self.accel_combo.currentTextChanged.connect(self.update_accel_status)
         self.disk_type_label = QLabel("Disk Type:")
         config_layout.addWidget(self.disk_type_label)
         config_layout.addWidget(self.disk_type_combo)
+        # Prestazioni disco: cache, aio, iothread dedicato, discard
+        disk_io_row = QHBoxLayout()
+        self.disk_cache_combo = QComboBox()
+        self.disk_cache_combo.addItems(disk_options.CACHE_MODES)
+        self.disk_aio_combo = QComboBox()
+        self.disk_aio_combo.addItems(disk_options.AIO_MODES)
+        self.disk_iothread_checkbox = QCheckBox("iothread")
+        self.disk_iothread_checkbox.setChecked(True)
+        self.disk_discard_checkbox = QCheckBox("discard")
+        self.disk_discard_checkbox.setChecked(True)
+        disk_io_row.addWidget(self.disk_cache_combo)
+        disk_io_row.addWidget(self.disk_aio_combo)
+        disk_io_row.addWidget(self.disk_iothread_checkbox)
+        disk_io_row.addWidget(self.disk_discard_checkbox)
+        self.disk_io_label = QLabel("Disk cache / AIO:")
+        config_layout.addWidget(self.disk_io_label)
+        config_layout.addLayout(disk_io_row)
         self.input_label = QLabel("Input Devices:")
         config_layout.addWidget(self.input_label)
         config_layout.addWidget(self.input_combo)
@@ -428,6 +487,7 @@ class QemuLauncher(QWidget):
         self.arch_label = QLabel("Architecture:")
         config_layout.addWidget(self.arch_label)
         config_layout.addWidget(self.arch_combo)
+        self.arch_combo.currentTextChanged.connect(self.apply_capabilities)
         config_layout.addWidget(QLabel("Machine Type (-machine):"))
         config_layout.addWidget(self.machine_input)
 
@@ -440,23 +500,49 @@ class QemuLauncher(QWidget):
         self.network_label = QLabel("Network:")
         config_layout.addWidget(self.network_label)
         config_layout.addWidget(self.net_combo)
+        net_row = QHBoxLayout()
+        net_row.addWidget(self.net_model_combo)
+        net_row.addWidget(self.net_vhost_checkbox)
+        net_row.addWidget(self.net_queues_input)
+        net_row.addWidget(self.net_bridge_input)
+        net_row.addWidget(self.net_tap_input)
+        net_row.addWidget(self.net_hostfwd_input)
+        config_layout.addLayout(net_row)
+        self.update_net_fields()
 
         config_layout.addWidget(self.snapshot_checkbox)
+        config_layout.addWidget(self.overlay_dir_combo)
+        boot_row = QHBoxLayout()
+        boot_row.addWidget(self.serial_console_checkbox)
+        boot_row.addWidget(self.serial_log_checkbox)
+        boot_row.addWidget(self.hmp_monitor_checkbox)
+        boot_row.addWidget(self.boot_milestones_input, 1)
+        config_layout.addLayout(boot_row)
         config_layout.addLayout(button_layout)
+        config_layout.addLayout(pool_row)
+        config_layout.addLayout(resource_row)
         self.console_label = QLabel("Console output:")
         config_layout.addWidget(self.console_label)
-        config_layout.addWidget(self.log_output)
+        self.dashboard = VMDashboard(self.supervisor.stats, self.supervisor.host_stats)
+        console_row = QHBoxLayout()
+        console_row.addWidget(self.log_output, 2)
+        console_row.addWidget(self.dashboard, 1)
+        config_layout.addLayout(console_row)
         self.config_button = QPushButton("Configure QEMU Binaries")
         self.config_button.clicked.connect(self.open_config_dialog)
         self.new_vm_button = QPushButton("New VM")
         self.new_vm_button.clicked.connect(self.open_vm_wizard)
+        self.fleet_button = QPushButton("Launch Fleet...")
+        self.fleet_button.clicked.connect(self.launch_fleet)
         button_layout.addWidget(self.config_button)
         button_layout.addWidget(self.new_vm_button)
+        button_layout.addWidget(self.fleet_button)
         main_layout.addLayout(profile_section, 1)
         main_layout.addLayout(config_layout, 2)
         self.setLayout(main_layout)
 
     def open_vm_wizard(self):
+        from vm_wizard import VMWizard
         wizard = VMWizard(self)
         if wizard.exec():
             config = wizard.get_vm_config()
@@ -471,25 +557,56 @@ class QemuLauncher(QWidget):
         self.disk_input.setText(config.get("disk", ""))
         self.iso_input.setText(config.get("iso", ""))
         self.bios_input.setText(config.get("bios", ""))
-        self.net_combo.setCurrentText(config.get("net", "user"))
+        self.net_combo.setCurrentText(network.backend(config) if "net" in config else network.USER)
 
 
 
 
     def refresh_profiles(self):
-        self.profile_list.clear()
-        for profile in profile_manager.list_profiles():
-            self.profile_list.addItem(profile)
+        if self.profile_index is not None:
+            self.profile_index.refresh()
+        self.apply_profile_search()
+
+    def apply_profile_search(self):
+        if self.profile_index is None:
+            return
+        selected = self.selected_profile_name()
+        self.profile_model.set_rows(self.profile_index.search(self.profile_search.text()))
+        if selected:
+            self.profile_list.setCurrentIndex(self.profile_model.find_name(selected))
+
+    def selected_profile_name(self):
+        index = self.profile_list.currentIndex()
+        return index.data(Qt.ItemDataRole.UserRole) if index.isValid() else None
 
     def load_selected_profile(self):
-        selected = self.profile_list.currentItem()
+        selected = self.selected_profile_name()
         if selected:
-            profile = profile_manager.load_profile(selected.text())
+            profile = profile_manager.load_profile(selected)
             if profile:
+                self.current_profile = selected
+                import warm_pool
+                pool = self.pools.get(selected)
+                for spin, value in ((self.pool_size_spin, pool.size if pool else 0),
+                                    (self.pool_boot_spin, pool.boot_seconds if pool else warm_pool.BOOT_SECONDS),
+                                    (self.pool_idle_spin, pool.max_idle or 0 if pool else 0)):
+                    spin.blockSignals(True)
+                    spin.setValue(int(value))
+                    spin.blockSignals(False)
+                self.update_pool_status()
                 self.disk_input.setText(profile.get("disk", ""))
                 self.iso_input.setText(profile.get("iso", ""))
                 self.ram_input.setText(profile.get("ram", "1024"))
                 self.cpu_input.setText(profile.get("cpu", "2"))
+                self.set_combo(self.cpu_policy_combo, profile.get("cpu_policy", cpu_placement.NONE))
+                self.set_combo(self.mem_backend_combo, profile.get("mem_backend", memory_backend.DEFAULT))
+                hugepages = profile.get("hugepages", "")
+                if hugepages in memory_backend.HUGEPAGE_SIZES:
+                    self.hugepages_combo.setCurrentIndex(memory_backend.HUGEPAGE_SIZES.index(hugepages))
+                self.mem_prealloc_checkbox.setChecked(profile.get("mem_prealloc", False))
+                self.host_nodes_input.setText(profile.get("host_nodes", ""))
+                self.set_combo(self.mem_policy_combo, profile.get("mem_policy", "bind"))
+                self.mem_path_input.setText(profile.get("mem_path", ""))
                 self.machine_input.setText(profile.get("machine", ""))
                 vga = profile.get("vga", "none")
                 index = self.vga_combo.findText(vga)
@@ -501,12 +618,23 @@ class QemuLauncher(QWidget):
                 index = self.arch_combo.findText(arch)
                 if index != -1:
                     self.arch_combo.setCurrentIndex(index)
-                net = profile.get("net", "user (NAT)")
+                net = network.backend(profile)
                 index = self.net_combo.findText(net)
                 if index != -1:
                     self.net_combo.setCurrentIndex(index)
+                self.set_combo(self.net_model_combo, profile.get("net_model", network.AUTO))
+                self.net_vhost_checkbox.setChecked(profile.get("net_vhost", True))
+                self.net_queues_input.setText(str(profile.get("net_queues", network.AUTO)))
+                self.net_bridge_input.setText(profile.get("net_bridge", "br0"))
+                self.net_tap_input.setText(profile.get("net_tap", ""))
+                self.net_hostfwd_input.setText(profile.get("net_hostfwd", ""))
                 self.snapshot_checkbox.setChecked(profile.get("snapshot", False))
-                self.log_output.append(f"Profilo '{selected.text()}' caricato.\n")
+                self.overlay_dir_combo.setCurrentText(profile.get("overlay_dir", ""))
+                self.serial_console_checkbox.setChecked(profile.get("serial_console", False))
+                self.serial_log_checkbox.setChecked(profile.get("serial_log", True))
+                self.hmp_monitor_checkbox.setChecked(profile.get("hmp_monitor", False))
+                self.boot_milestones_input.setText(profile.get("boot_milestones", ""))
+                self.log_output.append(f"Profilo '{selected}' caricato.\n")
                 input_type = profile.get("input", "No input")
                 index = self.input_combo.findText(input_type)
                 if index != -1:
@@ -519,44 +647,58 @@ class QemuLauncher(QWidget):
                 index = self.disk_type_combo.findText(disk_type)
                 if index != -1:
                     self.disk_type_combo.setCurrentIndex(index)
-                accel = profile.get("accel", "tcg")
+                self.set_combo(self.disk_cache_combo, profile.get("disk_cache", disk_options.AUTO))
+                self.set_combo(self.disk_aio_combo, profile.get("disk_aio", disk_options.AUTO))
+                self.disk_iothread_checkbox.setChecked(profile.get("disk_iothread", True))
+                self.disk_discard_checkbox.setChecked(profile.get("disk_discard", True))
+                accel = profile.get("accel", host_accel.AUTO)
                 index = self.accel_combo.findText(accel)
                 if index != -1:
                     self.accel_combo.setCurrentIndex(index)
 
     def delete_selected_profile(self):
-        selected = self.profile_list.currentItem()
+        selected = self.selected_profile_name()
         if selected:
             reply = QMessageBox.question(self, "Delete Confirm",
-                                         f"Delete Profile '{selected.text()}'?",
+                                         f"Delete Profile '{selected}'?",
                                          QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.Yes:
-                profile_manager.delete_profile(selected.text())
+                profile_manager.delete_profile(selected)
                 self.refresh_profiles()
-                self.log_output.append(f"Profile '{selected.text()}' deleted.\n")
+                self.log_output.append(f"Profile '{selected}' deleted.\n")
+
+    def clone_selected_profile(self):
+        selected = self.selected_profile_name()
+        if not selected:
+            return
+        name, ok = QInputDialog.getText(self, "Clone Profile", "Clone name:", text=selected[:-5] + "-clone")
+        if not ok or not name.strip():
+            return
+        count, ok = QInputDialog.getInt(self, "Clone Profile", "Number of linked clones:", 1, 1, 500)
+        if not ok:
+            return
+        names = overlays.clone_names(name.strip(), count)
+        existing = [n for n in names if profile_manager.load_profile(n + ".json") is not None]
+        if existing:
+            QMessageBox.warning(self, "Cannot clone profile", f"Profile '{existing[0]}' already exists")
+            return
+        try:
+            clones = overlays.clone_profile(profile_manager.load_profile(selected), name.strip(), count,
+                                            paths=self.qemu_paths)
+        except (vm_command.LaunchError, OSError) as e:
+            QMessageBox.warning(self, "Cannot clone profile", str(e))
+            return
+        for clone, profile in clones:
+            profile_manager.save_profile(clone + ".json", profile)
+        self.refresh_profiles()
+        self.log_output.append(f"{len(clones)} linked clone(s) of '{selected}' created in {overlays.CLONE_DIR}\n")
 
     def save_as_profile(self):
         name, _ = QFileDialog.getSaveFileName(self, "Save Profile", filter="JSON (*.json)")
         if name:
             if not name.endswith(".json"):
                 name += ".json"
-            config = {
-                "disk": self.disk_input.text(),
-                "iso": self.iso_input.text(),
-                "ram": self.ram_input.text(),
-                "cpu": self.cpu_input.text(),
-                "arch": self.arch_combo.currentText(),
-                "input": self.input_combo.currentText(),
-                "usb_bus": self.usb_bus_combo.currentText(),
-                "accel": self.accel_combo.currentText(),
-                "disk_type": self.disk_type_combo.currentText(),
-                "vga": self.vga_combo.currentText(),
-                "net": self.net_combo.currentText(),
-                "machine": self.machine_input.text(),
-                "cpu_model": self.cpu_model_input.text(),
-                "bios": self.bios_input.text(),
-                "snapshot": self.snapshot_checkbox.isChecked()
-            }
+            config = self.current_config()
             profile_manager.save_profile(name.split("/")[-1], config)
             self.refresh_profiles()
             self.log_output.append(f"Profile saved as: {name}\n")
@@ -566,93 +708,331 @@ class QemuLauncher(QWidget):
         if file_path:
             self.disk_input.setText(file_path)
 
+    def select_library_image(self, kind, path):
+        import image_library
+        if kind == image_library.ISO:
+            self.iso_input.setText(path)
+        else:
+            self.disk_input.setText(path)
+
     def browse_iso(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select ISO Image")
         if file_path:
             self.iso_input.setText(file_path)
 
-    def launch_vm(self):
-        disk = self.disk_input.text()
-        iso = self.iso_input.text()
-        ram = self.ram_input.text()
-        cpu = self.cpu_input.text()
-        net = self.net_combo.currentText()
-        snapshot = self.snapshot_checkbox.isChecked()
-        machine = self.machine_input.text()
-        cpu_model = self.cpu_model_input.text()
-        bios = self.bios_input.text()
-        disk_type = self.disk_type_combo.currentText()
+    def current_config(self):
+        return {
+            "disk": self.disk_input.text(),
+            "iso": self.iso_input.text(),
+            "ram": self.ram_input.text(),
+            "cpu": self.cpu_input.text(),
+            "arch": self.arch_combo.currentText(),
+            "input": self.input_combo.currentText(),
+            "usb_bus": self.usb_bus_combo.currentText(),
+            "accel": self.accel_combo.currentText(),
+            "disk_type": self.disk_type_combo.currentText(),
+            "disk_cache": self.disk_cache_combo.currentText(),
+            "disk_aio": self.disk_aio_combo.currentText(),
+            "disk_iothread": self.disk_iothread_checkbox.isChecked(),
+            "disk_discard": self.disk_discard_checkbox.isChecked(),
+            "vga": self.vga_combo.currentText(),
+            "net": self.net_combo.currentText(),
+            "net_model": self.net_model_combo.currentText(),
+            "net_vhost": self.net_vhost_checkbox.isChecked(),
+            "net_queues": self.net_queues_input.text().strip() or network.AUTO,
+            "net_bridge": self.net_bridge_input.text().strip(),
+            "net_tap": self.net_tap_input.text().strip(),
+            "net_hostfwd": self.net_hostfwd_input.text(),
+            "machine": self.machine_input.text(),
+            "cpu_model": self.cpu_model_input.text(),
+            "bios": self.bios_input.text(),
+            "snapshot": self.snapshot_checkbox.isChecked(),
+            "overlay_dir": self.overlay_dir_combo.currentText().strip(),
+            "serial_console": self.serial_console_checkbox.isChecked(),
+            "serial_log": self.serial_log_checkbox.isChecked(),
+            "hmp_monitor": self.hmp_monitor_checkbox.isChecked(),
+            "boot_milestones": self.boot_milestones_input.text().strip(),
+            "cpu_policy": self.cpu_policy_combo.currentText(),
+            "mem_backend": self.mem_backend_combo.currentText(),
+            "hugepages": memory_backend.HUGEPAGE_SIZES[self.hugepages_combo.currentIndex()],
+            "mem_prealloc": self.mem_prealloc_checkbox.isChecked(),
+            "host_nodes": self.host_nodes_input.text(),
+            "mem_policy": self.mem_policy_combo.currentText(),
+            "mem_path": self.mem_path_input.text()
+        }
 
+    def update_net_fields(self):
+        mode = network.backend({"net": self.net_combo.currentText()})
+        self.net_model_combo.setEnabled(mode != network.NONE)
+        self.net_vhost_checkbox.setVisible(mode == network.TAP)
+        self.net_queues_input.setVisible(mode == network.TAP)
+        self.net_tap_input.setVisible(mode == network.TAP)
+        self.net_bridge_input.setVisible(mode == network.BRIDGE)
+        self.net_hostfwd_input.setVisible(mode == network.USER)
 
-        
-        arch_map = {
-            "x86_64": "qemu-system-x86_64",
-            "aarch64": "qemu-system-aarch64",
-            "arm": "qemu-system-arm",
-            "riscv64": "qemu-system-riscv64"
-        }
-        arch_label = self.arch_combo.currentText().split()[0]
-        qemu_bin = arch_map.get(arch_label, "qemu-system-x86_64")
+    def launch_name(self):
+        return self.current_profile or vm_command.arch_key(self.arch_combo.currentText())
 
-        cmd = [qemu_bin, "-m", ram, "-smp", cpu]
-        accel = self.accel_combo.currentText()
-        if accel:
-            cmd += ["-accel", accel]
-        usb_bus = self.usb_bus_combo.currentText()
-        if "usb-uhci" in usb_bus:
-            cmd += ["-device", "usb-uhci"]
-        elif "usb-ehci" in usb_bus:
-            cmd += ["-device", "usb-ehci"]
-        elif "qemu-xhci" in usb_bus:
-            cmd += ["-device", "qemu-xhci"]
-        input_option = self.input_combo.currentText()
-        if "usb-kbd" in input_option:
-            cmd += ["-device", "usb-kbd"]
-        if "usb-mouse" in input_option:
-            cmd += ["-device", "usb-mouse"]
-        if "usb-tablet" in input_option:
-            cmd += ["-device", "usb-tablet"]
-        vga_type = self.vga_combo.currentText()
-        if vga_type != "none":
-            cmd += ["-device", vga_type]
-        if machine:
-            cmd += ["-machine", machine]
-        if cpu_model:
-            cmd += ["-cpu", cpu_model]
-        if bios:
-            cmd += ["-bios", bios]
-        if disk:
-            cmd += ["-hda", disk]
-        if iso:
-            cmd += ["-cdrom", iso, "-boot", "d"]
-        if "user" in net:
-            cmd += ["-net", "nic", "-net", "user"]
+    def launch_vm(self):
+        import admission
+        import vm_state
+        name = self.launch_name()
+        # Un profilo sospeso riparte dal file di stato invece di fare il boot
+        state = vm_state.saved_state(self.current_profile) if self.current_profile else None
+        pool = self.pools.get(name)
+        if pool and pool.size and not state:
+            try:
+                vm, hit = pool.handout(wait=False)
+            except vm_command.LaunchError as e:
+                QMessageBox.warning(self, "Cannot launch VM", str(e))
+                return
+            vm.console.write("Warm pool hit: resumed a paused VM\n" if hit else "Warm pool miss: cold boot\n")
+            self.update_pool_status()
+            self.vm_list.setCurrentItem(self.vm_item(vm))
+            return
+        warnings = []
+        try:
+            vm = self.supervisor.launch(name, self.current_config(), self.qemu_paths, warnings, restore=state)
+        except admission.Deferred as e:
+            # Parte da solo quando l'host ha posto (update_resources)
+            self.supervisor.enqueue(name, self.current_config(), self.qemu_paths, restore=state)
+            self.log_output.append(f"{name}: queued. {e}\n")
+            return
+        except vm_command.LaunchError as e:
+            QMessageBox.warning(self, "Cannot launch VM", str(e))
+            return
+        for warning in warnings:
+            vm.console.write(f"WARNING: {warning}\n")
+        if state:
+            vm.console.write(f"Resuming from saved state {state['file']}\n")
+        vm.console.write(f"Launch VM with command:\n{' '.join(vm.cmd)}\n")
+        vm.console.write(f"Logs in {vm.logs.directory}\n")
+        self.vm_list.setCurrentItem(self.vm_item(vm))
+
+    def launch_fleet(self):
+        import fleet
+        path, _ = QFileDialog.getOpenFileName(self, "Fleet Manifest", filter="Manifest (*.json *.yaml *.yml)")
+        if not path:
+            return
+        if self.fleet is not None and not self.fleet.done():
+            QMessageBox.warning(self, "Launch Fleet", "A fleet is still starting")
+            return
+        try:
+            self.fleet = fleet.Fleet(fleet.load_manifest(path), self.spawn_fleet_vm)
+        except (OSError, ValueError, fleet.ManifestError) as e:
+            QMessageBox.warning(self, "Invalid manifest", str(e))
+            return
+        self.log_output.append(f"Fleet {path}: {len(self.fleet.instances)} VM(s), "
+                               f"{self.fleet.concurrency} at a time, {self.fleet.stagger}s apart\n")
+        self.fleet_timer = QTimer(self)
+        self.fleet_timer.setInterval(200)
+        self.fleet_timer.timeout.connect(self.step_fleet)
+        self.fleet_timer.start()
+
+    def spawn_fleet_vm(self, name, config):
+        return self.supervisor.launch(name, config, self.qemu_paths)
+
+    def step_fleet(self):
+        import fleet
+        for event in self.fleet.step():
+            self.log_output.append(f"Fleet: {event}")
+        if self.fleet.done():
+            self.fleet_timer.stop()
+            ready = sum(1 for inst in self.fleet.instances if inst.state == fleet.READY)
+            self.log_output.append(f"Fleet done: {ready}/{len(self.fleet.instances)} ready\n")
+
+    def spawn_pool_vm(self, pool):
+        return self.supervisor.launch(pool.name, pool.config, self.qemu_paths)
+
+    def resize_pool(self, size):
+        import warm_pool
+        name = self.launch_name()
+        pool = self.pools.get(name)
+        if pool is None:
+            if not size:
+                return
+            pool = warm_pool.WarmPool(name, self.current_config())
+            pool.spawn = lambda: self.spawn_pool_vm(pool)
+            self.pools[name] = pool
         else:
-            cmd += ["-net", "nic", "-net", "bridge"]
-        if disk:
-            if disk_type == "virtio-blk":
-                cmd += ["-drive", f"file={disk},if=none,id=vdisk"]
-                cmd += ["-device", "virtio-blk-pci,drive=vdisk"]
-            elif disk_type == "usb-storage":
-                cmd += ["-drive", f"file={disk},if=none,id=vdisk"]
-                cmd += ["-device", "usb-storage,drive=vdisk"]
+            # Le nuove istanze usano la configurazione corrente
+            pool.config = dict(self.current_config(), snapshot=True)
+        self.set_pool_limits()
+        pool.resize(size)
+        if not self.pool_timer.isActive():
+            self.pool_timer.start()
+        self.update_pool_status()
+
+    def set_pool_limits(self):
+        pool = self.pools.get(self.launch_name())
+        if pool is not None:
+            pool.boot_seconds = self.pool_boot_spin.value()
+            pool.max_idle = self.pool_idle_spin.value() or None
+
+    def maintain_pools(self):
+        for pool in self.pools.values():
+            pool.maintain()
+        self.update_pool_status()
+
+    def update_pool_status(self):
+        pool = self.pools.get(self.launch_name())
+        if pool is None:
+            self.pool_status.clear()
+            return
+        stats = pool.stats()
+        self.pool_status.setText(f"{stats['ready']} ready, {stats['booting']} booting | "
+                                 f"hits {stats['hits']}, misses {stats['misses']}, evicted {stats['evictions']}")
+
+    def set_admission_mode(self, mode):
+        import admission
+        policy = admission.load_policy()
+        policy["mode"] = mode
+        admission.save_policy(policy)
+        if self.supervisor.ledger is not None:
+            self.supervisor.ledger.policy = policy
+
+    def update_resources(self):
+        import admission
+        for name, result in self.supervisor.launch_queued():
+            if isinstance(result, vm_command.LaunchError):
+                self.log_output.append(f"{name}: queued launch failed. {result}\n")
             else:
-                cmd += ["-drive", f"file={disk},if={disk_type}"]
-
-
-        if snapshot:
-            cmd.append("-snapshot")
-
-        self.log_output.append(f"Launch VM with command:\n{' '.join(cmd)}\n")
-
-        self.process = QProcess(self)
-        self.process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
-        self.process.readyReadStandardOutput.connect(self.read_output)
-        self.process.start(cmd[0], cmd[1:])
-
-    def read_output(self):
-        output = self.process.readAllStandardOutput().data().decode()
-        self.log_output.append(output)
+                result.console.write(f"Launched from the admission queue:\n{' '.join(result.cmd)}\n")
+        if self.supervisor.ledger is None:
+            self.supervisor.ledger = admission.Ledger(vm_command.runtime_path("admission.json"))
+        text = admission.describe(self.supervisor.ledger.status())
+        if self.supervisor.queued:
+            text += f", {len(self.supervisor.queued)} queued"
+        self.resource_status.setText(text)
+
+    def vm_item(self, vm):
+        for row in range(self.vm_list.count()):
+            item = self.vm_list.item(row)
+            if item.data(Qt.ItemDataRole.UserRole) == vm.vm_id:
+                return item
+        return None
+
+    def selected_vm(self):
+        item = self.vm_list.currentItem()
+        if item is None:
+            return None
+        return self.supervisor.get(item.data(Qt.ItemDataRole.UserRole))
+
+    def on_vm_added(self, vm):
+        item = QListWidgetItem(vm.label())
+        item.setData(Qt.ItemDataRole.UserRole, vm.vm_id)
+        self.vm_list.addItem(item)
+        vm.output_received.connect(self.read_output)
+
+    def on_vm_changed(self, vm):
+        item = self.vm_item(vm)
+        if item:
+            item.setText(vm.label())
+
+    def on_vm_removed(self, vm):
+        item = self.vm_item(vm)
+        if item:
+            self.vm_list.takeItem(self.vm_list.row(item))
+
+    def on_vm_selected(self, current, previous):
+        vm = self.selected_vm()
+        self.log_output.setPlainText(vm.console.text() if vm else "")
+        self.console_pos = vm.console.written if vm else 0
+        self.dashboard.show_vm(vm.vm_id if vm else None)
+        self.log_output.moveCursor(QTextCursor.MoveOperation.End)
+
+    def pause_selected_vm(self):
+        vm = self.selected_vm()
+        if vm:
+            if vm.state == vm_supervisor.PAUSED:
+                vm.resume()
+            else:
+                vm.pause()
+
+    def suspend_selected_vm(self):
+        vm = self.selected_vm()
+        if vm:
+            self.supervisor.suspend(vm)
+
+    def migrate_selected_vm(self):
+        # Nuovo QEMU con la stessa configurazione (eventualmente su un altro nodo NUMA o
+        # binario), poi migrazione live; l'avanzamento va nella console della sorgente
+        vm = self.selected_vm()
+        if vm is None:
+            return
+        from migrate_dialog import MigrateDialog
+        dialog = MigrateDialog(vm.label(), self)
+        if not dialog.exec():
+            return
+        try:
+            self.supervisor.migrate(vm, dialog.options())
+        except vm_command.LaunchError as e:
+            QMessageBox.warning(self, "Cannot migrate VM", str(e))
+
+    def toggle_serial_console(self):
+        # Aggancia/stacca solo la console: la seriale continua ad andare nel log
+        vm = self.selected_vm()
+        if vm is None:
+            return
+        if vm.serial_attached:
+            vm.detach_serial()
+            vm.log("Serial console detached\n")
+        elif vm.attach_serial():
+            vm.log("Serial console attached\n")
+        else:
+            vm.log("This VM has no serial log stream\n")
+
+    def open_log_viewer(self):
+        # Log della VM selezionata, o un file qualunque se non ce n'e' una
+        import log_viewer
+        import serial_log
+        vm = self.selected_vm()
+        if vm and vm.logs:
+            path = log_viewer.default_log(vm.logs)
+        else:
+            path, _ = QFileDialog.getOpenFileName(self, "Open Log", serial_log.LOG_DIR,
+                                                  "Logs (*.log *.log.* *.txt);;All files (*)")
+            if not path:
+                return
+        viewer = log_viewer.LogViewer(path, self)
+        viewer.show()
+
+    def stop_selected_vm(self):
+        vm = self.selected_vm()
+        if vm:
+            vm.stop()
+
+    def kill_selected_vm(self):
+        vm = self.selected_vm()
+        if vm:
+            vm.kill()
+
+    def closeEvent(self, event):
+        for pool in self.pools.values():
+            pool.shutdown()
+        self.supervisor.shutdown()
+        super().closeEvent(event)
+
+    def read_output(self, vm):
+        # Il flush verso il widget avviene dal timer, non da readyRead
+        if vm is self.selected_vm() and not self.console_timer.isActive():
+            self.console_timer.start()
+
+    def flush_console(self):
+        vm = self.selected_vm()
+        text = ""
+        if vm:
+            text, self.console_pos = vm.console.read_since(self.console_pos)
+        if not text:
+            self.console_timer.stop()
+            return
+        scrollbar = self.log_output.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
+        cursor = QTextCursor(self.log_output.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
     def browse_bios(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select BIOS file")
         if file_path:
@@ -663,9 +1043,14 @@ class QemuLauncher(QWidget):
 
         # Pulsanti principali
         self.launch_button.setText(self.translations["launch_vm"])
+        self.pool_label.setText(self.translations["warm_pool"])
+        self.pool_boot_label.setText(self.translations["pool_boot"])
+        self.pool_idle_label.setText(self.translations["pool_idle"])
+        self.admission_label.setText(self.translations["admission"])
         self.save_button.setText(self.translations["save_profile"])
         self.load_button.setText(self.translations["load_profile"])
         self.delete_button.setText(self.translations["delete_profile"])
+        self.clone_button.setText(self.translations["clone_profile"])
 
         # Etichette dei campi
         self.profile_label.setText(self.translations["profile_label"])
@@ -682,11 +1067,29 @@ class QemuLauncher(QWidget):
         self.input_label.setText(self.translations["input"])
         self.usb_bus_label.setText(self.translations["usb_bus"])
         self.disk_type_label.setText(self.translations["disk_type"])
+        self.disk_io_label.setText(self.translations["disk_io"])
         self.accel_label.setText(self.translations["accel"])
+        self.cpu_policy_label.setText(self.translations["cpu_policy"])
+        self.memory_label.setText(self.translations["memory_backend"])
         self.network_label.setText(self.translations["network"])
         self.snapshot_checkbox.setText(self.translations["snapshot"])
+        self.serial_console_checkbox.setText(self.translations["serial_console"])
+        self.serial_log_checkbox.setText(self.translations["serial_log"])
+        self.hmp_monitor_checkbox.setText(self.translations["hmp_monitor"])
+        self.serial_button.setText(self.translations["serial_attach"])
+        self.log_viewer_button.setText(self.translations["log_viewer"])
+        if self.library_panel is not None:
+            self.library_panel.title_label.setText(self.translations["image_library"])
         self.console_label.setText(self.translations["console_output"])
         self.config_button.setText(self.translations["configure_binaries"])
+        self.fleet_button.setText(self.translations["launch_fleet"])
+        self.vm_list_label.setText(self.translations["running_vms"])
+        self.pause_button.setText(self.translations["pause_vm"])
+        self.stop_button.setText(self.translations["stop_vm"])
+        self.kill_button.setText(self.translations["kill_vm"])
+        self.suspend_button.setText(self.translations["suspend_vm"])
+        self.migrate_button.setText(self.translations["migrate_vm"])
+        self.clear_vms_button.setText(self.translations["clear_vms"])
 
         # Menu
         self.info_menu.setTitle("Info")
@@ -0,0 +1,134 @@
+import json
+import asyncio
+import itertools
+import threading
+
+
+class QMPError(Exception):
+    pass
+
+
+class QMPClient:
+    def __init__(self, path):
+        self.path = path
+        self.reader = None
+        self.writer = None
+        self.greeting = None
+        self.event_handlers = []
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._read_task = None
+        self._eof = False
+
+    @property
+    def connected(self):
+        return self.writer is not None and not self._eof and not self.writer.is_closing()
+
+    async def connect(self, timeout=5.0):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_unix_connection(self.path, limit=1 << 24), timeout)
+        self.greeting = json.loads(await asyncio.wait_for(self.reader.readline(), timeout))
+        self._read_task = asyncio.get_running_loop().create_task(self._read_loop())
+        await self.execute("qmp_capabilities", timeout=timeout)
+        return self
+
+    async def _read_loop(self):
+        error = QMPError("QMP connection closed")
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if "event" in message:
+                    for handler in list(self.event_handlers):
+                        handler(message)
+                    continue
+                future = self._pending.pop(message.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(QMPError(message["error"].get("desc", "QMP error")))
+                else:
+                    future.set_result(message.get("return"))
+        except (ConnectionError, ValueError) as e:
+            error = QMPError(str(e))
+        finally:
+            self._eof = True
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    async def execute(self, command, arguments=None, timeout=10.0):
+        if not self.connected:
+            raise QMPError("QMP not connected")
+        msg_id = next(self._ids)
+        message = {"execute": command, "id": msg_id}
+        if arguments:
+            message["arguments"] = arguments
+        future = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = future
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        await self.writer.drain()
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(msg_id, None)
+
+    async def close(self):
+        if self._read_task:
+            self._read_task.cancel()
+            self._read_task = None
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self.writer = None
+
+
+class QMPLoop:
+    # Un solo event loop asyncio in un thread di background per tutte le VM
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="qmp-loop", daemon=True)
+        self.thread.start()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        return self.submit(coro).result(timeout)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(1.0)
+
+
+_shared_loop = None
+_shared_lock = threading.Lock()
+
+
+def shared_loop():
+    global _shared_loop
+    with _shared_lock:
+        if _shared_loop is None:
+            _shared_loop = QMPLoop()
+        return _shared_loop
+
+
+async def execute_once(path, command, arguments=None, timeout=10.0):
+    client = QMPClient(path)
+    try:
+        await client.connect(timeout)
+        return await client.execute(command, arguments, timeout)
+    finally:
+        await client.close()
+
+
+def submit(path, command, arguments=None, timeout=10.0):
+    # Comando singolo dal thread della GUI: ritorna un concurrent.futures.Future
+    return shared_loop().submit(execute_once(path, command, arguments, timeout))
@@ -0,0 +1,340 @@
+import os
+import time
+import atexit
+import shutil
+import asyncio
+import threading
+import overlays
+import qmp_client
+import vm_command
+from state_file import pid_alive
+
+# Seriale del guest (e monitor HMP) su socket chardev. Il launcher e' in ascolto
+# prima di avviare QEMU, che si collega come client: nessun byte perso all'avvio e
+# nessuna attesa se il launcher e' lento. I byte vanno in log a rotazione per VM
+# (logs/<profilo>/<avvio>/serial.log) scritti a blocchi da un thread a parte; chi
+# guarda (la GUI) legge da un Tap limitato che scarta i byte piu' vecchi se resta
+# indietro. Il socket si legge sempre alla velocita' del guest.
+
+LOG_DIR = "logs"
+# Avvii conservati per profilo, oltre a quelli ancora in corso
+KEEP_RUNS = 20
+# Nella cartella di un avvio aperto: pid del launcher, tolto da VMLogs.close
+LIVE_FILE = ".live"
+MAX_BYTES = 16 << 20
+BACKUPS = 3
+FLUSH_BYTES = 256 << 10
+FLUSH_SECONDS = 1.0
+# Con il disco fermo oltre questa soglia si perdono i byte piu' vecchi invece di crescere
+MAX_PENDING = 8 << 20
+TAP_BYTES = 1 << 20
+READ_SIZE = 1 << 16
+# Dopo l'uscita di QEMU: attesa di una connessione ancora in coda
+STOP_GRACE = 0.5
+
+
+def live(path):
+    try:
+        with open(os.path.join(path, LIVE_FILE), "r") as f:
+            return pid_alive(int(f.read().strip()))
+    except (OSError, ValueError):
+        return False
+
+
+def run_dir(name, key):
+    # Si potano solo gli avvii chiusi (o di launcher morti): un pool o una flotta
+    # dello stesso profilo puo' avere piu' di KEEP_RUNS VM accese
+    base = os.path.join(LOG_DIR, overlays.safe_name(os.path.splitext(name)[0]))
+    os.makedirs(base, exist_ok=True)
+    runs = [run for run in sorted(os.listdir(base)) if not live(os.path.join(base, run))]
+    for old in runs[:max(0, len(runs) - KEEP_RUNS + 1)]:
+        shutil.rmtree(os.path.join(base, old), ignore_errors=True)
+    path = os.path.join(base, f"{time.strftime('%Y%m%d-%H%M%S')}-{key}")
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, LIVE_FILE), "w") as f:
+        f.write(str(os.getpid()))
+    return path
+
+
+def socket_paths(config, key, create=True):
+    # Argomenti serial_socket/monitor_socket di vm_command.build_command
+    config = vm_command.from_profile(config)
+    return {
+        "serial_socket": vm_command.runtime_path(f"{key}.serial", create) if config["serial_log"] else None,
+        "monitor_socket": vm_command.runtime_path(f"{key}.monitor", create) if config["hmp_monitor"] else None
+    }
+
+
+class LogWriter:
+    # Un thread per tutti i log: flush ogni FLUSH_SECONDS o appena un buffer supera FLUSH_BYTES
+
+    def __init__(self):
+        self.logs = set()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+
+    def add(self, log):
+        with self.lock:
+            self.logs.add(log)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="serial-log", daemon=True)
+                self.thread.start()
+
+    def remove(self, log):
+        with self.lock:
+            self.logs.discard(log)
+
+    def run(self):
+        while True:
+            self.wake.wait(FLUSH_SECONDS)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            logs = list(self.logs)
+        for log in logs:
+            log.flush()
+
+
+_writer = LogWriter()
+atexit.register(_writer.flush)
+
+
+class RotatingLog:
+    # write() non tocca il disco: accoda e basta, da qualunque thread
+
+    def __init__(self, path, max_bytes=MAX_BYTES, backups=BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.pending = bytearray()
+        self.lost = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        # Un solo flush alla volta (thread di scrittura o close)
+        self.io_lock = threading.Lock()
+        self.file = None
+        self.size = 0
+        _writer.add(self)
+
+    def write(self, data):
+        with self.lock:
+            if self.closed:
+                return
+            self.pending += data
+            if len(self.pending) > MAX_PENDING:
+                excess = len(self.pending) - MAX_PENDING
+                del self.pending[:excess]
+                self.lost += excess
+            full = len(self.pending) >= FLUSH_BYTES
+        if full:
+            _writer.wake.set()
+
+    def flush(self):
+        with self.io_lock:
+            with self.lock:
+                data, self.pending = self.pending, bytearray()
+                lost, self.lost = self.lost, 0
+            if lost:
+                data[:0] = f"\n[{lost} bytes lost: log writes fell behind]\n".encode()
+            if not data:
+                return
+            try:
+                if self.file is None:
+                    self.file = open(self.path, "ab", buffering=0)
+                    self.size = os.fstat(self.file.fileno()).st_size
+                if self.size and self.size + len(data) > self.max_bytes:
+                    self.rotate()
+                self.file.write(data)
+                self.size += len(data)
+            except OSError:
+                # Disco pieno o cartella rimossa: si perde il log, non la VM
+                pass
+
+    def rotate(self):
+        self.file.close()
+        self.file = None
+        if self.backups:
+            for n in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{n}"):
+                    os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, "ab", buffering=0)
+        self.size = 0
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+        _writer.remove(self)
+        self.flush()
+        with self.io_lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class Tap:
+    # Copia limitata dello stream per un lettore: notify() solo quando passa da vuoto a
+    # non vuoto (dal thread del loop), drain() dal thread del lettore
+
+    def __init__(self, notify=None, max_bytes=TAP_BYTES):
+        self.notify = notify
+        self.max_bytes = max_bytes
+        self.buffer = bytearray()
+        self.skipped = 0
+        self.lock = threading.Lock()
+
+    def push(self, data):
+        with self.lock:
+            empty = not self.buffer
+            self.buffer += data
+            if len(self.buffer) > self.max_bytes:
+                excess = len(self.buffer) - self.max_bytes
+                del self.buffer[:excess]
+                self.skipped += excess
+        if empty and self.notify:
+            self.notify()
+
+    def drain(self):
+        # -> (byte, byte scartati perche' il lettore era indietro)
+        with self.lock:
+            data, self.buffer = bytes(self.buffer), bytearray()
+            skipped, self.skipped = self.skipped, 0
+        return data, skipped
+
+
+class SerialStream:
+    # Socket di una porta chardev (seriale o monitor) di una VM: un solo client, QEMU
+
+    def __init__(self, path, log_path):
+        self.path = path
+        self.log = RotatingLog(log_path)
+        self.taps = []
+        self.lock = threading.Lock()
+        self.loop = qmp_client.shared_loop()
+        self.server = None
+        self.connected = False
+        self.received = 0
+        self.finished = threading.Event()
+
+    def listen(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        try:
+            self.server = self.loop.run(self._listen())
+        except OSError as e:
+            self.log.close()
+            raise vm_command.LaunchError(f"Cannot create chardev socket {self.path}: {e.strerror}")
+        return self
+
+    async def _listen(self):
+        return await asyncio.start_unix_server(self.on_connect, self.path)
+
+    async def on_connect(self, reader, writer):
+        if self.connected:
+            writer.close()
+            return
+        self.connected = True
+        self.server.close()
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                self.received += len(data)
+                self.log.write(data)
+                with self.lock:
+                    taps = list(self.taps)
+                for tap in taps:
+                    tap.push(data)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            await self._finish()
+
+    async def _finish(self):
+        if self.finished.is_set():
+            return
+        self.server.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        await asyncio.get_running_loop().run_in_executor(None, self.log.close)
+        self.finished.set()
+
+    async def _stop(self):
+        await asyncio.sleep(STOP_GRACE)
+        if not self.connected:
+            await self._finish()
+
+    def stop(self):
+        # QEMU e' uscito: se si era collegato lo stream finisce da solo all'EOF
+        if self.server is not None and not self.finished.is_set():
+            self.loop.submit(self._stop())
+
+    def attach(self, notify=None, max_bytes=TAP_BYTES):
+        tap = Tap(notify, max_bytes)
+        with self.lock:
+            self.taps.append(tap)
+        return tap
+
+    def detach(self, tap):
+        with self.lock:
+            if tap in self.taps:
+                self.taps.remove(tap)
+
+
+class VMLogs:
+    # Log di un avvio: qemu.log (stdout/stderr di QEMU), serial.log, monitor.log
+
+    def __init__(self, config, name, key):
+        config = vm_command.from_profile(config)
+        self.directory = run_dir(name, key)
+        self.qemu = RotatingLog(os.path.join(self.directory, "qemu.log"))
+        self.serial = self.monitor = None
+        try:
+            sockets = socket_paths(config, key)
+            if sockets["serial_socket"]:
+                self.serial = SerialStream(sockets["serial_socket"], self.port_log("serial")).listen()
+            if sockets["monitor_socket"]:
+                self.monitor = SerialStream(sockets["monitor_socket"], self.port_log("monitor")).listen()
+        except vm_command.LaunchError:
+            self.close()
+            raise
+
+    def port_log(self, port):
+        return os.path.join(self.directory, f"{port}.log")
+
+    def sockets(self):
+        return {"serial_socket": self.serial.path if self.serial else None,
+                "monitor_socket": self.monitor.path if self.monitor else None}
+
+    def close(self, wait=0):
+        # wait: secondi concessi agli stream per svuotare i socket (CLI prima di uscire)
+        self.qemu.close()
+        streams = [stream for stream in (self.serial, self.monitor) if stream]
+        for stream in streams:
+            stream.stop()
+        deadline = time.monotonic() + wait
+        for stream in streams:
+            stream.finished.wait(max(0.0, deadline - time.monotonic()))
+        if all(stream.finished.is_set() for stream in streams):
+            self.release()
+        else:
+            # Gli stream finiscono all'EOF del socket: fino ad allora la cartella non si pota
+            qmp_client.shared_loop().submit(self._release_when_finished(streams))
+
+    async def _release_when_finished(self, streams):
+        for stream in streams:
+            await asyncio.get_running_loop().run_in_executor(None, stream.finished.wait)
+        self.release()
+
+    def release(self):
+        try:
+            os.remove(os.path.join(self.directory, LIVE_FILE))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,33 @@
+import os
+import json
+
+# File JSON condivisi tra i processi del launcher (GUI e CLI), protetti da flock.
+# Ogni voce ha il "pid" del processo che la possiede: quelle dei processi morti
+# vengono scartate a ogni accesso.
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def update(path, fn):
+    import fcntl
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, "r+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            state = json.loads(f.read() or "{}")
+        except ValueError:
+            state = {}
+        state = {key: entry for key, entry in state.items() if pid_alive(entry["pid"])}
+        result = fn(state)
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps(state))
+        return result
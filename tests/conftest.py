@@ -0,0 +1,5 @@
+import os
+import sys
+
+# I moduli del launcher stanno nella radice del repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
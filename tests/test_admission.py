@@ -0,0 +1,45 @@
+import os
+import admission
+
+STATUS = {"mem_total_mb": 16384, "mem_available_mb": 8192, "cpus": 4, "psi_memory": 0.0, "psi_cpu": 0.0,
+          "committed_ram_mb": 4096, "committed_vcpus": 2}
+
+
+def status(**changes):
+    return dict(STATUS, **changes)
+
+
+def test_admitted():
+    ram_free, vcpu_free, reasons = admission.decide(2048, 2, status(), admission.DEFAULT_POLICY)
+    # RAM libera: il minimo tra limite di overcommit (16384 - 4096) e MemAvailable meno la riserva
+    assert (ram_free, vcpu_free, reasons) == (8192 - 512, 6, [])
+
+
+def test_overcommitted():
+    policy = dict(admission.DEFAULT_POLICY, ram_overcommit=0.5, vcpu_overcommit=1.0)
+    ram_free, vcpu_free, reasons = admission.decide(8192, 4, status(), policy)
+    assert (ram_free, vcpu_free) == (4096, 2)
+    assert len(reasons) == 2
+    assert reasons[0].startswith("needs 8192 MB RAM, 4096 MB admissible")
+    assert reasons[1].startswith("needs 4 vCPUs, 2 admissible")
+
+
+def test_pressure():
+    _, _, reasons = admission.decide(512, 1, status(psi_memory=25.0, psi_cpu=75.5), admission.DEFAULT_POLICY)
+    assert reasons == ["memory pressure 25.0% > 10.0%", "CPU pressure 75.5% > 60.0%"]
+
+
+def test_requested():
+    assert admission.requested({"ram": " 2048 ", "cpu": "3"}) == (2048, 3)
+    assert admission.requested({"ram": "lots", "cpu": ""}) == (0, 1)
+    assert admission.requested({"ram": "4096", "hugepages": "2M"}) == (0, 2)
+
+
+def test_qemu_pids_only_attached(tmp_path):
+    ledger = admission.Ledger(str(tmp_path / "admission.json"), dict(admission.DEFAULT_POLICY, mode=admission.OFF))
+    ledger.admit("a", {"ram": "64", "cpu": "1"})
+    ledger.admit("b", {"ram": "64", "cpu": "1"})
+    assert ledger.qemu_pids() == {}
+    # Un pid vivo: le voci di processi morti spariscono alla lettura
+    ledger.attach("b", os.getpid())
+    assert ledger.qemu_pids() == {"b": os.getpid()}
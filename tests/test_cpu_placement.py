@@ -0,0 +1,105 @@
+import cpu_placement
+
+
+def topology(nodes=2, cores=4, threads=2):
+    # Un socket per nodo; i fratelli SMT hanno numeri lontani come su Linux
+    cpus = []
+    total = nodes * cores
+    for thread in range(threads):
+        for node in range(nodes):
+            for core in range(cores):
+                cpus.append({"cpu": thread * total + node * cores + core, "package": node,
+                             "core": core, "node": node})
+    return cpus
+
+
+def allocator(tmp_path, **shape):
+    return cpu_placement.PlacementAllocator(str(tmp_path / "placement.json"), topology(**shape))
+
+
+def test_smp_option_follows_host_shape():
+    assert cpu_placement.smp_option(4, topology()) == "4,sockets=1,cores=2,threads=2"
+    assert cpu_placement.smp_option(3, topology()) == "3,sockets=1,cores=3,threads=1"
+    assert cpu_placement.smp_option(16, topology()) == "16,sockets=2,cores=4,threads=2"
+
+
+def test_smp_option_without_smt():
+    assert cpu_placement.smp_option(6, topology(threads=1)) == "6,sockets=2,cores=3,threads=1"
+
+
+def test_dedicated_cpus_are_exclusive(tmp_path):
+    placement = allocator(tmp_path)
+    first = placement.allocate("a", 4, cpu_placement.DEDICATED)
+    second = placement.allocate("b", 4, cpu_placement.DEDICATED)
+    assert len(first) == len(second) == 4
+    assert not set().union(*first) & set().union(*second)
+
+
+def test_dedicated_fails_when_host_is_full(tmp_path):
+    placement = allocator(tmp_path)
+    assert placement.allocate("a", 16, cpu_placement.DEDICATED) is not None
+    assert placement.allocate("b", 1, cpu_placement.DEDICATED) is None
+    placement.release("a")
+    assert placement.allocate("b", 1, cpu_placement.DEDICATED) is not None
+
+
+def test_numa_stays_on_one_node(tmp_path):
+    placement = allocator(tmp_path)
+    assignment = placement.allocate("a", 6, cpu_placement.NUMA)
+    assert placement.node_of(set().union(*assignment)) is not None
+    assert placement.allocate("b", 12, cpu_placement.NUMA) is None
+
+
+def test_node_restricted_allocation(tmp_path):
+    placement = allocator(tmp_path)
+    assignment = placement.allocate("a", 2, cpu_placement.NUMA, node=1)
+    assert placement.node_of(set().union(*assignment)) == 1
+    assert placement.free_per_node() == {0: 8, 1: 6}
+    assert placement.least_loaded_node(2) == 0
+
+
+def test_shared_pool_shrinks_when_cpus_are_dedicated(tmp_path):
+    placement = allocator(tmp_path)
+    shared = placement.allocate("s", 2, cpu_placement.SHARED)
+    assert shared == [set(range(16))] * 2
+    dedicated = set().union(*placement.allocate("d", 4, cpu_placement.DEDICATED))
+    pool = set(placement.usage()["s"]["cpus"])
+    assert not pool & dedicated
+    assert pool | dedicated == set(range(16))
+    placement.release("d")
+    assert set(placement.usage()["s"]["cpus"]) == set(range(16))
+
+
+def test_dedicated_leaves_a_cpu_to_shared_vms(tmp_path):
+    placement = allocator(tmp_path, nodes=1, cores=2, threads=1)
+    placement.allocate("s", 1, cpu_placement.SHARED)
+    assert placement.allocate("d", 2, cpu_placement.DEDICATED) is None
+    assert placement.allocate("d", 1, cpu_placement.DEDICATED) is not None
+    assert placement.allocate("s2", 1, cpu_placement.SHARED) == [{1}]
+
+
+def test_shared_without_free_cpus(tmp_path):
+    placement = allocator(tmp_path, nodes=1, cores=2, threads=1)
+    placement.allocate("d", 2, cpu_placement.DEDICATED)
+    assert placement.allocate("s", 1, cpu_placement.SHARED) is None
+
+
+def test_none_policy(tmp_path):
+    assert allocator(tmp_path).allocate("a", 2, cpu_placement.NONE) is None
+
+
+def test_pin_threads_skips_foreign_threads(monkeypatch):
+    pinned = []
+
+    def setaffinity(tid, cpus):
+        if tid == 2:
+            raise PermissionError(1, "Operation not permitted")
+        if tid == 3:
+            raise ProcessLookupError(3, "No such process")
+        pinned.append(tid)
+    monkeypatch.setattr(cpu_placement.os, "sched_setaffinity", setaffinity)
+    warnings = []
+    cpu_placement.pin_threads([1, 2, 3, 4], [{0}] * 4, warnings)
+    assert pinned == [1, 4]
+    assert warnings == ["Cannot pin vCPU thread 2: permission denied"]
+    cpu_placement.pin_threads([2], [{0}])
@@ -0,0 +1,30 @@
+import disk_options
+
+CAPS = {"devices": {"Storage devices": ["virtio-blk-pci", "virtio-scsi-pci", "scsi-hd"]}, "io_uring": False,
+        "linux_aio": True, "blk_props": ["iothread", "num-queues"]}
+
+
+def test_unprobed_binary_keeps_qemu_defaults():
+    options = disk_options.resolve({"disk": "/vm/a.qcow2"})
+    assert (options["cache"], options["aio"]) == ("writeback", "threads")
+
+
+def test_probed_binary(monkeypatch):
+    monkeypatch.setattr(disk_options.sys, "platform", "linux")
+    monkeypatch.setattr(disk_options.host_info, "fs_type", lambda path: "ext4")
+    options = disk_options.resolve({"disk": "/vm/a.qcow2"}, CAPS)
+    assert (options["cache"], options["aio"]) == ("none", "native")
+    options = disk_options.resolve({"disk": "/vm/a.qcow2"}, dict(CAPS, linux_aio=False))
+    assert (options["cache"], options["aio"]) == ("none", "threads")
+    monkeypatch.setattr(disk_options.host_info, "fs_type", lambda path: "tmpfs")
+    assert disk_options.resolve({"disk": "/dev/shm/a.qcow2"}, CAPS)["cache"] == "writeback"
+
+
+def test_missing_device_uses_board_interface():
+    warnings = []
+    config = {"disk": "/vm/a.qcow2", "disk_type": "ide", "disk_cache": "writeback", "disk_aio": "threads"}
+    assert disk_options.drive_args(config, CAPS, warnings) == [
+        "-drive", "file=/vm/a.qcow2,cache=writeback,aio=threads,discard=unmap,detect-zeroes=unmap"]
+    assert warnings and "ide-hd" in warnings[0]
+    args = disk_options.drive_args(dict(config, disk_type="scsi"), CAPS)
+    assert args[-2:] == ["-device", "scsi-hd,drive=disk0,bus=scsi0.0"]
@@ -0,0 +1,96 @@
+import struct
+import image_library
+
+
+def qcow2(backing=None, backing_format=None, version=3, incompatible=0, virtual_size=10 << 30):
+    # Header qcow2 minimo: nome del backing file a 512, estensioni subito dopo l'header v3
+    header = bytearray(1024)
+    backing_name = backing.encode() if backing else b""
+    struct.pack_into(">4sIQIIQI", header, 0, b"QFI\xfb", version, 512 if backing else 0, len(backing_name),
+                     16, virtual_size, 0)
+    if version >= 3:
+        struct.pack_into(">Q", header, 72, incompatible)
+        struct.pack_into(">I", header, 100, 104)
+        if backing_format:
+            value = backing_format.encode()
+            struct.pack_into(">II", header, 104, image_library.QCOW2_BACKING_FORMAT, len(value))
+            header[112:112 + len(value)] = value
+    header[512:512 + len(backing_name)] = backing_name
+    return bytes(header)
+
+
+def iso(label, blocks, bootable=True):
+    data = bytearray(image_library.ISO_DESCRIPTORS + 4 * image_library.ISO_SECTOR)
+    sector = image_library.ISO_DESCRIPTORS
+    data[sector:sector + 6] = b"\x01CD001"
+    data[sector + 40:sector + 72] = label.encode().ljust(32)
+    struct.pack_into("<I", data, sector + 80, blocks)
+    struct.pack_into("<H", data, sector + 128, 2048)
+    sector += image_library.ISO_SECTOR
+    if bootable:
+        data[sector:sector + 6] = b"\x00CD001"
+        data[sector + 7:sector + 30] = b"EL TORITO SPECIFICATION"
+        sector += image_library.ISO_SECTOR
+    data[sector:sector + 6] = b"\xffCD001"
+    return bytes(data)
+
+
+def test_probe_qcow2(tmp_path):
+    path = tmp_path / "overlay.qcow2"
+    path.write_bytes(qcow2("base.qcow2", "qcow2", incompatible=image_library.QCOW2_DIRTY))
+    info = image_library.probe(str(path))
+    assert info["format"] == "qcow2"
+    assert (info["virtual_size"], info["cluster_size"]) == (10 << 30, 65536)
+    assert (info["backing"], info["backing_format"], info["flags"]) == ("base.qcow2", "qcow2", "dirty")
+    assert info["kind"] == image_library.DISK
+
+
+def test_probe_qcow2_v2(tmp_path):
+    path = tmp_path / "old.img"
+    path.write_bytes(qcow2(version=2, virtual_size=1 << 20))
+    info = image_library.probe(str(path))
+    assert (info["format"], info["virtual_size"], info["flags"]) == ("qcow2", 1 << 20, "")
+    assert "backing" not in info
+
+
+def test_probe_iso(tmp_path):
+    path = tmp_path / "install.iso"
+    path.write_bytes(iso("DEBIAN_12", 1000))
+    info = image_library.probe(str(path))
+    assert info == {"format": "iso", "virtual_size": 1000 * 2048, "label": "DEBIAN_12", "flags": "bootable",
+                    "kind": image_library.ISO}
+    path.write_bytes(iso("DATA", 10, bootable=False))
+    assert image_library.probe(str(path))["flags"] == ""
+
+
+def test_probe_raw_and_truncated(tmp_path):
+    raw = tmp_path / "disk.raw"
+    raw.write_bytes(b"\0" * 4096)
+    assert image_library.probe(str(raw)) == {"format": "raw", "virtual_size": 4096, "kind": image_library.DISK}
+    broken = tmp_path / "broken.qcow2"
+    broken.write_bytes(b"QFI\xfb" + b"\0" * 20)
+    assert image_library.safe_probe(str(broken))["format"] == "raw"
+    assert image_library.safe_probe(str(tmp_path / "missing.qcow2"))["format"] == "unknown"
+
+
+def test_scan_and_backing_chain(tmp_path):
+    images = tmp_path / "images"
+    (images / "sub").mkdir(parents=True)
+    (images / "base.qcow2").write_bytes(qcow2())
+    (images / "sub" / "mid.qcow2").write_bytes(qcow2("../base.qcow2"))
+    (images / "top.qcow2").write_bytes(qcow2("sub/mid.qcow2"))
+    (images / "orphan.qcow2").write_bytes(qcow2("gone.qcow2"))
+    (images / "notes.txt").write_text("not an image")
+    entries = image_library.scan([str(images)], str(tmp_path / "cache.db"))
+    by_path = {row["path"]: row for row in entries}
+    assert sorted(by_path) == sorted(str(images / name) for name in
+                                     ("base.qcow2", "orphan.qcow2", "sub/mid.qcow2", "top.qcow2"))
+    assert image_library.backing_chain(str(images / "top.qcow2"), by_path) == [
+        (str(images / "sub" / "mid.qcow2"), "qcow2"), (str(images / "base.qcow2"), "qcow2")]
+    assert image_library.backing_chain(str(images / "orphan.qcow2"), by_path) == [(str(images / "gone.qcow2"), None)]
+    # Seconda scansione: nessun header da rileggere
+    library = image_library.ImageLibrary(str(tmp_path / "cache.db"))
+    try:
+        assert library.refresh([str(images)]) == ([], [])
+    finally:
+        library.close()
@@ -0,0 +1,51 @@
+import log_index
+
+
+def lines(count, start=0):
+    return b"".join(b"line %d\n" % n for n in range(start, start + count))
+
+
+def test_scan_checkpoints():
+    data = lines(log_index.STRIDE * 2 + 5) + b"partial"
+    checkpoints, since, tail = log_index.scan(data, 0)
+    stride = len(lines(log_index.STRIDE))
+    assert checkpoints == [stride, len(lines(log_index.STRIDE * 2))]
+    assert since == 5
+    assert tail == len(data) - len(b"partial")
+
+
+def test_scan_continues_from_previous_chunk():
+    first = lines(log_index.STRIDE - 3)
+    checkpoints, since, _ = log_index.scan(first, 0)
+    assert (checkpoints, since) == ([], log_index.STRIDE - 3)
+    second = lines(10, log_index.STRIDE - 3)
+    checkpoints, since, _ = log_index.scan(second, since)
+    assert checkpoints == [len(lines(3, log_index.STRIDE - 3))]
+    assert since == 7
+
+
+def test_index_lines(tmp_path):
+    path = tmp_path / "serial.log"
+    path.write_bytes(lines(200) + b"tail")
+    index = log_index.LogIndex(str(path))
+    try:
+        while index.refresh(budget=1000):
+            pass
+        assert index.line_count() == 201
+        assert index.lines(130, 3) == ["line 130", "line 131", "line 132"]
+        assert index.lines(199, 5) == ["line 199", "tail"]
+    finally:
+        index.close()
+
+
+def test_search(tmp_path, monkeypatch):
+    path = tmp_path / "serial.log"
+    path.write_bytes(lines(1000) + b"LINE 7 again\n")
+    # Blocchi piccoli: i confini devono cadere a fine riga
+    monkeypatch.setattr(log_index, "SEARCH_CHUNK", 100)
+    assert list(log_index.search(str(path), r"^line 7\d?$")) == [7] + list(range(70, 80))
+    assert list(log_index.search(str(path), "line 7 ", ignore_case=True)) == [1000]
+    assert list(log_index.search(str(path), "line", max_results=3)) == [0, 1, 2]
+    empty = tmp_path / "empty.log"
+    empty.write_bytes(b"")
+    assert list(log_index.search(str(empty), "x")) == []
@@ -0,0 +1,48 @@
+import network
+
+CAPS = {"devices": {"Network devices": ["e1000", "virtio-net-pci", "virtio-net-device"]}}
+
+
+def test_user_netdev():
+    args = network.netdev_args({"net": "user (NAT)", "net_hostfwd": "tcp::2222-:22, udp::5353-:53"},
+                               arch="x86_64")
+    assert args == ["-netdev", "user,id=net0,hostfwd=tcp::2222-:22,hostfwd=udp::5353-:53",
+                    "-device", "virtio-net-pci,netdev=net0"]
+
+
+def test_no_network():
+    assert network.netdev_args({"net": "none"}, arch="x86_64") == ["-nic", "none"]
+
+
+def test_tap_multiqueue(monkeypatch):
+    monkeypatch.setattr(network, "vhost_available", lambda: True)
+    config = {"net": "tap", "net_tap": "tap3", "cpu": "4", "net_mac": "52:54:00:aa:bb:cc"}
+    assert network.netdev_args(config, arch="x86_64") == [
+        "-netdev", "tap,id=net0,ifname=tap3,script=no,downscript=no,queues=4,vhost=on",
+        "-device", "virtio-net-pci,netdev=net0,mq=on,vectors=10,mac=52:54:00:aa:bb:cc"]
+
+
+def test_tap_without_vhost_warns(monkeypatch):
+    monkeypatch.setattr(network, "vhost_available", lambda: False)
+    warnings = []
+    args = network.netdev_args({"net": "tap", "net_tap": "tap0", "net_queues": "1", "net_mac": "52:54:00:00:00:01"},
+                               warnings, arch="x86_64")
+    assert args[1] == "tap,id=net0,ifname=tap0,script=no,downscript=no"
+    assert len(warnings) == 1
+
+
+def test_auto_uses_board_nic():
+    # Senza virtio sul bus della macchina di default la board sceglie la sua scheda
+    assert network.netdev_args({"net_hostfwd": "tcp::2222-:22"}, arch="aarch64") == [
+        "-nic", "user,hostfwd=tcp::2222-:22"]
+    assert network.netdev_args({"net": "bridge", "net_bridge": "br1", "net_mac": "52:54:00:00:00:02"},
+                               arch="aarch64") == ["-nic", "bridge,br=br1,mac=52:54:00:00:00:02"]
+
+
+def test_model_missing_from_caps():
+    warnings = []
+    args = network.netdev_args({"net_model": "rtl8139"}, warnings, arch="x86_64", caps=CAPS)
+    assert args == ["-nic", "user"]
+    assert warnings and "rtl8139" in warnings[0]
+    assert network.netdev_args({}, arch="x86_64", caps={"devices": {"Network devices": ["e1000"]}}) == ["-nic", "user"]
+    assert network.netdev_args({"net_model": "e1000"}, arch="x86_64", caps=CAPS)[-1] == "e1000,netdev=net0"
@@ -0,0 +1,19 @@
+import struct
+import pytest
+import overlays
+import vm_command
+
+
+def test_image_format(tmp_path):
+    qcow2 = tmp_path / "base.qcow2"
+    qcow2.write_bytes(overlays.QCOW2_MAGIC + struct.pack(">IQIIQI", 3, 0, 0, 16, 1 << 30, 0) + bytes(1024))
+    vmdk = tmp_path / "base.vmdk"
+    vmdk.write_bytes(b"KDMV" + struct.pack("<IIQ", 1, 3, 2048) + bytes(1024))
+    raw = tmp_path / "base.img"
+    raw.write_bytes(bytes(4096))
+    assert [overlays.image_format(str(path)) for path in (qcow2, vmdk, raw)] == ["qcow2", "vmdk", "raw"]
+
+
+def test_image_format_unreadable(tmp_path):
+    with pytest.raises(vm_command.LaunchError):
+        overlays.image_format(str(tmp_path / "missing.qcow2"))
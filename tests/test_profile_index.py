@@ -0,0 +1,31 @@
+import profile_manager
+import profile_index
+
+
+def test_profile_row():
+    row = profile_index.profile_row("a.json", {"arch": "x86_64 (PC)", "ram": "2048", "cpu": 2, "disk": "/d.qcow2"})
+    assert row["arch"] == "x86_64"
+    assert (row["ram"], row["cpu"], row["disk"], row["iso"]) == (2048, 2, "/d.qcow2", "")
+
+
+def test_profile_row_rejects_bad_values():
+    assert profile_index.profile_row("a.json", ["not", "a", "profile"]) is None
+    assert profile_index.profile_row("a.json", None) is None
+    row = profile_index.profile_row("a.json", {"arch": "   ", "ram": [1], "cpu": None, "disk": {"x": 1}})
+    assert (row["arch"], row["ram"], row["cpu"], row["disk"]) == ("", None, None, "")
+
+
+def test_refresh_skips_bad_profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(profile_manager, "PROFILE_DIR", str(tmp_path / "profiles"))
+    profile_manager.save_profile("good.json", {"arch": "aarch64", "ram": "1024"})
+    profile_manager.save_profile("list.json", [1, 2])
+    profile_manager.save_profile("blank.json", {"arch": " "})
+    (tmp_path / "profiles" / "broken.json").write_text("{")
+    index = profile_index.ProfileIndex(str(tmp_path / "index.db"))
+    try:
+        changed, removed = index.refresh()
+        assert removed == []
+        assert [row["name"] for row in index.search()] == ["blank.json", "good.json"]
+        assert [row["name"] for row in index.search("arch:aarch64 ram>=1024")] == ["good.json"]
+    finally:
+        index.close()
@@ -0,0 +1,22 @@
+import os
+import json
+import threading
+import qemu_caps
+
+
+def test_concurrent_save_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(qemu_caps, "CACHE_FILE", str(tmp_path / "qemu_caps.json"))
+    monkeypatch.setattr(qemu_caps, "_cache", {"/usr/bin/qemu": {"key": [1], "caps": {"accels": ["tcg"]}}})
+    threads = [threading.Thread(target=lambda: [qemu_caps.save_cache() for _ in range(50)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert json.loads((tmp_path / "qemu_caps.json").read_text())["/usr/bin/qemu"]["caps"] == {"accels": ["tcg"]}
+    assert os.listdir(tmp_path) == ["qemu_caps.json"]
+
+
+def test_save_cache_unwritable(tmp_path, monkeypatch):
+    monkeypatch.setattr(qemu_caps, "CACHE_FILE", str(tmp_path / "missing" / "qemu_caps.json"))
+    monkeypatch.setattr(qemu_caps, "_cache", {})
+    qemu_caps.save_cache()
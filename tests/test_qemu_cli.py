@@ -0,0 +1,34 @@
+import json
+import qemu_cli
+import qemu_caps
+import serial_log
+import vm_command
+
+
+def test_dry_run_creates_nothing(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(qemu_caps, "cached_caps", lambda binary: None)
+    (tmp_path / "profiles").mkdir()
+    (tmp_path / "profiles" / "a.json").write_text(json.dumps({"arch": "x86_64", "accel": "tcg", "disk": "/vm/a.qcow2",
+                                                              "snapshot": True}))
+    assert qemu_cli.main(["run", "a", "--dry-run"]) == 0
+    cmd = capsys.readouterr().out
+    assert "-qmp unix:run/a-" in cmd and "path=run/" in cmd
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["profiles"]
+
+
+def test_launch_os_error(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "profiles").mkdir()
+    (tmp_path / "profiles" / "a.json").write_text(json.dumps({"arch": "x86_64", "ram": "64", "cpu": "1",
+                                                              "net": "none"}))
+    # Ammissione sempre concessa: l'esito non dipende dal carico dell'host
+    (tmp_path / "admission_policy.json").write_text(json.dumps({"mode": "off"}))
+    monkeypatch.setattr(vm_command, "preflight", lambda config: None)
+
+    def no_logs(config, name, key):
+        raise PermissionError(13, "Permission denied", "logs/a")
+    monkeypatch.setattr(serial_log, "VMLogs", no_logs)
+    assert qemu_cli.main(["run", "a"]) == 1
+    assert "Permission denied" in capsys.readouterr().err
+    assert json.loads((tmp_path / "run" / "admission.json").read_text() or "{}") == {}
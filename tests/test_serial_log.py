@@ -0,0 +1,39 @@
+import os
+import time
+import serial_log
+
+
+def runs(tmp_path, profile="web"):
+    return sorted(os.listdir(tmp_path / serial_log.LOG_DIR / profile))
+
+
+def test_live_launches_are_never_pruned(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logs = [serial_log.VMLogs({"serial_log": False}, "web.json", f"vm{i}") for i in range(serial_log.KEEP_RUNS + 5)]
+    assert len(runs(tmp_path)) == serial_log.KEEP_RUNS + 5
+    assert all(os.path.isdir(vm.directory) for vm in logs)
+    for vm in logs:
+        vm.close()
+    serial_log.VMLogs({"serial_log": False}, "web.json", "last").close()
+    assert len(runs(tmp_path)) == serial_log.KEEP_RUNS
+
+
+def test_closed_launches_keep_the_newest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    live = serial_log.VMLogs({"serial_log": False}, "web.json", "aaa-live")
+    for i in range(serial_log.KEEP_RUNS + 3):
+        serial_log.VMLogs({"serial_log": False}, "web.json", f"vm{i:02d}").close()
+    assert os.path.isdir(live.directory)
+    assert len(runs(tmp_path)) == serial_log.KEEP_RUNS + 1
+    live.close()
+
+
+def test_stream_keeps_the_launch_live_until_it_finishes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logs = serial_log.VMLogs({"serial_log": True}, "web.json", "vm")
+    assert serial_log.live(logs.directory)
+    logs.close()
+    deadline = time.monotonic() + 5
+    while serial_log.live(logs.directory) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not serial_log.live(logs.directory)
@@ -0,0 +1,43 @@
+import pytest
+import qemu_caps
+import vm_command
+
+PATHS = {"x86_64": "/opt/qemu/qemu-system-x86_64", "aarch64": "/opt/qemu/qemu-system-aarch64"}
+
+
+@pytest.fixture(autouse=True)
+def no_caps(monkeypatch):
+    # Nessun binario sondato: il comando dipende solo dal profilo
+    monkeypatch.setattr(qemu_caps, "cached_caps", lambda binary: None)
+
+
+def test_build_command():
+    config = {"arch": "x86_64 (qemu-system-x86_64)", "ram": "2048", "cpu": "2", "accel": "tcg",
+              "disk": "/vm/a,b.qcow2", "disk_type": "virtio-blk", "disk_cache": "writeback", "disk_aio": "threads",
+              "iso": "/iso/install.iso", "vga": "virtio-gpu-pci", "usb_bus": "qemu-xhci", "input": "usb-tablet",
+              "net_hostfwd": "tcp::2222-:22", "snapshot": True}
+    cmd = vm_command.build_command(config, PATHS, qmp_socket="run/a.qmp", serial_socket="run/a.serial",
+                                   incoming="defer")
+    assert cmd == [
+        "/opt/qemu/qemu-system-x86_64", "-m", "2048", "-smp", "2", "-accel", "tcg",
+        "-device", "qemu-xhci", "-device", "usb-tablet", "-device", "virtio-gpu-pci",
+        "-cdrom", "/iso/install.iso", "-boot", "d",
+        "-netdev", "user,id=net0,hostfwd=tcp::2222-:22", "-device", "virtio-net-pci,netdev=net0",
+        "-object", "iothread,id=io0",
+        "-drive", "file=/vm/a,,b.qcow2,if=none,id=disk0,cache=writeback,aio=threads,discard=unmap,detect-zeroes=unmap",
+        "-device", "virtio-blk-pci,drive=disk0,iothread=io0,num-queues=2",
+        "-chardev", "socket,id=serial0,path=run/a.serial", "-serial", "chardev:serial0",
+        "-snapshot", "-qmp", "unix:run/a.qmp,server=on,wait=off", "-incoming", "defer"]
+
+
+def test_build_command_minimal():
+    cmd = vm_command.build_command({"arch": "aarch64", "accel": "tcg", "machine": "virt", "cpu_model": "max",
+                                    "net": "none"}, PATHS)
+    assert cmd == ["/opt/qemu/qemu-system-aarch64", "-m", "1024", "-smp", "2", "-accel", "tcg",
+                   "-machine", "virt", "-cpu", "max", "-nic", "none"]
+
+
+def test_build_command_stdio_serial():
+    cmd = vm_command.build_command({"accel": "tcg", "serial_console": True}, PATHS)
+    assert cmd[-2:] == ["-serial", "stdio"]
+    assert "-chardev" not in cmd
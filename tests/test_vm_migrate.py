@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+import vm_migrate
+from qmp_client import QMPError
+
+
+class Client:
+    # QMP finto: risponde a query-migrate con gli stati dati, uno per chiamata (l'ultimo si ripete)
+    def __init__(self, statuses=None):
+        self.statuses = list(statuses or [])
+        self.commands = []
+        self.connected = True
+
+    async def execute(self, command, arguments=None):
+        self.commands.append(command)
+        if command == "query-status":
+            return {"running": True, "status": "running"}
+        if command == "query-migrate-capabilities":
+            return [{"capability": "postcopy-ram"}, {"capability": "multifd"}]
+        if command == "query-migrate":
+            return self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        return {}
+
+    async def close(self):
+        self.connected = False
+
+
+def run(monkeypatch, statuses, timeout=60):
+    source, dest = Client(statuses), Client()
+    clients = {"source": source, "dest": dest}
+
+    async def connect(qmp_socket, attempts=50, delay=0.2):
+        return clients[qmp_socket]
+    monkeypatch.setattr(vm_migrate, "connect", connect)
+    monkeypatch.setattr(vm_migrate, "postcopy_available", lambda: True)
+    monkeypatch.setattr(vm_migrate, "POLL_INTERVAL", 0)
+    options = dict(vm_migrate.DEFAULT_OPTIONS, multifd=False, postcopy=True)
+    with pytest.raises(QMPError) as error:
+        asyncio.run(vm_migrate.migrate("source", "dest", "unix:m.sock", options, timeout=timeout))
+    return error.value, source, dest
+
+
+def test_precopy_failure_quits_destination(monkeypatch):
+    error, source, dest = run(monkeypatch, [{"status": "failed", "error-desc": "broken pipe"}])
+    assert not isinstance(error, vm_migrate.PostcopyError)
+    assert "quit" in dest.commands
+
+
+def test_postcopy_paused_keeps_destination(monkeypatch):
+    error, source, dest = run(monkeypatch, [{"status": "active", "ram": {"dirty-sync-count": 3}},
+                                            {"status": "postcopy-active"}, {"status": "postcopy-paused"}])
+    assert isinstance(error, vm_migrate.PostcopyError)
+    assert "migrate-start-postcopy" in source.commands
+    assert "quit" not in dest.commands
+    assert "cont" not in source.commands
+
+
+def test_postcopy_timeout_does_not_cancel(monkeypatch):
+    error, source, dest = run(monkeypatch, [{"status": "postcopy-active"}], timeout=-1)
+    assert isinstance(error, vm_migrate.PostcopyError)
+    assert "migrate_cancel" not in source.commands
+    assert "quit" not in dest.commands
@@ -0,0 +1,95 @@
+import concurrent.futures
+import serial_log
+import warm_pool
+
+
+class FakeSerial:
+    def __init__(self):
+        self.taps = []
+
+    def attach(self):
+        tap = serial_log.Tap()
+        self.taps.append(tap)
+        return tap
+
+    def detach(self, tap):
+        self.taps.remove(tap)
+
+    def write(self, data):
+        for tap in self.taps:
+            tap.push(data)
+
+
+class FakeLogs:
+    def __init__(self):
+        self.serial = FakeSerial()
+
+
+class FakeVM:
+    def __init__(self):
+        self.logs = FakeLogs()
+        self.running = True
+        self.commands = []
+
+    def alive(self):
+        return self.running
+
+    def stop(self):
+        self.running = False
+
+    def qmp(self, command, arguments=None, new_state=None):
+        self.commands.append(command)
+        future = concurrent.futures.Future()
+        future.set_result({})
+        return future
+
+
+def test_ready_when_milestones_are_reached():
+    vm = FakeVM()
+    entry = warm_pool.PoolEntry(vm, ["login:"])
+    start = entry.started
+    vm.logs.serial.write(b"SeaBIOS\r\nBooting from Hard Disk...\r\n")
+    assert not entry.booted(start + 1, 120)
+    assert not entry.booted(start + 10, 120)
+    vm.logs.serial.write(b"debian login: ")
+    assert entry.booted(start + 11, 120)
+
+
+def test_ready_when_console_goes_quiet_without_milestones():
+    vm = FakeVM()
+    entry = warm_pool.PoolEntry(vm)
+    start = entry.started
+    assert not entry.booted(start + 10, 120)
+    vm.logs.serial.write(b"kernel messages\n")
+    assert not entry.booted(start + 11, 120)
+    assert entry.booted(start + 11 + warm_pool.SETTLE_SECONDS, 120)
+
+
+def test_boot_seconds_is_the_limit():
+    vm = FakeVM()
+    vm.logs = None
+    entry = warm_pool.PoolEntry(vm, ["login:"])
+    assert not entry.booted(entry.started + 5, 30)
+    assert entry.booted(entry.started + 30, 30)
+
+
+def test_pool_pauses_and_hands_out():
+    vms = []
+
+    def spawn():
+        vms.append(FakeVM())
+        return vms[-1]
+
+    pool = warm_pool.WarmPool("test.json", {"boot_milestones": "login:"}, spawn=spawn, size=1)
+    pool.maintain()
+    assert pool.stats()["booting"] == 1
+    vms[0].logs.serial.write(b"login: ")
+    pool.maintain()
+    pool.maintain()
+    assert vms[0].commands == ["stop"]
+    assert pool.stats()["ready"] == 1
+    assert not vms[0].logs.serial.taps
+    vm, hit = pool.handout(wait=False)
+    assert (vm, hit) == (vms[0], True)
+    assert vm.commands == ["stop", "cont"]
+    pool.shutdown()
@@ -0,0 +1,195 @@
+import os
+import qemu_config
+import host_accel
+import memory_backend
+import disk_options
+import network
+
+# Socket QMP e altri file di runtime delle VM
+RUN_DIR = "run"
+SERIAL_CHARDEV = "serial0"
+MONITOR_CHARDEV = "monitor0"
+
+# Valori di default di un profilo, stesse chiavi salvate da save_as_profile
+DEFAULT_CONFIG = {
+    "arch": "x86_64",
+    "ram": "1024",
+    "cpu": "2",
+    "disk": "",
+    "iso": "",
+    "bios": "",
+    "machine": "",
+    "cpu_model": "",
+    "accel": host_accel.AUTO,
+    "disk_type": "ide",
+    "vga": "none",
+    "input": "No input",
+    "usb_bus": "No USB",
+    "net": network.USER,
+    "net_model": network.AUTO,
+    "net_vhost": True,
+    "net_queues": network.AUTO,
+    "net_bridge": "br0",
+    "net_tap": "",
+    "net_hostfwd": "",
+    "snapshot": False,
+    "overlay_dir": "",
+    "cpu_policy": "none",
+    "mem_backend": memory_backend.DEFAULT,
+    "hugepages": "",
+    "mem_path": "",
+    "mem_prealloc": False,
+    "host_nodes": "",
+    "mem_policy": "bind",
+    "disk_cache": disk_options.AUTO,
+    "disk_aio": disk_options.AUTO,
+    "disk_iothread": True,
+    "disk_discard": True,
+    # Seriale del guest nella console del launcher (stdio se non c'e' il socket di serial_log)
+    "serial_console": False,
+    # Seriale su socket chardev, scritta in logs/ da serial_log
+    "serial_log": True,
+    # Monitor HMP su un secondo socket chardev, in monitor.log
+    "hmp_monitor": False,
+    # Regex separate da ";" cronometrate da boot_timing (es. "login:")
+    "boot_milestones": ""
+}
+
+
+class LaunchError(Exception):
+    pass
+
+VGA_TYPES = [
+    "none",
+    "VGA",
+    "cirrus-vga",
+    "qxl",
+    "virtio-gpu-pci",
+    "vmware-svga",
+    "bochs-display"
+]
+
+# Tipo disco -> device QEMU richiesto (per filtrare con le capability del binario)
+DISK_DEVICES = disk_options.DISK_DEVICES
+
+
+def from_profile(profile):
+    config = DEFAULT_CONFIG.copy()
+    for key, value in (profile or {}).items():
+        if value is not None:
+            config[key] = value
+    return config
+
+
+def arch_key(arch):
+    # I vecchi profili salvano "x86_64 (qemu-system-x86_64)"
+    return arch.split()[0] if arch and arch.strip() else DEFAULT_CONFIG["arch"]
+
+
+def resolve_binary(arch, paths=None):
+    if paths is None:
+        paths = qemu_config.load_paths()
+    key = arch_key(arch)
+    return paths.get(key) or qemu_config.DEFAULT_PATHS.get(key) or qemu_config.DEFAULT_PATHS["x86_64"]
+
+
+def runtime_path(name, create=True):
+    # create=False: solo il percorso (run --dry-run non crea run/)
+    if create and not os.path.exists(RUN_DIR):
+        os.makedirs(RUN_DIR)
+    return os.path.join(RUN_DIR, name)
+
+
+def resolve_accel(config, paths=None, warnings=None):
+    # "auto" diventa l'acceleratore piu' veloce disponibile, con -cpu host se possibile
+    accel = config["accel"]
+    cpu_model = config["cpu_model"]
+    if accel == host_accel.AUTO:
+        # Solo la cache: sondare il binario qui bloccherebbe la GUI e "run --dry-run"
+        import qemu_caps
+        binary = resolve_binary(config["arch"], paths)
+        caps = qemu_caps.cached_caps(binary)
+        if caps is None and qemu_caps.resolve(binary) and warnings is not None:
+            warnings.append(f"Capabilities of {binary} not probed yet: accelerator chosen from the host only")
+        accel, host_cpu, warning = host_accel.best_accel(arch_key(config["arch"]), caps["accels"] if caps else None)
+        if host_cpu and not cpu_model:
+            cpu_model = "host"
+    else:
+        warning = host_accel.check_accel(accel)
+    if warning and warnings is not None:
+        warnings.append(warning)
+    return accel, cpu_model
+
+
+def preflight(config):
+    # Controlli sull'host prima di avviare QEMU
+    config = from_profile(config)
+    errors = memory_backend.check(config) + network.check(config)
+    if errors:
+        raise LaunchError("\n".join(errors))
+
+
+def build_command(config, paths=None, qmp_socket=None, warnings=None, incoming=None, serial_socket=None,
+                  monitor_socket=None):
+    config = from_profile(config)
+    disk = config["disk"]
+    iso = config["iso"]
+    config["accel"], config["cpu_model"] = resolve_accel(config, paths, warnings)
+
+    smp = str(config["cpu"])
+    if config["cpu_policy"] != "none" and smp.strip().isdigit():
+        import cpu_placement
+        smp = cpu_placement.smp_option(int(smp))
+    cmd = [resolve_binary(config["arch"], paths), "-m", str(config["ram"]), "-smp", smp]
+    if config["accel"]:
+        cmd += ["-accel", config["accel"]]
+    usb_bus = config["usb_bus"]
+    if "usb-uhci" in usb_bus:
+        cmd += ["-device", "usb-uhci"]
+    elif "usb-ehci" in usb_bus:
+        cmd += ["-device", "usb-ehci"]
+    elif "qemu-xhci" in usb_bus:
+        cmd += ["-device", "qemu-xhci"]
+    input_option = config["input"]
+    if "usb-kbd" in input_option:
+        cmd += ["-device", "usb-kbd"]
+    if "usb-mouse" in input_option:
+        cmd += ["-device", "usb-mouse"]
+    if "usb-tablet" in input_option:
+        cmd += ["-device", "usb-tablet"]
+    if config["vga"] and config["vga"] != "none":
+        cmd += ["-device", config["vga"]]
+    memory = memory_backend.memory_object(config)
+    if memory:
+        cmd += ["-object", memory]
+        machine = ",".join(filter(None, [config["machine"], f"memory-backend={memory_backend.BACKEND_ID}"]))
+        cmd += ["-machine", machine]
+    elif config["machine"]:
+        cmd += ["-machine", config["machine"]]
+    if config["cpu_model"]:
+        cmd += ["-cpu", config["cpu_model"]]
+    if config["bios"]:
+        cmd += ["-bios", config["bios"]]
+    if iso:
+        cmd += ["-cdrom", iso, "-boot", "d"]
+    import qemu_caps
+    caps = qemu_caps.cached_caps(cmd[0])
+    cmd += network.netdev_args(config, warnings, arch_key(config["arch"]), caps)
+    if disk:
+        cmd += disk_options.drive_args(config, caps, warnings)
+
+    # Socket in modalita' client: il launcher e' gia' in ascolto (serial_log)
+    if serial_socket:
+        cmd += ["-chardev", f"socket,id={SERIAL_CHARDEV},path={serial_socket}", "-serial", f"chardev:{SERIAL_CHARDEV}"]
+    elif config["serial_console"]:
+        cmd += ["-serial", "stdio"]
+    if monitor_socket:
+        cmd += ["-chardev", f"socket,id={MONITOR_CHARDEV},path={monitor_socket}",
+                "-mon", f"chardev={MONITOR_CHARDEV},mode=readline"]
+    if config["snapshot"]:
+        cmd.append("-snapshot")
+    if qmp_socket:
+        cmd += ["-qmp", f"unix:{qmp_socket},server=on,wait=off"]
+    if incoming:
+        cmd += ["-incoming", incoming]
+    return cmd
@@ -0,0 +1,99 @@
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QDoubleSpinBox,
+    QHeaderView, QPushButton, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import QTimer
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+SPARK_POINTS = 30
+
+
+def sparkline(values):
+    values = values[-SPARK_POINTS:]
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return "".join(SPARK_CHARS[int((v - low) / span * (len(SPARK_CHARS) - 1))] for v in values)
+
+
+def format_value(value):
+    if abs(value) >= 1 << 20:
+        return f"{value / (1 << 20):.1f} M"
+    if abs(value) >= 1 << 10:
+        return f"{value / (1 << 10):.1f} K"
+    return f"{value:.0f}" if float(value).is_integer() else f"{value:.2f}"
+
+
+class VMDashboard(QWidget):
+    def __init__(self, poller, host=None, parent=None):
+        super().__init__(parent)
+        self.poller = poller
+        # host: host_metrics.HostSampler, metriche dal lato host con prefisso "host."
+        self.host = host
+        self.vm_id = None
+
+        layout = QVBoxLayout(self)
+        header = QHBoxLayout()
+        self.title_label = QLabel("Performance:")
+        header.addWidget(self.title_label)
+        header.addStretch()
+        self.interval_label = QLabel("Poll interval (s):")
+        header.addWidget(self.interval_label)
+        self.interval_input = QDoubleSpinBox()
+        self.interval_input.setRange(0.1, 60.0)
+        self.interval_input.setSingleStep(0.5)
+        self.interval_input.setValue(poller.interval)
+        self.interval_input.valueChanged.connect(self.set_interval)
+        header.addWidget(self.interval_input)
+        if host is not None:
+            self.export_button = QPushButton("Export CSV...")
+            self.export_button.clicked.connect(self.export_csv)
+            header.addWidget(self.export_button)
+        layout.addLayout(header)
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Metric", "Current", "History"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.set_interval(poller.interval)
+
+    def set_interval(self, interval):
+        self.poller.set_interval(interval)
+        self.timer.start(int(self.poller.interval * 1000))
+
+    def show_vm(self, vm_id):
+        self.vm_id = vm_id
+        self.refresh()
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        series = self.poller.snapshot(self.vm_id) if self.vm_id is not None else {}
+        if self.host is not None and self.vm_id is not None:
+            series.update((f"host.{name}", points) for name, points in self.host.snapshot(self.vm_id).items())
+        names = sorted(series)
+        self.table.setRowCount(len(names))
+        for row, name in enumerate(names):
+            values = [value for _, value in series[name]]
+            current = format_value(values[-1]) if values else ""
+            for col, text in enumerate((name, current, sparkline(values))):
+                item = self.table.item(row, col)
+                if item is None:
+                    self.table.setItem(row, col, QTableWidgetItem(text))
+                elif item.text() != text:
+                    item.setText(text)
+
+    def export_csv(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export host metrics", "host_metrics.csv", "CSV (*.csv)")
+        if not path:
+            return
+        try:
+            self.host.write_csv(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Export host metrics", str(e))
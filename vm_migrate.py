@@ -0,0 +1,303 @@
+import os
+import time
+import shutil
+import socket
+import asyncio
+import vm_command
+import network
+import memory_backend
+from qmp_client import QMPClient, QMPError
+
+# Migrazione live sullo stesso host: un secondo QEMU con la stessa configurazione
+# (stesso disco o overlay, stesso tipo di macchina) parte con "-incoming defer",
+# poi la sorgente fa "migrate" su un socket unix o TCP locale. Serve a spostare
+# un guest su un nodo NUMA meno carico o su un binario QEMU nuovo senza reboot.
+# Se la migrazione fallisce prima di post-copy la sorgente continua a girare.
+
+UNIX = "unix"
+TCP = "tcp"
+TRANSPORTS = [UNIX, TCP]
+MULTIFD_CHANNELS = 4
+# Il default di QEMU (128 MiB/s) e' pensato per la rete: in locale si toglie il limite
+MAX_BANDWIDTH = 64 << 30
+DOWNTIME_LIMIT_MS = 300
+# Passate di pre-copy senza convergere prima di passare a post-copy
+POSTCOPY_AFTER = 3
+POLL_INTERVAL = 0.2
+PROGRESS_INTERVAL = 1.0
+MIGRATE_TIMEOUT = 3600
+
+DEFAULT_OPTIONS = {
+    "transport": UNIX,
+    "multifd": True,
+    "postcopy": False,
+    # None: stessi vincoli della sorgente; "auto": il nodo NUMA piu' libero; altrimenti il numero del nodo
+    "node": None,
+    # Binario QEMU della destinazione (None: lo stesso)
+    "binary": None,
+    "downtime_ms": DOWNTIME_LIMIT_MS
+}
+
+
+class PostcopyError(QMPError):
+    # Fallita dopo migrate-start-postcopy: la RAM aggiornata e' nella destinazione,
+    # che va lasciata accesa per migrate-recover
+    pass
+
+
+def check(config, options):
+    # Cose che due QEMU sullo stesso host non possono avere entrambi
+    config = vm_command.from_profile(config)
+    errors = []
+    if config["snapshot"] and config["disk"]:
+        errors.append("A VM started with -snapshot keeps its changes in a temporary file the destination cannot open")
+    mode = network.backend(config)
+    if mode == network.TAP:
+        errors.append(f"The tap device {config['net_tap'] or 'tap0'} cannot be opened by two QEMU processes at once")
+    if mode == network.USER and network.hostfwd_rules(config):
+        errors.append("Forwarded host ports (hostfwd) are already bound by the running VM")
+    if options["binary"] and not shutil.which(options["binary"]):
+        errors.append(f"QEMU binary not found: {options['binary']}")
+    return errors
+
+
+def postcopy_available():
+    # Post-copy usa userfaultfd: da utente normale serve vm.unprivileged_userfaultfd=1
+    if os.geteuid() == 0:
+        return True
+    try:
+        with open("/proc/sys/vm/unprivileged_userfaultfd") as f:
+            return f.read().strip() == "1"
+    except OSError:
+        return True
+
+
+def destination_config(config, machine=None, node=None):
+    # Stessa configurazione della sorgente, con il tipo di macchina risolto
+    # ("pc" -> "pc-i440fx-8.2"): un binario nuovo ha un "pc" diverso
+    config = dict(config)
+    if machine:
+        config["machine"] = ",".join([machine] + str(config.get("machine", "")).split(",")[1:])
+    if node is not None and config.get("mem_backend", memory_backend.DEFAULT) != memory_backend.DEFAULT:
+        config["host_nodes"] = str(node)
+    return config
+
+
+def numa_prefix(config, node, warnings=None):
+    # Con la RAM di default (niente memory-backend) la si lega al nodo con numactl
+    if node is None or config.get("mem_backend", memory_backend.DEFAULT) != memory_backend.DEFAULT:
+        return []
+    if shutil.which("numactl"):
+        return ["numactl", f"--preferred={node}"]
+    if warnings is not None:
+        warnings.append(f"numactl not found: guest RAM is not bound to node {node}, only the vCPUs are pinned")
+    return []
+
+
+def migration_uri(transport, key):
+    if transport == TCP:
+        # Porta libera scelta dal kernel; la destinazione la riapre subito dopo
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("127.0.0.1", 0))
+            return f"tcp:127.0.0.1:{s.getsockname()[1]}"
+    path = os.path.abspath(vm_command.runtime_path(f"{key}.migrate"))
+    if os.path.exists(path):
+        os.remove(path)
+    return f"unix:{path}"
+
+
+async def connect(qmp_socket, attempts=50, delay=0.2):
+    for _ in range(attempts):
+        client = QMPClient(qmp_socket)
+        try:
+            await client.connect()
+            return client
+        except (OSError, asyncio.TimeoutError, QMPError):
+            await client.close()
+            await asyncio.sleep(delay)
+    raise QMPError(f"could not reach {qmp_socket}")
+
+
+async def machine_type(qmp_socket):
+    # Tipo di macchina versionato della VM in esecuzione, None se QEMU non lo dice
+    client = await connect(qmp_socket, attempts=1)
+    try:
+        name = await client.execute("qom-get", {"path": "/machine", "property": "type"})
+    except QMPError:
+        return None
+    finally:
+        await client.close()
+    return name[:-len("-machine")] if isinstance(name, str) and name.endswith("-machine") else None
+
+
+async def set_capabilities(clients, options, notes):
+    # Stesse capability da entrambe le parti; multifd e post-copy insieme solo con QEMU recenti
+    supported = None
+    for client in clients:
+        names = {c["capability"] for c in await client.execute("query-migrate-capabilities")}
+        supported = names if supported is None else supported & names
+    wanted = []
+    if options["multifd"] and "multifd" in supported:
+        wanted.append("multifd")
+    if options["postcopy"]:
+        if "postcopy-ram" not in supported:
+            notes.append("post-copy not supported by QEMU")
+        elif not postcopy_available():
+            notes.append("post-copy needs vm.unprivileged_userfaultfd=1")
+        else:
+            wanted.append("postcopy-ram")
+    try:
+        for client in clients:
+            await client.execute("migrate-set-capabilities", {
+                "capabilities": [{"capability": name, "state": True} for name in wanted]})
+    except QMPError:
+        if len(wanted) < 2:
+            raise
+        notes.append("multifd disabled: this QEMU cannot combine it with post-copy")
+        wanted.remove("multifd")
+        for client in clients:
+            await client.execute("migrate-set-capabilities", {"capabilities": [
+                {"capability": "multifd", "state": False}, {"capability": "postcopy-ram", "state": True}]})
+    if "multifd" in wanted:
+        for client in clients:
+            await client.execute("migrate-set-parameters", {"multifd-channels": MULTIFD_CHANNELS})
+    return wanted
+
+
+def dirty_rate(info):
+    # Byte sporcati al secondo dall'ultima passata (dirty-pages-rate e' in pagine/s)
+    ram = info.get("ram", {})
+    return ram.get("dirty-pages-rate", 0) * ram.get("page-size", 4096)
+
+
+def describe_progress(info):
+    ram = info.get("ram", {})
+    total = ram.get("total") or 1
+    line = (f"migration {info.get('status')}: {ram.get('transferred', 0) / (1 << 20):.0f} MiB sent, "
+            f"{ram.get('remaining', 0) * 100 // total}% left, {ram.get('mbps', 0):.0f} Mbps, "
+            f"dirty {dirty_rate(info) / (1 << 20):.0f} MiB/s, pass {ram.get('dirty-sync-count', 0)}")
+    if "expected-downtime" in info:
+        line += f", expected downtime {info['expected-downtime']} ms"
+    return line
+
+
+async def migrate(source_qmp, dest_qmp, uri, options, progress=None, timeout=MIGRATE_TIMEOUT):
+    # Ritorna le statistiche della migrazione; la sorgente resta ferma ("postmigrate"):
+    # la chiude chi chiama, dopo aver passato alla destinazione cio' che le serve
+    source = await connect(source_qmp, attempts=1)
+    dest = None
+    started = was_running = postcopy_started = False
+    try:
+        dest = await connect(dest_qmp)
+        was_running = (await source.execute("query-status")).get("running")
+        notes = []
+        capabilities = await set_capabilities([source, dest], options, notes)
+        await source.execute("migrate-set-parameters", {
+            "max-bandwidth": MAX_BANDWIDTH, "downtime-limit": int(options["downtime_ms"])})
+        await dest.execute("migrate-incoming", {"uri": uri})
+        start = time.monotonic()
+        await source.execute("migrate", {"uri": uri})
+        started = True
+        deadline = start + timeout
+        last_progress = 0.0
+        peak_dirty = 0
+        while True:
+            info = await source.execute("query-migrate")
+            status = info.get("status")
+            if status == "completed":
+                break
+            if str(status).startswith("postcopy"):
+                postcopy_started = True
+            if status in ("failed", "cancelled"):
+                raise QMPError(f"migration {status}: {info.get('error-desc', 'no details')}")
+            if status == "postcopy-paused":
+                raise PostcopyError("post-copy interrupted")
+            if time.monotonic() > deadline:
+                if postcopy_started:
+                    # migrate_cancel non vale piu' dopo l'avvio di post-copy
+                    raise PostcopyError("post-copy timed out")
+                await source.execute("migrate_cancel")
+                raise QMPError("migration timed out")
+            peak_dirty = max(peak_dirty, dirty_rate(info))
+            passes = info.get("ram", {}).get("dirty-sync-count", 0)
+            if "postcopy-ram" in capabilities and not postcopy_started and status == "active" \
+                    and passes >= POSTCOPY_AFTER:
+                # Il guest sporca la RAM piu' in fretta di quanto si copi: la destinazione
+                # riparte subito e chiede le pagine mancanti alla sorgente
+                await source.execute("migrate-start-postcopy")
+                postcopy_started = True
+            if progress and time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                last_progress = time.monotonic()
+                progress(info)
+            await asyncio.sleep(POLL_INTERVAL)
+        seconds = time.monotonic() - start
+        # La destinazione riparte da sola se la sorgente girava (autostart)
+        for _ in range(25):
+            if (await dest.execute("query-status")).get("status") not in ("inmigrate", "postmigrate"):
+                break
+            await asyncio.sleep(POLL_INTERVAL)
+        if was_running and not (await dest.execute("query-status")).get("running"):
+            await dest.execute("cont")
+        result = summary(info, seconds, capabilities, postcopy_started)
+        result["peak_dirty_rate"] = max(peak_dirty, result["dirty_rate"])
+        result["notes"] = notes
+        result["uri"] = uri
+        return result
+    except BaseException as e:
+        if postcopy_started:
+            # Niente quit ne' cont: il guest e' diviso tra i due processi
+            if isinstance(e, Exception) and not isinstance(e, PostcopyError):
+                raise PostcopyError(f"post-copy interrupted: {e}") from e
+            raise
+        # Pre-copy fallita: QEMU fa ripartire la sorgente, si chiude la destinazione
+        if dest is not None and dest.connected:
+            try:
+                await dest.execute("quit")
+            except (QMPError, OSError, asyncio.TimeoutError):
+                pass
+        if started and was_running and source.connected:
+            try:
+                if not (await source.execute("query-status")).get("running"):
+                    status = (await source.execute("query-migrate")).get("status")
+                    if status in ("failed", "cancelled"):
+                        await source.execute("cont")
+            except (QMPError, OSError, asyncio.TimeoutError):
+                pass
+        raise
+    finally:
+        await source.close()
+        if dest is not None:
+            await dest.close()
+
+
+def summary(info, seconds, capabilities, postcopy):
+    ram = info.get("ram", {})
+    total_ms = info.get("total-time") or seconds * 1000
+    transferred = ram.get("transferred", 0)
+    return {
+        "ram_bytes": ram.get("total", 0),
+        "transferred_bytes": transferred,
+        "seconds": round(total_ms / 1000, 3),
+        "setup_ms": info.get("setup-time", 0),
+        "downtime_ms": info.get("downtime", 0),
+        "throughput": transferred / (total_ms / 1000) if total_ms else 0,
+        "passes": ram.get("dirty-sync-count", 0),
+        "dirty_rate": dirty_rate(info),
+        "multifd": MULTIFD_CHANNELS if "multifd" in capabilities else 0,
+        "postcopy": postcopy
+    }
+
+
+def describe(result):
+    text = (f"{result['ram_bytes'] / (1 << 20):.0f} MiB RAM, {result['transferred_bytes'] / (1 << 20):.0f} MiB sent "
+            f"in {result['seconds']:.2f}s ({result['throughput'] / (1 << 20):.0f} MiB/s, "
+            f"{result['passes']} passes), downtime {result['downtime_ms']} ms, "
+            f"peak dirty rate {result['peak_dirty_rate'] / (1 << 20):.0f} MiB/s")
+    modes = [f"multifd x{result['multifd']}"] if result["multifd"] else []
+    if result["postcopy"]:
+        modes.append("post-copy")
+    if modes:
+        text += f" [{', '.join(modes)}]"
+    if result["notes"]:
+        text += f" ({'; '.join(result['notes'])})"
+    return text
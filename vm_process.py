@@ -0,0 +1,67 @@
+import os
+import itertools
+import subprocess
+import admission
+import serial_log
+import qmp_client
+import overlays
+import vm_command
+
+# VM senza Qt (subprocess + QMP) per CLI, warm pool e fleet. Stessa interfaccia
+# usata da ManagedVM: alive(), stop(), qmp(command, arguments, new_state), overlay.
+
+_ids = itertools.count(1)
+
+
+class VMProcess:
+    def __init__(self, name, config, paths=None, log_path=None, warnings=None):
+        self.name = name
+        self.key = f"{overlays.safe_name(name)}-{os.getpid()}-vm{next(_ids)}"
+        self.ledger = admission.Ledger(vm_command.runtime_path("admission.json"))
+        config = self.ledger.admit(self.key, config, warnings)
+        self.overlay = self.logs = None
+        try:
+            self.config, self.overlay = overlays.prepare(config, name, paths)
+            self.qmp_socket = vm_command.runtime_path(f"{self.key}.qmp")
+            self.logs = serial_log.VMLogs(self.config, name, self.key)
+            self.cmd = vm_command.build_command(self.config, paths, qmp_socket=self.qmp_socket, warnings=warnings,
+                                                **self.logs.sockets())
+            # Senza log_path l'output di QEMU va nella cartella dei log dell'avvio
+            self.log_path = log_path or self.logs.qemu.path
+            with open(self.log_path, "ab") as output:
+                try:
+                    self.process = subprocess.Popen(self.cmd, stdin=subprocess.DEVNULL, stdout=output,
+                                                    stderr=subprocess.STDOUT)
+                except OSError as e:
+                    raise vm_command.LaunchError(f"Failed to start {self.cmd[0]}: {e.strerror}")
+        except vm_command.LaunchError:
+            if self.logs:
+                self.logs.close()
+            overlays.discard(self.overlay)
+            self.ledger.release(self.key)
+            raise
+        self.ledger.attach(self.key, self.process.pid)
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def qmp(self, command, arguments=None, new_state=None):
+        return qmp_client.submit(self.qmp_socket, command, arguments)
+
+    def stop(self, timeout=5):
+        if self.alive():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.logs.close()
+        overlays.discard(self.overlay)
+        self.ledger.release(self.key)
+        if os.path.exists(self.qmp_socket):
+            os.remove(self.qmp_socket)
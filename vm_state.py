@@ -0,0 +1,161 @@
+import os
+import time
+import shlex
+import shutil
+import asyncio
+import profile_manager
+from qmp_client import QMPClient, QMPError
+
+# Sospensione su file (stato dei device + RAM) con QMP "migrate" e ripresa
+# con "-incoming defer" + "migrate-incoming". Con mapped-ram (QEMU >= 9.0) il
+# file e' scritto da piu' canali multifd; altrimenti passa da zstd/gzip via exec:.
+# Il file e' collegato al profilo nella chiave "saved_state".
+
+STATE_DIR = "states"
+MAPPED_RAM = "mapped-ram"
+MULTIFD_CHANNELS = 4
+POLL_INTERVAL = 0.2
+MIGRATE_TIMEOUT = 3600
+
+
+def compressor():
+    return "zstd" if shutil.which("zstd") else "gzip"
+
+
+def state_path(name, fmt):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    suffix = {MAPPED_RAM: "", "zstd": ".zst", "gzip": ".gz"}[fmt]
+    return os.path.abspath(os.path.join(STATE_DIR, f"{os.path.splitext(name)[0]}.vmstate{suffix}"))
+
+
+def outgoing_uri(fmt, path):
+    if fmt == MAPPED_RAM:
+        return f"file:{path}"
+    return f"exec:{fmt} -c > {shlex.quote(path)}"
+
+
+def incoming_uri(fmt, path):
+    if fmt == MAPPED_RAM:
+        return f"file:{path}"
+    return f"exec:{fmt} -dc {shlex.quote(path)}"
+
+
+async def set_mapped_ram(client):
+    await client.execute("migrate-set-capabilities", {"capabilities": [
+        {"capability": MAPPED_RAM, "state": True},
+        {"capability": "multifd", "state": True}
+    ]})
+    await client.execute("migrate-set-parameters", {"multifd-channels": MULTIFD_CHANNELS})
+
+
+async def wait_migration(client, progress=None, timeout=MIGRATE_TIMEOUT):
+    # Ritorna l'ultimo query-migrate con stato "completed"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = await client.execute("query-migrate")
+        status = info.get("status")
+        if status == "completed":
+            return info
+        if status in ("failed", "cancelled"):
+            raise QMPError(f"migration {status}: {info.get('error-desc', 'no details')}")
+        if progress and "ram" in info:
+            progress(info["ram"].get("transferred", 0), info["ram"].get("total", 0))
+        await asyncio.sleep(POLL_INTERVAL)
+    raise QMPError("migration timed out")
+
+
+def summary(info, path, seconds):
+    ram = info.get("ram", {}).get("total", 0)
+    return {
+        "file": path,
+        "file_bytes": os.path.getsize(path) if os.path.exists(path) else 0,
+        "ram_bytes": ram,
+        "seconds": round(seconds, 3),
+        "throughput": ram / seconds if seconds > 0 else 0
+    }
+
+
+async def suspend(qmp_socket, name, progress=None):
+    # Ferma il guest, salva lo stato su file e chiude QEMU
+    client = QMPClient(qmp_socket)
+    try:
+        await client.connect()
+        capabilities = {c["capability"] for c in await client.execute("query-migrate-capabilities")}
+        fmt = MAPPED_RAM if MAPPED_RAM in capabilities else compressor()
+        path = state_path(name, fmt)
+        if os.path.exists(path):
+            os.remove(path)
+        if fmt == MAPPED_RAM:
+            await set_mapped_ram(client)
+        start = time.monotonic()
+        await client.execute("stop")
+        try:
+            await client.execute("migrate", {"uri": outgoing_uri(fmt, path)})
+            info = await wait_migration(client, progress)
+        except QMPError:
+            await client.execute("cont")
+            raise
+        result = summary(info, path, time.monotonic() - start)
+        result["format"] = fmt
+        result["saved_at"] = time.time()
+        try:
+            await client.execute("quit")
+        except QMPError:
+            pass
+        return result
+    finally:
+        await client.close()
+
+
+async def restore(qmp_socket, state, progress=None, attempts=50, delay=0.2):
+    # QEMU avviato con "-incoming defer": si configura e si avvia la migrazione in ingresso
+    for _ in range(attempts):
+        client = QMPClient(qmp_socket)
+        try:
+            await client.connect()
+            break
+        except (OSError, asyncio.TimeoutError, QMPError):
+            await client.close()
+            await asyncio.sleep(delay)
+    else:
+        raise QMPError(f"could not reach {qmp_socket} to restore {state['file']}")
+    try:
+        if state["format"] == MAPPED_RAM:
+            await set_mapped_ram(client)
+        start = time.monotonic()
+        await client.execute("migrate-incoming", {"uri": incoming_uri(state["format"], state["file"])})
+        info = await wait_migration(client, progress)
+        # Il guest era in pausa al salvataggio: si riprende qui
+        if not (await client.execute("query-status")).get("running"):
+            await client.execute("cont")
+        return summary(info, state["file"], time.monotonic() - start)
+    finally:
+        await client.close()
+
+
+def describe(result):
+    return (f"{result['ram_bytes'] / (1 << 20):.0f} MiB RAM in {result['seconds']:.2f}s "
+            f"({result['throughput'] / (1 << 20):.0f} MiB/s), file {result['file_bytes'] / (1 << 20):.0f} MiB")
+
+
+def saved_state(profile_file):
+    profile = profile_manager.load_profile(profile_file)
+    state = profile.get("saved_state") if profile else None
+    return state if state and os.path.exists(state["file"]) else None
+
+
+def link(profile_file, result, config):
+    # Lo stato vale solo con la configurazione (e il disco) con cui e' stato salvato
+    profile = profile_manager.load_profile(profile_file) or {}
+    profile["saved_state"] = dict(result, config=config)
+    profile_manager.save_profile(profile_file, profile)
+
+
+def unlink(profile_file, remove=True):
+    profile = profile_manager.load_profile(profile_file)
+    state = profile.pop("saved_state", None) if profile else None
+    if state is None:
+        return
+    profile_manager.save_profile(profile_file, profile)
+    if remove and os.path.exists(state["file"]):
+        os.remove(state["file"])
@@ -0,0 +1,134 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from qmp_client import QMPClient, QMPError, shared_loop
+
+DEFAULT_INTERVAL = 1.0
+HISTORY = 300
+
+
+def blockstats_totals(blockstats):
+    totals = {"rd_bytes": 0, "wr_bytes": 0, "rd_operations": 0, "wr_operations": 0}
+    for device in blockstats or []:
+        stats = device.get("stats", {})
+        for key in totals:
+            totals[key] += stats.get(key, 0)
+    return totals
+
+
+def vm_stats_values(result):
+    # query-stats target=vm: somma dei contatori scalari per nome
+    values = {}
+    for provider in result or []:
+        for stat in provider.get("stats", []):
+            value = stat.get("value")
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                name = f"{provider.get('provider', 'stats')}.{stat['name']}"
+                values[name] = values.get(name, 0) + value
+    return values
+
+
+class VMStatsPoller:
+    def __init__(self, interval=DEFAULT_INTERVAL, history=HISTORY, loop=None):
+        self.interval = interval
+        self.history = history
+        self._loop = loop
+        self.series = {}
+        self.vcpu_threads = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    @property
+    def qmp_loop(self):
+        # Il thread del loop parte solo quando serve davvero
+        if self._loop is None:
+            self._loop = shared_loop()
+        return self._loop
+
+    def set_interval(self, interval):
+        self.interval = max(0.1, float(interval))
+
+    def add_vm(self, vm_id, socket_path, on_event=None):
+        # on_event(message): eventi QMP, chiamato dal thread del loop
+        if vm_id in self._tasks:
+            return
+        with self._lock:
+            self.series[vm_id] = {}
+        self._tasks[vm_id] = self.qmp_loop.submit(self._poll(vm_id, socket_path, on_event))
+
+    def remove_vm(self, vm_id):
+        task = self._tasks.pop(vm_id, None)
+        if task:
+            task.cancel()
+
+    def forget(self, vm_id):
+        self.remove_vm(vm_id)
+        with self._lock:
+            self.series.pop(vm_id, None)
+            self.vcpu_threads.pop(vm_id, None)
+
+    def stop(self):
+        for vm_id in list(self._tasks):
+            self.remove_vm(vm_id)
+
+    def snapshot(self, vm_id):
+        with self._lock:
+            return {name: list(points) for name, points in self.series.get(vm_id, {}).items()}
+
+    def record(self, vm_id, now, values):
+        with self._lock:
+            series = self.series.get(vm_id)
+            if series is None:
+                return
+            for name, value in values.items():
+                points = series.get(name)
+                if points is None:
+                    points = series[name] = deque(maxlen=self.history)
+                points.append((now, value))
+
+    async def _connect(self, socket_path):
+        while True:
+            client = QMPClient(socket_path)
+            try:
+                return await client.connect()
+            except (OSError, asyncio.TimeoutError, QMPError, ValueError):
+                await client.close()
+                await asyncio.sleep(self.interval)
+
+    async def _query(self, client, command, arguments=None):
+        try:
+            return await client.execute(command, arguments)
+        except (QMPError, OSError):
+            # Comando non supportato (es. query-stats con tcg, niente balloon)
+            return None
+
+    async def _poll(self, vm_id, socket_path, on_event=None):
+        client = await self._connect(socket_path)
+        if on_event:
+            on_event({"event": "CONNECTED"})
+            client.event_handlers.append(on_event)
+        previous = None
+        try:
+            while client.connected:
+                now = time.monotonic()
+                values = {}
+                cpus = await self._query(client, "query-cpus-fast")
+                if cpus is not None:
+                    values["vcpus"] = len(cpus)
+                    with self._lock:
+                        self.vcpu_threads[vm_id] = [cpu.get("thread-id") for cpu in cpus]
+                totals = blockstats_totals(await self._query(client, "query-blockstats"))
+                if previous is not None:
+                    elapsed = max(now - previous[0], 1e-6)
+                    for key, value in totals.items():
+                        values[f"{key}/s"] = (value - previous[1][key]) / elapsed
+                previous = (now, totals)
+                values.update(vm_stats_values(await self._query(client, "query-stats", {"target": "vm"})))
+                balloon = await self._query(client, "query-balloon")
+                if balloon:
+                    values["balloon_mb"] = balloon.get("actual", 0) / (1 << 20)
+                self.record(vm_id, now, values)
+                await asyncio.sleep(self.interval)
+        finally:
+            await client.close()
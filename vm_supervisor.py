@@ -0,0 +1,530 @@
+import os
+import codecs
+import asyncio
+import itertools
+from PyQt6.QtCore import QObject, QProcess, pyqtSignal
+from console_buffer import ConsoleBuffer
+import qmp_client
+import cpu_placement
+import vm_command
+import qemu_config
+import overlays
+from vm_stats import VMStatsPoller
+from host_metrics import HostSampler
+
+STARTING = "starting"
+RUNNING = "running"
+PAUSED = "paused"
+EXITED = "exited"
+# Attesa massima del qom-get sulla sorgente prima di avviare la destinazione
+MACHINE_TIMEOUT = 5.0
+
+
+class ManagedVM(QObject):
+    state_changed = pyqtSignal(object)
+    output_received = pyqtSignal(object)
+    # Emessi dal thread del loop QMP, consegnati nel thread della GUI
+    qmp_state = pyqtSignal(str)
+    message = pyqtSignal(str)
+    serial_ready = pyqtSignal()
+
+    def __init__(self, vm_id, name, cmd, qmp_socket=None, config=None, parent=None):
+        super().__init__(parent)
+        self.vm_id = vm_id
+        self.name = name
+        self.cmd = cmd
+        self.qmp_socket = qmp_socket
+        self.config = config or {}
+        self.state = STARTING
+        self.exit_code = None
+        self.console = ConsoleBuffer()
+        self.placement = None
+        self.placement_key = None
+        self.pinned = False
+        self.overlay = None
+        self.restore_state = None
+        # Configurazione e binari con cui e' partito QEMU (overlay compreso): la destinazione
+        # di una migrazione riparte da qui. migration: opzioni finche' la migrazione non parte
+        self.launch_config = None
+        self.paths = None
+        self.migration = None
+        self.migrating = False
+        self.admission_key = None
+        self.logs = None
+        # Tap sullo stream della seriale: serve alla console (se agganciata) e alle milestone
+        self.serial_tap = None
+        self.serial_attached = False
+        self._serial_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # Moduli dei soli avvii (e della migrazione, della sospensione...): fuori dall'avvio della GUI
+        import boot_timing
+        patterns = boot_timing.milestones(self.config)
+        self.boot = boot_timing.BootTimer(patterns) if patterns else None
+
+        self.process = QProcess(self)
+        self.process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+        self.process.readyReadStandardOutput.connect(self.read_output)
+        self.process.started.connect(lambda: self.set_state(RUNNING))
+        self.process.finished.connect(self.on_finished)
+        self.process.errorOccurred.connect(self.on_error)
+        self.qmp_state.connect(self.set_state)
+        self.message.connect(self.log)
+        self.serial_ready.connect(self.read_serial)
+
+    @property
+    def pid(self):
+        pid = self.process.processId()
+        return pid or None
+
+    def alive(self):
+        return self.state != EXITED
+
+    def label(self):
+        if self.state == EXITED:
+            return f"{self.name} #{self.vm_id} [{self.state}, code {self.exit_code}]"
+        return f"{self.name} #{self.vm_id} [{self.state}]"
+
+    def set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.state_changed.emit(self)
+
+    def log(self, text):
+        self.console.write(text)
+        self.output_received.emit(self)
+
+    def start(self):
+        if self.boot:
+            self.boot.restart()
+            # Le milestone sono sulla seriale anche con la console staccata
+            self.tap_serial()
+        self.process.start(self.cmd[0], self.cmd[1:])
+
+    def read_output(self):
+        # Solo stdout/stderr di QEMU: la seriale arriva da read_serial
+        data = self.process.readAllStandardOutput().data()
+        self.console.feed(data)
+        if self.logs:
+            self.logs.qemu.write(data)
+        self.feed_boot(data)
+        self.output_received.emit(self)
+
+    def feed_boot(self, data):
+        if self.boot and self.boot.feed(data) and self.boot.done():
+            import boot_timing
+            result = self.boot.result()
+            self.boot = None
+            boot_timing.record(self.name, result)
+            self.console.write(f"\nBoot timing: {boot_timing.describe(result)}\n")
+            if not self.serial_attached:
+                self.detach_serial()
+
+    def tap_serial(self):
+        if self.serial_tap is None and self.logs and self.logs.serial:
+            # notify arriva dal thread del loop: il segnale consegna read_serial nel thread della GUI
+            self.serial_tap = self.logs.serial.attach(self.serial_ready.emit)
+
+    def attach_serial(self):
+        if not self.logs or not self.logs.serial:
+            return False
+        self.serial_attached = True
+        self.tap_serial()
+        return True
+
+    def detach_serial(self):
+        self.serial_attached = False
+        if self.serial_tap is not None and not self.boot:
+            self.logs.serial.detach(self.serial_tap)
+            self.serial_tap = None
+
+    def read_serial(self):
+        if self.serial_tap is None:
+            return
+        data, skipped = self.serial_tap.drain()
+        if self.serial_attached:
+            if skipped:
+                self.console.write(f"\n[{skipped} bytes of serial output skipped]\n")
+            self.console.write(self._serial_decoder.decode(data))
+        self.feed_boot(data)
+        self.output_received.emit(self)
+
+    def on_finished(self, exit_code, exit_status):
+        self.console.finish()
+        if self.logs:
+            # La seriale resta agganciata fino all'EOF del socket
+            self.logs.close()
+        self.exit_code = exit_code if exit_status == QProcess.ExitStatus.NormalExit else -1
+        if self.qmp_socket and os.path.exists(self.qmp_socket):
+            os.remove(self.qmp_socket)
+        self.set_state(EXITED)
+
+    def on_error(self, error):
+        if error == QProcess.ProcessError.FailedToStart:
+            text = f"Failed to start {self.cmd[0]}: {self.process.errorString()}\n"
+            self.console.write(text)
+            self.output_received.emit(self)
+            if self.logs:
+                self.logs.close()
+            self.exit_code = -1
+            self.set_state(EXITED)
+
+    def qmp(self, command, arguments=None, new_state=None):
+        future = qmp_client.submit(self.qmp_socket, command, arguments)
+
+        def done(f):
+            if f.cancelled() or f.exception() is not None:
+                self.message.emit(f"QMP {command} failed: {f.exception()}\n")
+            elif new_state:
+                self.qmp_state.emit(new_state)
+        future.add_done_callback(done)
+        return future
+
+    def pause(self):
+        if self.state == RUNNING and self.qmp_socket:
+            self.qmp("stop", new_state=PAUSED)
+
+    def resume(self):
+        if self.state == PAUSED and self.qmp_socket:
+            self.qmp("cont", new_state=RUNNING)
+
+    def stop(self):
+        if self.state != EXITED:
+            self.process.terminate()
+
+    def kill(self):
+        if self.state != EXITED:
+            self.process.kill()
+
+
+class VMSupervisor(QObject):
+    vm_added = pyqtSignal(object)
+    vm_changed = pyqtSignal(object)
+    vm_removed = pyqtSignal(object)
+    # Dal thread QMP: (destinazione, sorgente, statistiche o eccezione)
+    migration_done = pyqtSignal(object, object, object)
+    # Dal thread QMP: (sorgente, migrazione in preparazione, tipo di macchina o eccezione)
+    migration_ready = pyqtSignal(object, object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.vms = {}
+        self._ids = itertools.count(1)
+        self.stats = VMStatsPoller()
+        # /proc dei processi QEMU; il file .prom e' per il textfile collector di node_exporter
+        self.host_stats = HostSampler(prom_path=vm_command.runtime_path("host_metrics.prom"))
+        self.ledger = None
+        self.placement = None
+        self.migration_done.connect(self.on_migration_done)
+        self.migration_ready.connect(self.launch_destination)
+        # Avvii in attesa di risorse, in ordine di arrivo: li riprova launch_queued()
+        self.queued = []
+
+    def launch(self, name, config, paths=None, warnings=None, restore=None, migration=None):
+        # restore: stato salvato da vm_state.suspend, riparte con la stessa configurazione
+        # migration: opzioni di vm_migrate piu' "source" e "launch_config" (vedi migrate)
+        import admission
+        import serial_log
+        if restore:
+            config = restore["config"]
+        vm_command.preflight(config)
+        if self.ledger is None:
+            self.ledger = admission.Ledger(vm_command.runtime_path("admission.json"))
+        vm_id = next(self._ids)
+        key = f"{os.getpid()}-vm{vm_id}"
+        # Durante una migrazione le due copie esistono insieme: la RAM va contata due volte
+        config = self.ledger.admit(key, config, warnings, resize=not (restore or migration))
+        logs = overlay = None
+        try:
+            qmp_socket = vm_command.runtime_path(f"{key}.qmp")
+            if migration:
+                # Stesso disco (o overlay) della sorgente: QEMU passa i lock a fine migrazione
+                launch_config, overlay = migration["launch_config"], None
+            else:
+                launch_config, overlay = overlays.prepare(config, name, paths)
+            logs = serial_log.VMLogs(launch_config, name, key)
+            cmd = vm_command.build_command(launch_config, paths, qmp_socket=qmp_socket, warnings=warnings,
+                                           incoming="defer" if restore or migration else None, **logs.sockets())
+            if migration:
+                import vm_migrate
+                cmd = vm_migrate.numa_prefix(launch_config, migration["node"], warnings) + cmd
+        except (vm_command.LaunchError, OSError) as e:
+            if logs:
+                logs.close()
+            overlays.discard(overlay)
+            self.ledger.release(key)
+            if isinstance(e, OSError):
+                raise vm_command.LaunchError(f"Cannot prepare the launch: {e}") from e
+            raise
+        vm = ManagedVM(vm_id, name, cmd, qmp_socket, config, self)
+        vm.overlay = overlay
+        vm.launch_config = launch_config
+        vm.paths = paths
+        vm.logs = logs
+        if vm_command.from_profile(config)["serial_console"]:
+            vm.attach_serial()
+        vm.restore_state = restore
+        vm.migration = migration
+        vm.admission_key = key
+        if restore or migration:
+            # Una ripresa da file o una migrazione non e' un boot
+            vm.boot = None
+        self.allocate_cpus(vm, warnings, migration["node"] if migration else None)
+        vm.state_changed.connect(self.on_state_changed)
+        self.vms[vm.vm_id] = vm
+        self.vm_added.emit(vm)
+        vm.start()
+        return vm
+
+    def enqueue(self, name, config, paths=None, restore=None):
+        self.queued.append((name, config, paths, restore))
+
+    def launch_queued(self):
+        # Ritorna (nome, vm o errore) per ogni avvio uscito dalla coda
+        import admission
+        results = []
+        while self.queued:
+            name, config, paths, restore = self.queued[0]
+            warnings = []
+            try:
+                vm = self.launch(name, config, paths, warnings, restore)
+            except admission.Deferred:
+                break
+            except vm_command.LaunchError as e:
+                vm = e
+            else:
+                for warning in warnings:
+                    vm.console.write(f"WARNING: {warning}\n")
+            self.queued.pop(0)
+            results.append((name, vm))
+        return results
+
+    def allocator(self):
+        if self.placement is None:
+            self.placement = cpu_placement.PlacementAllocator(vm_command.runtime_path("placement.json"))
+        return self.placement
+
+    def allocate_cpus(self, vm, warnings=None, node=None):
+        # node: la destinazione di una migrazione va su quel nodo NUMA anche senza politica di pinning
+        config = vm_command.from_profile(vm.config)
+        policy = config["cpu_policy"]
+        if node is not None and policy in (cpu_placement.NONE, cpu_placement.SHARED):
+            policy = cpu_placement.NUMA
+        if policy == cpu_placement.NONE or not str(config["cpu"]).strip().isdigit():
+            return
+        vm.placement_key = f"{os.getpid()}-vm{vm.vm_id}"
+        vm.placement = self.allocator().allocate(vm.placement_key, int(config["cpu"]), policy, node, warnings)
+        if vm.placement is None and warnings is not None:
+            where = f" on node {node}" if node is not None else ""
+            warnings.append(f"Not enough free host CPUs{where} for '{policy}' placement, vCPUs will not be pinned")
+
+    def pin_cpus(self, vm):
+        vm.pinned = True
+        allocator, key = self.allocator(), vm.placement_key
+        warnings = []
+        future = qmp_client.shared_loop().submit(cpu_placement.pin_vm(vm.qmp_socket, vm.placement,
+                                                                      warnings=warnings))
+
+        def done(f):
+            if f.cancelled():
+                return
+            if f.exception() is not None:
+                vm.message.emit(f"vCPU pinning failed: {f.exception()}\n")
+            else:
+                assignment = allocator.record_threads(key, f.result(), warnings) or vm.placement
+                for warning in warnings:
+                    vm.message.emit(f"WARNING: {warning}\n")
+                pairs = ", ".join(f"{tid}->{sorted(cpus)}" for tid, cpus in zip(f.result(), assignment))
+                vm.message.emit(f"vCPU threads pinned: {pairs}\n")
+        future.add_done_callback(done)
+
+    def suspend(self, vm):
+        if vm.state not in (RUNNING, PAUSED) or not vm.qmp_socket:
+            return
+        if vm.overlay or vm.config.get("snapshot"):
+            vm.log("Cannot suspend a snapshot launch: its overlay is discarded on exit\n")
+            return
+        if not vm.name.endswith(".json"):
+            vm.log("Only VMs launched from a saved profile can be suspended\n")
+            return
+        vm.log("Suspending to file...\n")
+        import vm_state
+        future = qmp_client.shared_loop().submit(vm_state.suspend(vm.qmp_socket, vm.name))
+
+        def done(f):
+            if f.cancelled():
+                return
+            if f.exception() is not None:
+                vm.message.emit(f"Suspend failed: {f.exception()}\n")
+                return
+            vm_state.link(vm.name, f.result(), vm.config)
+            vm.message.emit(f"Suspended to {f.result()['file']}: {vm_state.describe(f.result())}\n")
+        future.add_done_callback(done)
+
+    def restore(self, vm):
+        state, vm.restore_state = vm.restore_state, None
+        import vm_state
+        future = qmp_client.shared_loop().submit(vm_state.restore(vm.qmp_socket, state))
+
+        def done(f):
+            if f.cancelled():
+                return
+            if f.exception() is not None:
+                vm.message.emit(f"Resume from {state['file']} failed: {f.exception()}\n")
+                return
+            # Il disco e' andato avanti: lo stato salvato non e' piu' valido
+            vm_state.unlink(vm.name)
+            vm.message.emit(f"Resumed from {state['file']}: {vm_state.describe(f.result())}\n")
+        future.add_done_callback(done)
+
+    def migrate(self, vm, options=None, warnings=None):
+        # Chiede alla sorgente il tipo di macchina senza bloccare la GUI, poi avvia la
+        # destinazione (launch_destination); la migrazione vera parte quando il nuovo QEMU
+        # e' su (start_migration). Gli errori successivi vanno nella console della sorgente
+        import vm_migrate
+        options = dict(vm_migrate.DEFAULT_OPTIONS, **(options or {}))
+        if vm.state not in (RUNNING, PAUSED) or not vm.qmp_socket or vm.launch_config is None:
+            raise vm_command.LaunchError("Only a running VM started by this launcher can be migrated")
+        if vm.migrating or vm.migration or vm.restore_state:
+            raise vm_command.LaunchError("This VM is already being migrated or restored")
+        errors = vm_migrate.check(vm.launch_config, options)
+        if errors:
+            raise vm_command.LaunchError("\n".join(errors))
+        config = vm_command.from_profile(vm.config)
+        node = options["node"]
+        if node == "auto":
+            source_node = self.allocator().node_of(set().union(*vm.placement)) if vm.placement else None
+            node = self.allocator().least_loaded_node(int(config["cpu"]) if str(config["cpu"]).isdigit() else 1,
+                                                      exclude=source_node)
+        paths = dict(vm.paths) if vm.paths is not None else None
+        if options["binary"]:
+            if paths is None:
+                paths = qemu_config.load_paths()
+            paths[vm_command.arch_key(config["arch"])] = options["binary"]
+        pending = dict(options, node=node, paths=paths, warnings=warnings if warnings is not None else [])
+        vm.migrating = True
+        future = qmp_client.shared_loop().submit(
+            asyncio.wait_for(vm_migrate.machine_type(vm.qmp_socket), MACHINE_TIMEOUT))
+
+        def done(f):
+            if not f.cancelled():
+                self.migration_ready.emit(vm, pending, f.exception() or f.result())
+        future.add_done_callback(done)
+
+    def launch_destination(self, vm, pending, machine):
+        import vm_migrate
+        if isinstance(machine, BaseException):
+            vm.migrating = False
+            vm.log(f"Migration failed: cannot query the running VM: {str(machine) or 'timed out'}\n")
+            return
+        if vm.state not in (RUNNING, PAUSED):
+            vm.migrating = False
+            return
+        node, paths, warnings = pending.pop("node"), pending.pop("paths"), pending.pop("warnings")
+        migration = dict(pending, node=node, source=vm,
+                         launch_config=vm_migrate.destination_config(vm.launch_config, machine, node))
+        try:
+            dest = self.launch(vm.name, vm.config, paths, warnings, migration=migration)
+        except vm_command.LaunchError as e:
+            vm.migrating = False
+            vm.log(f"Migration failed: {e}\n")
+            return
+        for warning in warnings:
+            dest.console.write(f"WARNING: {warning}\n")
+        dest.console.write(f"Migration destination of #{vm.vm_id}, command:\n{' '.join(dest.cmd)}\n")
+        dest.console.write(f"Logs in {dest.logs.directory}\n")
+        where = f" on NUMA node {node}" if node is not None else ""
+        vm.log(f"Migrating to #{dest.vm_id}{where} ({migration['transport']}"
+               f"{', multifd' if migration['multifd'] else ''}{', post-copy' if migration['postcopy'] else ''})\n")
+
+    def start_migration(self, dest):
+        migration, dest.migration = dest.migration, None
+        source = migration["source"]
+        import vm_migrate
+        uri = vm_migrate.migration_uri(migration["transport"], dest.admission_key)
+        future = qmp_client.shared_loop().submit(vm_migrate.migrate(
+            source.qmp_socket, dest.qmp_socket, uri, migration,
+            lambda info: source.message.emit(vm_migrate.describe_progress(info) + "\n")))
+
+        def done(f):
+            if not f.cancelled():
+                self.migration_done.emit(dest, source, f.exception() or f.result())
+        future.add_done_callback(done)
+
+    def on_migration_done(self, dest, source, result):
+        import vm_migrate
+        source.migrating = False
+        if isinstance(result, vm_migrate.PostcopyError):
+            # La RAM aggiornata e' nella destinazione: restano accese entrambe
+            source.log(f"Migration failed: {result}; the guest is split between #{source.vm_id} and "
+                       f"#{dest.vm_id}, recover with migrate-recover on #{dest.vm_id}\n")
+            dest.log(f"Migration from #{source.vm_id} failed in post-copy: {result}\n")
+            return
+        if isinstance(result, BaseException):
+            source.log(f"Migration failed: {result}\n")
+            dest.log(f"Migration from #{source.vm_id} failed: {result}\n")
+            # Il guest e' ancora nella sorgente: all'uscita la destinazione libera
+            # ammissione e CPU (on_state_changed)
+            dest.kill()
+            return
+        # L'overlay ora e' della destinazione: all'uscita la sorgente non lo deve cancellare
+        dest.overlay, source.overlay = source.overlay, None
+        text = f"Migrated #{source.vm_id} -> #{dest.vm_id}: {vm_migrate.describe(result)}\n"
+        source.log(text)
+        dest.log(text)
+        source.stop()
+
+    def on_state_changed(self, vm):
+        if vm.state == RUNNING:
+            self.stats.add_vm(vm.vm_id, vm.qmp_socket, vm.boot.event if vm.boot else None)
+            if vm.pid:
+                self.host_stats.add(vm.vm_id, vm.pid, vm.name)
+                self.host_stats.start()
+            if vm.admission_key and vm.pid:
+                self.ledger.attach(vm.admission_key, vm.pid)
+            if vm.restore_state:
+                self.restore(vm)
+            if vm.migration:
+                self.start_migration(vm)
+            if vm.placement and not vm.pinned:
+                self.pin_cpus(vm)
+        elif vm.state == EXITED:
+            if vm.migration:
+                # Destinazione uscita prima di arrivare a migrare: la sorgente resta com'era
+                vm.migration["source"].migrating = False
+                vm.migration["source"].log(f"Migration destination #{vm.vm_id} exited before the migration\n")
+                vm.migration = None
+            self.stats.remove_vm(vm.vm_id)
+            self.host_stats.remove(vm.vm_id)
+            if vm.placement_key:
+                self.placement.release(vm.placement_key)
+                vm.placement_key = None
+            overlays.discard(vm.overlay)
+            vm.overlay = None
+            if vm.admission_key:
+                self.ledger.release(vm.admission_key)
+                vm.admission_key = None
+        self.vm_changed.emit(vm)
+
+    def get(self, vm_id):
+        return self.vms.get(vm_id)
+
+    def running(self):
+        return [vm for vm in self.vms.values() if vm.state != EXITED]
+
+    def remove_exited(self):
+        for vm in [vm for vm in self.vms.values() if vm.state == EXITED]:
+            del self.vms[vm.vm_id]
+            self.stats.forget(vm.vm_id)
+            self.host_stats.forget(vm.vm_id)
+            self.vm_removed.emit(vm)
+            vm.deleteLater()
+
+    def shutdown(self, timeout_ms=3000):
+        self.stats.stop()
+        self.host_stats.stop()
+        vms = self.running()
+        for vm in vms:
+            vm.stop()
+        for vm in vms:
+            if not vm.process.waitForFinished(timeout_ms):
+                vm.kill()
+                vm.process.waitForFinished(1000)
@@ -0,0 +1,126 @@
+from PyQt6.QtWidgets import (
+    QLabel, QLineEdit, QPushButton, QFileDialog, QVBoxLayout, QComboBox, QWizard, QWizardPage
+)
+
+
+class VMWizard(QWizard):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("New VM Configuration")
+        self.setWizardStyle(QWizard.WizardStyle.ModernStyle)
+
+        self.addPage(self.architecture_page())
+        self.addPage(self.resources_page())
+        self.addPage(self.disk_page())
+        self.addPage(self.iso_page())
+        self.addPage(self.bios_page())
+        self.addPage(self.network_page())
+        self.addPage(self.summary_page())
+
+    def architecture_page(self):
+        page = QWizardPage()
+        page.setTitle("Architecture")
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Select Architecture:"))
+        self.arch_combo = QComboBox()
+        self.arch_combo.addItems(["x86_64", "arm", "aarch64", "riscv64"])
+        layout.addWidget(self.arch_combo)
+        page.setLayout(layout)
+        return page
+
+    def resources_page(self):
+        page = QWizardPage()
+        page.setTitle("Resources")
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("RAM (MB):"))
+        self.ram_input = QLineEdit()
+        layout.addWidget(self.ram_input)
+        layout.addWidget(QLabel("CPU cores:"))
+        self.cpu_input = QLineEdit()
+        layout.addWidget(self.cpu_input)
+        page.setLayout(layout)
+        return page
+
+    def disk_page(self):
+        page = QWizardPage()
+        page.setTitle("Disk")
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Disk path:"))
+        self.disk_input = QLineEdit()
+        browse_btn = QPushButton("Sfoglia...")
+        browse_btn.clicked.connect(self.browse_disk)
+        layout.addWidget(self.disk_input)
+        layout.addWidget(browse_btn)
+        page.setLayout(layout)
+        return page
+
+    def iso_page(self):
+        page = QWizardPage()
+        page.setTitle("ISO")
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Iso path:"))
+        self.iso_input = QLineEdit()
+        browse_btn = QPushButton("Browse...")
+        browse_btn.clicked.connect(self.browse_iso)
+        layout.addWidget(self.iso_input)
+        layout.addWidget(browse_btn)
+        page.setLayout(layout)
+        return page
+        
+    def bios_page(self):
+        page = QWizardPage()
+        page.setTitle("BIOS / Firmware")
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("BIOS/UEFI path (optional):"))
+        self.bios_input = QLineEdit()
+        browse_btn = QPushButton("Browse...")
+        browse_btn.clicked.connect(self.browse_bios)
+        layout.addWidget(self.bios_input)
+        layout.addWidget(browse_btn)
+        page.setLayout(layout)
+        return page
+
+    def network_page(self):
+        page = QWizardPage()
+        page.setTitle("Network")
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Network mode:"))
+        self.net_combo = QComboBox()
+        self.net_combo.addItems(["user", "tap", "bridge"])
+        layout.addWidget(self.net_combo)
+        
+        page.setLayout(layout)
+        return page
+
+    def summary_page(self):
+        page = QWizardPage()
+        page.setTitle("Summary")
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Click End to load VM..."))
+        page.setLayout(layout)
+        return page
+
+    def browse_disk(self):
+        file, _ = QFileDialog.getOpenFileName(self, "Select disk image")
+        if file:
+            self.disk_input.setText(file)
+    def browse_iso(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select ISO Image")
+        if file_path:
+            self.iso_input.setText(file_path)
+    def browse_bios(self):
+        file, _ = QFileDialog.getOpenFileName(self, "Select BIOS/UEFI")
+        if file:
+            self.bios_input.setText(file)
+
+    def get_vm_config(self):
+        return {
+            "arch": self.arch_combo.currentText(),
+            "ram": self.ram_input.text(),
+            "cpu": self.cpu_input.text(),
+            "disk": self.disk_input.text(),
+            "iso": self.iso_input.text(),
+            "bios": self.bios_input.text(),
+            "net": self.net_combo.currentText(),
+          
+        }
@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import concurrent.futures
+import qmp_client
+import overlays
+import vm_command
+import boot_timing
+from vm_process import VMProcess
+
+# Pool di VM gia' avviate e messe in pausa (QMP "stop"), ognuna sul proprio
+# overlay. handout() ne riprende una con "cont" e maintain() riempie il pool.
+# Le istanze arrivano da spawn(): VMProcess per la CLI, ManagedVM nella GUI.
+# Un'istanza si mette in pausa quando la seriale dice che il boot e' finito:
+# milestone del profilo raggiunte o, senza milestone, console ferma da
+# SETTLE_SECONDS. boot_seconds e' solo il limite (e l'unico segnale senza seriale).
+
+BOOTING = "booting"
+PAUSING = "pausing"
+READY = "ready"
+
+BOOT_SECONDS = 120.0
+SETTLE_SECONDS = 3.0
+QMP_TIMEOUT = 10.0
+QMP_ERRORS = (qmp_client.QMPError, OSError, asyncio.TimeoutError, concurrent.futures.TimeoutError)
+
+
+class PoolEntry:
+    def __init__(self, vm, patterns=()):
+        self.vm = vm
+        self.state = BOOTING
+        self.started = time.monotonic()
+        self.ready_at = None
+        self.pausing = None
+        logs = getattr(vm, "logs", None)
+        self.serial = logs.serial if logs else None
+        self.tap = self.serial.attach() if self.serial else None
+        self.timer = boot_timing.BootTimer(patterns, start=self.started) if patterns else None
+        self.last_output = None
+
+    def booted(self, now, boot_seconds):
+        if self.tap is not None:
+            data, _ = self.tap.drain()
+            if data:
+                self.last_output = now
+                if self.timer:
+                    self.timer.feed(data, now)
+            if self.timer is not None and self.timer.done():
+                return True
+            if self.timer is None and self.last_output is not None and now - self.last_output >= SETTLE_SECONDS:
+                return True
+        return now - self.started >= boot_seconds
+
+    def untap(self):
+        if self.tap is not None:
+            self.serial.detach(self.tap)
+            self.tap = None
+
+
+class WarmPool:
+    def __init__(self, name, profile, spawn=None, size=1, boot_seconds=BOOT_SECONDS, max_idle=None, paths=None):
+        self.name = name
+        # Il template e' il profilo JSON; ogni istanza gira su un overlay effimero
+        self.config = dict(profile, snapshot=True)
+        self.spawn = spawn or (lambda: VMProcess(name, self.config, paths))
+        self.size = size
+        self.boot_seconds = boot_seconds
+        self.max_idle = max_idle
+        self.entries = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.failures = 0
+        self.lock = threading.RLock()
+        self._stop = threading.Event()
+
+    def resize(self, size):
+        with self.lock:
+            self.size = max(0, size)
+        self.maintain()
+
+    def stats(self):
+        with self.lock:
+            states = [entry.state for entry in self.entries]
+            return {
+                "profile": self.name,
+                "size": self.size,
+                "ready": states.count(READY),
+                "booting": states.count(BOOTING) + states.count(PAUSING),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "failures": self.failures
+            }
+
+    def _evict(self, entry):
+        self.entries.remove(entry)
+        entry.untap()
+        entry.vm.stop()
+
+    def maintain(self):
+        now = time.monotonic()
+        with self.lock:
+            for entry in list(self.entries):
+                if not entry.vm.alive():
+                    self.entries.remove(entry)
+                    entry.untap()
+                    self.failures += 1
+                    overlays.discard(entry.vm.overlay)
+                elif entry.state == BOOTING and entry.booted(now, self.boot_seconds):
+                    entry.untap()
+                    entry.state = PAUSING
+                    entry.pausing = entry.vm.qmp("stop", new_state="paused")
+                elif entry.state == PAUSING and entry.pausing.done():
+                    if entry.pausing.cancelled() or entry.pausing.exception() is not None:
+                        self._evict(entry)
+                        self.failures += 1
+                    else:
+                        entry.state = READY
+                        entry.ready_at = now
+                elif entry.state == READY and self.max_idle and now - entry.ready_at > self.max_idle:
+                    # Un guest fermo troppo a lungo ha l'orologio indietro: si ricicla
+                    self._evict(entry)
+                    self.evictions += 1
+            # Prima si scartano le istanze piu' indietro nel boot
+            order = {BOOTING: 0, PAUSING: 1, READY: 2}
+            for entry in sorted(self.entries, key=lambda e: order[e.state])[:max(0, len(self.entries) - self.size)]:
+                self._evict(entry)
+                self.evictions += 1
+            while len(self.entries) < self.size:
+                try:
+                    self.entries.append(PoolEntry(self.spawn(), boot_timing.milestones(self.config)))
+                except vm_command.LaunchError:
+                    self.failures += 1
+                    break
+
+    def handout(self, wait=True):
+        # Ritorna (vm, hit): senza istanze pronte la VM parte a freddo e sta ancora facendo il boot.
+        # wait=False (GUI): "cont" non si aspetta, un errore arriva nella console della VM
+        with self.lock:
+            ready = sorted((e for e in self.entries if e.state == READY), key=lambda e: e.ready_at)
+            for entry in ready:
+                self.entries.remove(entry)
+                resumed = entry.vm.qmp("cont", new_state="running")
+                if not wait:
+                    resumed.add_done_callback(self._resumed)
+                    self.hits += 1
+                    return entry.vm, True
+                try:
+                    resumed.result(QMP_TIMEOUT)
+                except QMP_ERRORS:
+                    entry.vm.stop()
+                    self.failures += 1
+                    continue
+                self.hits += 1
+                return entry.vm, True
+            self.misses += 1
+        return self.spawn(), False
+
+    def _resumed(self, future):
+        if future.cancelled() or future.exception() is not None:
+            with self.lock:
+                self.failures += 1
+
+    def run(self, interval=1.0):
+        # Riempimento in background (CLI); la GUI chiama maintain() da un QTimer
+        while not self._stop.wait(interval):
+            self.maintain()
+
+    def shutdown(self):
+        self._stop.set()
+        with self.lock:
+            self.size = 0
+            for entry in list(self.entries):
+                self._evict(entry)
+
+
+def serve(pool, path):
+    # Protocollo a righe su socket unix: "get" -> JSON della VM consegnata, fermata
+    # alla chiusura della connessione; "stats" -> dimensione e contatori del pool
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            vms = []
+            try:
+                for line in self.rfile:
+                    command = line.decode(errors="replace").strip()
+                    if command == "get":
+                        try:
+                            vm, hit = pool.handout()
+                        except vm_command.LaunchError as e:
+                            reply = {"error": str(e)}
+                        else:
+                            vms.append(vm)
+                            reply = {"pid": vm.pid, "qmp": os.path.abspath(vm.qmp_socket),
+                                     "disk": vm.config["disk"], "hit": hit}
+                    elif command == "stats":
+                        reply = pool.stats()
+                    else:
+                        reply = {"error": f"unknown command '{command}'"}
+                    self.wfile.write(json.dumps(reply).encode() + b"\n")
+            finally:
+                for vm in vms:
+                    vm.stop()
+
+    if os.path.exists(path):
+        os.remove(path)
+    server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    server.daemon_threads = True
+    return server